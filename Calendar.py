@@ -15,24 +15,84 @@
 
 # Code adapted from https://developers.google.com/calendar/quickstart/python
 from __future__ import print_function
+import time
+STARTED = time.perf_counter()  # for the --timing startup report
+import atexit
 import datetime
+import glob
 import pickle
 import os.path
+import threading
 from time import strptime
-from googleapiclient.discovery import build
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
 import sys
+from CalendarStore import EventStore
+from CalendarSearch import SearchIndex
+from CalendarModel import Clock, Event, FixedClock
+from CalendarIntervals import WindowIndex
+from CalendarRecurrence import RecurrenceExpander
+from CalendarOffline import OfflineStore, is_offline_error
+from CalendarTransport import authorized_http, set_pool_size
 
 # If modifying these scopes, delete the file token.pickle.
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
+# Cached discovery documents are named after the client library version, so upgrading it invalidates the cache
+DISCOVERY_CACHE_PREFIX = 'discovery-calendar-v3-'
 
-def get_calendar_api():
+# Partial responses, each view only asks for the fields its formatter reads.
+# nextPageToken must stay in every mask or pagination stops after the first page.
+LIST_FIELDS = "nextPageToken,items(id,summary,start)"
+REMINDER_FIELDS = "nextPageToken,items(id,summary,start,reminders)"
+# Changes are sent with events().patch (see patch_event), never the whole resource, so the detail view
+# only fetches what it shows, the fields searched and the etag checked by the offline outbox.
+DETAIL_FIELDS = ("nextPageToken,items(id,etag,status,summary,description,location,visibility,created,"
+                 "creator(email),start,end,attendees(email),reminders)")
+
+# Events per page, the API allows up to 2500. Projected pages are small so fewer, larger pages are cheaper.
+PAGE_SIZE = 2500
+
+# Requests per call to the batch endpoint (the API accepts up to 1000, Google recommends 50)
+BATCH_SIZE = 50
+# Sub-request failures worth retrying: rate limiting and server side errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def get_calendar_api(credentials=None, document=None):
     """
     Get an object which allows you to consume the Google Calendar API.
     You do not need to worry about what this function exactly does, nor create test cases for it.
+    The credentials and discovery document are loaded when not given, see get_calendar_api_factory
+    """
+    # The Google client libraries take a few hundred milliseconds to import, so they are only
+    # imported once the API is needed rather than whenever this module is imported.
+    from googleapiclient.discovery import build_from_document
+
+    if credentials is None:
+        credentials = get_credentials()
+    if document is None:
+        document = load_discovery_document()
+    # requests go through the keep-alive connections of the process wide pool, see CalendarTransport.py
+    return build_from_document(document, http=authorized_http(credentials))
+
+
+def get_calendar_api_factory():
     """
+    Load the credentials and the discovery document now, on the calling thread, and return a function building
+    clients with them. Worker threads (see CalendarMulti.fan_out) each need a client of their own, but must not
+    log in, save token.pickle or replace the discovery cache at the same time
+    """
+    credentials = get_credentials()
+    document = load_discovery_document()
+    return lambda: get_calendar_api(credentials, document)
+
+
+def get_credentials():
+    """
+    Load the saved OAuth credentials, refreshing them or logging in when needed
+    """
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+
     creds = None
     # The file token.pickle stores the user's access and refresh tokens, and is
     # created automatically when the authorization flow completes for the first
@@ -53,113 +113,229 @@ def get_calendar_api():
         with open('token.pickle', 'wb') as token:
             pickle.dump(creds, token)
 
-    return build('calendar', 'v3', credentials=creds)
+    return creds
 
 
-def get_upcoming_events(api, starting_time=datetime.datetime.utcnow().isoformat() + 'Z'):
+def load_discovery_document(directory='.'):
     """
-    Get all upcoming events
+    The Calendar API discovery document, kept on disk so it is only fetched once per client library version
+    """
+    from importlib import metadata
+    path = os.path.join(directory, DISCOVERY_CACHE_PREFIX + metadata.version('google-api-python-client') + '.json')
+    if os.path.exists(path):
+        with open(path) as cache:
+            return cache.read()
+
+    from googleapiclient import discovery_cache
+    from googleapiclient.discovery import DISCOVERY_URI
+
+    get_static_doc = getattr(discovery_cache, 'get_static_doc', None)  # bundled documents, from client 2.0
+    document = get_static_doc('calendar', 'v3') if get_static_doc is not None else None
+    if document is None:
+        import httplib2
+        response, content = httplib2.Http().request(DISCOVERY_URI.format(api='calendar', apiVersion='v3'))
+        document = content.decode('utf-8')
+
+    for stale in glob.glob(os.path.join(directory, DISCOVERY_CACHE_PREFIX + '*.json')):
+        os.remove(stale)
+    with open(path, 'w') as cache:
+        cache.write(document)
+    return document
+
+
+class LazyCalendarApi:
+    """
+    Stands in for the object returned by get_calendar_api, which is only built (logging in if needed)
+    the first time the API is actually used, so the prompt or window shows up straight away
+    """
+
+    def __init__(self, factory=get_calendar_api, report=False):
+        self.factory = factory
+        self.report = report
+        self.api = None
+        self.lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if self.api is None:
+            with self.lock:
+                if self.api is None:
+                    started = time.perf_counter()
+                    self.api = self.factory()
+                    if self.report:
+                        print("Calendar client built in %.0f ms" % ((time.perf_counter() - started) * 1000))
+        return getattr(self.api, name)
 
+
+clock = Clock()
+
+
+def list_events(api, fields=None, page_size=PAGE_SIZE, calendarId='primary', **query):
     """
-    results = ""
-    # Block of code below adapted from: https://stackoverflow.com/a/48750522/
-    if len(starting_time.split('-')) != 3:  # check if the len is 3.
-        raise ValueError("starting time provided is not of format")
+    Lazily yield every event matching the query, following nextPageToken across all pages.
+    Only one page of results is held in memory at a time, so callers can start processing
+    events before the last page has been downloaded.
+    fields is a partial response mask (see LIST_FIELDS), None returns complete events.
+    """
+    page_token = None
+    while True:
+        events_result = api.events().list(calendarId=calendarId, pageToken=page_token, maxResults=page_size,
+                                          fields=fields, **query).execute()
+        for event in events_result.get('items', []):
+            yield event
+        if 'nextPageToken' not in events_result:  # last page reached
+            break
+        page_token = events_result['nextPageToken']
 
-    events_result = api.events().list(calendarId='primary', timeMin=starting_time,
-                                      singleEvents=True,
-                                      orderBy='startTime').execute()
-    result = events_result.get('items', [])
 
-    for event in result:
-        start = event['start'].get('dateTime', event['start'].get('date'))
-        results += event.get('summary', "No title") + "," + start + "\n"
-    return results
+def event_lines(events):
+    """
+    Yield one "title,start" line per event. Raw events are read in place rather than decoded into an Event,
+    since only their summary and start are shown
+    """
+    for event in events:
+        if isinstance(event, Event):
+            yield event.title + "," + event.start_text + "\n"
+        else:
+            start = event['start']
+            yield event.get('summary', "No title") + "," + start.get('dateTime', start.get('date')) + "\n"
 
 
-def get_past_events(api, starting_time, end_time=datetime.datetime.utcnow().isoformat() + 'Z'):
+def reminder_lines(events):
     """
-    Shows past events given the time from today's date if date not specified
+    Yield one line per event listing its reminders, reading raw events in place like event_lines
+    """
+    for event in events:
+        if isinstance(event, Event):
+            yield "".join([event.title + "," + text for text in event.reminder_texts()]) + "\n"
+            continue
+        prefix = event.get('summary', "No title") + ",Reminder through "
+        reminders = event.get('reminders', {})
+        if reminders.get('useDefault') == True:
+            yield prefix + "popup 10 minutes before event starts\n"
+        else:
+            yield "".join([prefix + override.get('method') + " " + str(override.get('minutes')) +
+                           " minutes before event starts" for override in reminders.get('overrides', [])]) + "\n"
+
+
+def render(lines, stream=None):
+    """
+    Join the lines into one string, or when a stream is given write each line as soon as it is produced
+    (so output starts before the last page has been fetched) and return an empty string
     """
-    results = ""
+    if stream is None:
+        return "".join(lines)
+    for line in lines:
+        stream.write(line)
+    stream.flush()
+    return ""
+
+
+def format_events(events, stream=None):
+    return render(event_lines(events), stream)
+
+
+def format_reminders(events, stream=None):
+    return render(reminder_lines(events), stream)
+
+
+def validate_window(starting_time, end_time):
     # Block of code below adapted from: https://stackoverflow.com/a/48750522/
     if len(starting_time.split('-')) != 3:  # check if the len is 3.
         raise ValueError("starting time provided is not of format")
 
-    # Block of code below adapted from: https://stackoverflow.com/a/48750522/
     if len(end_time.split('-')) != 3:  # check if the len is 3.
         raise ValueError("starting time provided is not of format")
 
     if end_time < starting_time:
         raise ValueError("End time provided is less than the starting time")
 
-    events_result = api.events().list(calendarId='primary', timeMin=starting_time, timeMax=end_time, singleEvents=True,
-                                      orderBy='startTime').execute()
-    result = events_result.get('items', [])
-
-    for event in result:
-        start = event['start'].get('dateTime', event['start'].get('date'))
-        results += event.get('summary', "No title") + "," + start + "\n"
-    return results
-
 
-def get_past_reminders(api, starting_time, end_time=datetime.datetime.utcnow().isoformat() + 'Z'):
+def get_upcoming_events(api, starting_time=None, store=None, stream=None):
     """
-    Shows past reminders given a start date and/if end time specified
+    Get all upcoming events
 
     """
+    if starting_time is None:
+        starting_time = clock.timestamp()
     # Block of code below adapted from: https://stackoverflow.com/a/48750522/
     if len(starting_time.split('-')) != 3:  # check if the len is 3.
         raise ValueError("starting time provided is not of format")
 
-    if len(end_time.split('-')) != 3:  # check if the len is 3.
-        raise ValueError("starting time provided is not of format")
+    if store is not None:
+        result = store.get_events(api, starting_time)
+    else:
+        result = list_events(api, LIST_FIELDS, timeMin=starting_time, singleEvents=True, orderBy='startTime')
+    return format_events(result, stream)
 
-    reminders = ""
-    if end_time < starting_time:
-        raise ValueError("End time provided is less than the starting time")
-    events_result = api.events().list(calendarId='primary', timeMin=starting_time, timeMax=end_time, singleEvents=True,
-                                      orderBy='startTime').execute()
-    events = events_result.get('items', [])
-    for event in events:
-        if event['reminders'].get("useDefault") == True:
-            reminders += event.get('summary',
-                                   "No title") + "," + "Reminder through popup 10 minutes before event starts"
-        else:
-            for i in event["reminders"].get("overrides", []):
-                reminders += event.get('summary', "No title") + "," + "Reminder through " + i.get("method") + " " + str(
-                    i.get("minutes")) + " minutes before event starts"
-        reminders += "\n"
-    return reminders
+
+def get_past_events(api, starting_time, end_time=None, store=None, stream=None):
+    """
+    Shows past events given the time from today's date if date not specified
+    """
+    if end_time is None:
+        end_time = clock.timestamp()
+    validate_window(starting_time, end_time)
+
+    if store is not None:
+        result = store.get_events(api, starting_time, end_time)
+    else:
+        result = list_events(api, LIST_FIELDS, timeMin=starting_time, timeMax=end_time, singleEvents=True,
+                             orderBy='startTime')
+    return format_events(result, stream)
+
+
+def get_past_reminders(api, starting_time, end_time=None, store=None, stream=None):
+    """
+    Shows past reminders given a start date and/if end time specified
+
+    """
+    if end_time is None:
+        end_time = clock.timestamp()
+    validate_window(starting_time, end_time)
+
+    if store is not None:
+        events = store.get_events(api, starting_time, end_time)
+    else:
+        events = list_events(api, REMINDER_FIELDS, timeMin=starting_time, timeMax=end_time, singleEvents=True,
+                             orderBy='startTime')
+    return format_reminders(events, stream)
 
 
-def get_upcoming_reminders(api, starting_time=datetime.datetime.utcnow().isoformat() + 'Z'):
+def get_upcoming_reminders(api, starting_time=None, store=None, stream=None):
     """
     Shows upcoming reminders from todays date and time if starting date is not specified
 
     """
+    if starting_time is None:
+        starting_time = clock.timestamp()
     # Block of code below adapted from: https://stackoverflow.com/a/48750522/
 
     if len(starting_time.split('-')) != 3:  # check if the len is 3.
         raise ValueError("starting time provided is not of format")
 
-    reminders = ""
-    events_result = api.events().list(calendarId='primary', timeMin=starting_time, singleEvents=True,
-                                      orderBy='startTime').execute()
-    events = events_result.get('items', [])
-    for event in events:
-        if event['reminders'].get("useDefault") == True:
-            reminders += event.get('summary',
-                                   "No title") + "," + "Reminder through popup 10 minutes before event starts"
-        else:
-            for i in event["reminders"].get("overrides", []):
-                reminders += event.get('summary', "No title") + "," + "Reminder through " + i.get("method") + " " + str(
-                    i.get("minutes")) + " minutes before event starts"
-        reminders += "\n"
-    return reminders
+    if store is not None:
+        events = store.get_events(api, starting_time)
+    else:
+        events = list_events(api, REMINDER_FIELDS, timeMin=starting_time, singleEvents=True, orderBy='startTime')
+    return format_reminders(events, stream)
+
+
+def get_window_events_and_reminders(api, starting_time, end_time, store=None):
+    """
+    Shows both the events and the reminders of a time window from a single fetch
+    """
+    validate_window(starting_time, end_time)
+
+    if store is not None:
+        events = list(store.get_events(api, starting_time, end_time))
+    else:
+        # REMINDER_FIELDS is a superset of LIST_FIELDS so one request serves both sections
+        events = list(list_events(api, REMINDER_FIELDS, timeMin=starting_time, timeMax=end_time, singleEvents=True,
+                                  orderBy='startTime'))
+    return "".join(["EVENTS: \n", format_events(events), "\n", "REMINDERS: \n", format_reminders(events)])
 
 
-def navigate_calendar(api, date, navigation_type):
+def navigate_calendar(api, date, navigation_type, store=None):
     result = ""
     month = str(date.month)
     year = str(date.year)
@@ -168,122 +344,79 @@ def navigate_calendar(api, date, navigation_type):
     if navigation_type == "MONTH" and month == "2":
         try:
             dates = datetime.datetime.strptime(year + "-" + month + "-" + "28" + " 23:59:59", '%Y-%m-%d %H:%M:%S')
-            result += "EVENTS: \n"
-            result += get_past_events(api, date.isoformat() + "Z", dates.isoformat() + "Z")
-            result += "\n"
-            result += "REMINDERS: \n"
-            result += get_past_reminders(api, date.isoformat() + "Z", dates.isoformat() + "Z")
+            result += get_window_events_and_reminders(api, date.isoformat() + "Z", dates.isoformat() + "Z", store)
         except ValueError:
             dates = datetime.datetime.strptime(year + "-" + month + "-" + "29" + " 23:59:59", '%Y-%m-%d %H:%M:%S')
-            result += "EVENTS: \n"
-            result += get_past_events(api, date.isoformat() + "Z", dates.isoformat() + "Z")
-            result += "\n"
-            result += "REMINDERS: \n"
-            result += get_past_reminders(api, date.isoformat() + "Z", dates.isoformat() + "Z")
+            result += get_window_events_and_reminders(api, date.isoformat() + "Z", dates.isoformat() + "Z", store)
             result += "\n"
     elif navigation_type == "MONTH":
         try:
             dates = datetime.datetime.strptime(year + "-" + month + "-" + "31" + " 23:59:59", '%Y-%m-%d %H:%M:%S')
-            result += "EVENTS: \n"
-            result += get_past_events(api, date.isoformat() + "Z", dates.isoformat() + "Z")
-            result += "\n"
-            result += "REMINDERS: \n"
-            result += get_past_reminders(api, date.isoformat() + "Z", dates.isoformat() + "Z")
+            result += get_window_events_and_reminders(api, date.isoformat() + "Z", dates.isoformat() + "Z", store)
         except ValueError:
             dates = datetime.datetime.strptime(year + "-" + month + "-" + "30" + " 23:59:59", '%Y-%m-%d %H:%M:%S')
-            result += "EVENTS: \n"
-            result += get_past_events(api, date.isoformat() + "Z", dates.isoformat() + "Z")
-            result += "\n"
-            result += "REMINDERS: \n"
-            result += get_past_reminders(api, date.isoformat() + "Z", dates.isoformat() + "Z")
+            result += get_window_events_and_reminders(api, date.isoformat() + "Z", dates.isoformat() + "Z", store)
             result += "\n"
 
     elif navigation_type == "YEAR":
         dates = datetime.datetime.strptime(year + "-" + "12" + "-" + "31" + " 23:59:59", '%Y-%m-%d %H:%M:%S')
-        result += "EVENTS: \n"
-        result += get_past_events(api, date.isoformat() + "Z", dates.isoformat() + "Z")
-        result += "\n"
-        result += get_past_reminders(api, date.isoformat() + "Z", dates.isoformat() + "Z")
-        result += "REMINDERS: \n"
+        result += get_window_events_and_reminders(api, date.isoformat() + "Z", dates.isoformat() + "Z", store)
 
     elif navigation_type == "DAY":
         dates = datetime.datetime.strptime(year + "-" + month + "-" + day + " 23:59:59", '%Y-%m-%d %H:%M:%S')
-        result += "EVENTS: \n"
-        result += get_past_events(api, date.isoformat() + "Z", dates.isoformat() + "Z")
-        result += "\n"
-        result += "REMINDERS: \n"
-        result += get_past_reminders(api, date.isoformat() + "Z", dates.isoformat() + "Z")
+        result += get_window_events_and_reminders(api, date.isoformat() + "Z", dates.isoformat() + "Z", store)
     else:
         raise ValueError("Navigation type is wrong")
     return result
 
 
 def get_detailed_event(event):
-    detailed_description = ""
-    if event.get("summary") == None:  # None means no key for event title, subsequent event data cannnot be retrieved
-        raise ValueError("Wrong argument passed into")
+    detailed_description = []
     # NOTE:
     # if parameter passed in is of other type, Attribute Errors will be raised
-    detailed_description += "Title: " + event.get('summary', "No title") + "\n"
-
-    if event.get("visibility") is not None:
-        detailed_description += "Visibility: " + event.get("visibility") + "\n"
-    detailed_description += "Status: " + event["status"] + "\n"
-    detailed_description += "Created: " + event["created"] + "\n"
-    detailed_description += "Creator: " + event["creator"].get("email") + "\n"
-    detailed_description += "Start: " + event['start'].get('dateTime', event['start'].get('date')) + "\n"
-    detailed_description += "End: " + event['end'].get('dateTime', event['end'].get('date')) + "\n"
-    if event.get("location") is not None:
-        detailed_description += "Location: " + event.get("location") + "\n"
-    if event.get("attendees") is not None:
-        detailed_description += "Attendees: "
-        for attendees in event["attendees"]:
-            detailed_description += attendees.get("email") + ", "
-    detailed_description = detailed_description[:-2]  # strip commas at the end
-    detailed_description += "\n"
-    return detailed_description
-
-
-def get_searched_events(api, query):
+    event = Event.decode(event)
+    if event.summary == None:  # None means no key for event title, subsequent event data cannnot be retrieved
+        raise ValueError("Wrong argument passed into")
+    detailed_description.append("Title: " + event.title + "\n")
+
+    if event.visibility is not None:
+        detailed_description.append("Visibility: " + event.visibility + "\n")
+    detailed_description.append("Status: " + event.status + "\n")
+    detailed_description.append("Created: " + event.created + "\n")
+    detailed_description.append("Creator: " + event.creator + "\n")
+    detailed_description.append("Start: " + event.start_text + "\n")
+    detailed_description.append("End: " + event.end_text + "\n")
+    if event.location is not None:
+        detailed_description.append("Location: " + event.location + "\n")
+    if event.attendees is not None:
+        detailed_description.append("Attendees: ")
+        for email in event.attendees:
+            detailed_description.append(email + ", ")
+    return "".join(detailed_description)[:-2] + "\n"  # strip commas at the end
+
+
+def get_searched_events(api, query, stream=None, index=None):
     if query is None:
         raise TypeError
     elif query.strip() == "":
         raise ValueError
+    elif index is not None:
+        return format_events(index.get_events(api, query), stream)
     else:
-        events = api.events().list(calendarId='primary', singleEvents=True, orderBy='startTime', q=query).execute()
-        results = ""
-        result = events.get('items', [])
+        result = list_events(api, LIST_FIELDS, singleEvents=True, orderBy='startTime', q=query)
+        return format_events(result, stream)
 
-        for event in result:
-            start = event['start'].get('dateTime', event['start'].get('date'))
-            results += event.get("summary", "No title") + "," + start
-            results += "\n"
-        return results
 
-
-def get_searched_reminders(api, query):
+def get_searched_reminders(api, query, stream=None, index=None):
     if query is None:
         raise TypeError
     elif query.strip() == "":
         raise ValueError
-
+    elif index is not None:
+        return format_reminders(index.get_events(api, query), stream)
     else:
-        reminders = ""
-        events = api.events().list(calendarId='primary', singleEvents=True, orderBy='startTime', q=query).execute()
-        result = events.get('items', [])
-        for event in result:
-
-            if event['reminders'].get("useDefault") == True:
-                reminders += event.get("summary",
-                                       "No title") + "," + "Reminder through popup 10 minutes before event starts"
-            else:
-                for i in event["reminders"].get("overrides", []):
-                    reminders += event.get("summary", "No title") + "," + "Reminder through " + i.get(
-                        "method") + " " + str(
-                        i.get("minutes")) + " minutes before event starts"
-            reminders += "\n"
-
-        return reminders
+        result = list_events(api, REMINDER_FIELDS, singleEvents=True, orderBy='startTime', q=query)
+        return format_reminders(result, stream)
 
 
 def delete_events(api, event):
@@ -295,7 +428,19 @@ def delete_events(api, event):
         api.events().delete(calendarId='primary', eventId=event["id"]).execute()
 
 
-def delete_reminders(api, event, reminder_index=-1):
+def patch_event(api, event, *fields):
+    """
+    Request changing only the given fields of event, the rest of the event is not sent
+    """
+    return api.events().patch(calendarId='primary', eventId=event['id'],
+                              body={field: event[field] for field in fields})
+
+
+def delete_reminders(api, event, reminder_index=-1, outbox=None):
+    """
+    Remove a reminder of event. With an outbox (an OfflineStore) the change is written behind, coalesced with
+    the other reminder edits of the event, and None is returned instead of the update time
+    """
     if event is None:
         raise TypeError
     elif reminder_index is None:
@@ -304,34 +449,122 @@ def delete_reminders(api, event, reminder_index=-1):
     reminders = event["reminders"].get("overrides", [])
     if event['reminders'].get("useDefault", False):
         event['reminders'] = {"useDefault": False, "overrides": []}
-        retval = api.events().update(calendarId='primary', eventId=event['id'], body=event).execute()
-        return retval.get('updated', None)
     elif reminder_index >= len(reminders):
         raise IndexError
     else:
         event["reminders"]["overrides"].pop(reminder_index)
-        retval = api.events().update(calendarId='primary', eventId=event['id'], body=event).execute()
-        return retval.get('updated', None)
+    if outbox is not None:
+        outbox.write_behind(api, event)
+        return None
+    retval = patch_event(api, event, 'reminders').execute()
+    return retval.get('updated', None)
+
+
+def execute_batch(api, requests, retries=3, backoff=1.0):
+    """
+    Send the requests through the batch endpoint, BATCH_SIZE sub-requests per HTTP call.
+    requests maps an id to a function building the request, so that only the sub-requests which
+    failed with a retriable status are rebuilt and sent again, with exponential backoff in between.
+    Returns a dict of id -> None when the sub-request succeeded, or the exception of its last attempt
+    """
+    results = {}
+    pending = list(requests)
+    for attempt in range(retries + 1):
+        if attempt > 0:
+            time.sleep(backoff * 2 ** (attempt - 1))
+        failed = []
+
+        def callback(request_id, response, exception):
+            results[request_id] = exception
+            status = getattr(getattr(exception, 'resp', None), 'status', None)
+            if exception is not None and status in RETRY_STATUSES:
+                failed.append(request_id)
+
+        for chunk in range(0, len(pending), BATCH_SIZE):
+            batch = api.new_batch_http_request(callback=callback)
+            for request_id in pending[chunk:chunk + BATCH_SIZE]:
+                batch.add(requests[request_id](), request_id=request_id)
+            batch.execute()
+        pending = failed
+        if not pending:
+            break
+    return results
+
+
+def select_events(api, events, query, starting_time, end_time, fields):
+    """
+    The events given, or every event matching the search query and/or time window
+    """
+    if events is not None:
+        return events
+    if query is None and starting_time is None and end_time is None:
+        raise TypeError
+    return list_events(api, fields, timeMin=starting_time, timeMax=end_time, singleEvents=True, q=query)
+
+
+def delete_events_bulk(api, events=None, query=None, starting_time=None, end_time=None, retries=3, backoff=1.0):
+    """
+    Delete many events with a handful of batch requests instead of one HTTP request per event.
+    Either pass the events, or a search query and/or time window selecting them.
+    Returns a dict of event id -> None if deleted, or the exception which prevented it
+    """
+    requests = {}
+    for event in select_events(api, events, query, starting_time, end_time, "nextPageToken,items(id)"):
+        if event is None:
+            raise TypeError
+        elif not event.get("id", False):
+            raise ValueError
+        requests[event["id"]] = lambda event_id=event["id"]: api.events().delete(calendarId='primary',
+                                                                                 eventId=event_id)
+    return execute_batch(api, requests, retries, backoff)
+
+
+def delete_reminders_bulk(api, events=None, query=None, starting_time=None, end_time=None, retries=3, backoff=1.0):
+    """
+    Remove every reminder (default and overrides) of many events through the batch endpoint.
+    Either pass the events, or a search query and/or time window selecting them.
+    Returns a dict of event id -> None if updated, or the exception which prevented it
+    """
+    requests = {}
+    for event in select_events(api, events, query, starting_time, end_time, "nextPageToken,items(id)"):
+        if event is None:
+            raise TypeError
+        elif not event.get("id", False):
+            raise ValueError
+        event['reminders'] = {"useDefault": False, "overrides": []}
+        requests[event["id"]] = lambda event=event: patch_event(api, event, 'reminders')
+    return execute_batch(api, requests, retries, backoff)
 
 
 def get_detailed_reminders(event):
-    detailed_description = ""
-    if event.get("start") == None:  # None means no key for event start time, subsequent event data cannnot be retrieved
-        raise ValueError("Wrong argument passed into")
+    detailed_description = []
     # NOTE:
     # if parameter passed in is of other type, Attribute Errors will be raised
-    if event['reminders'].get("useDefault") == True:
-        detailed_description += event["summary"] + "," + "Reminder through popup 10 minutes before event starts"
-    else:
-        for i in event["reminders"].get("overrides", []):
-            detailed_description += event.get('summary', 'No title') + "," + "Reminder through " + i.get(
-                "method") + " " + str(
-                i.get("minutes")) + " minutes before event starts"
-    detailed_description += "\n"
-    return detailed_description
+    event = Event.decode(event)
+    if event.start_text == None:  # None means no key for event start time, subsequent event data cannnot be retrieved
+        raise ValueError("Wrong argument passed into")
+    for text in event.reminder_texts():
+        detailed_description.append(event.title + "," + text)
+    detailed_description.append("\n")
+    return "".join(detailed_description)
+
+
+def send_or_queue(offline, kind, event, send):
+    """
+    Call send, or when the api cannot be reached queue the write ('delete' or 'update' to event) in the outbox
+    of offline (an OfflineStore). Returns True when the write was queued
+    """
+    try:
+        send()
+    except Exception as error:
+        if offline is None or not is_offline_error(error):
+            raise
+        offline.queue(kind, event)
+        return True
+    return False
 
 
-def run_calendar(api):
+def run_calendar(api, store=None, index=None, offline=None):
     print("Welcome to MLLMAOTEAM Google Calendar Viewer v1.0")
     today = datetime.datetime.today().strftime('%Y-%m-%d')
     print("Todays date(YY-MM-DD): " + today)
@@ -342,20 +575,27 @@ def run_calendar(api):
         print(directive)
     print("-e is for events, while -r is for reminders")
     while True:
+        if offline is not None:
+            banner = offline.banner()  # results of the last command came from the snapshot
+            if banner:
+                print(banner)
         command = input("command>")
         if command not in directives:
             print("Invalid command. Please try again!")
             continue
         if command == "upcoming -e":
-            print(get_upcoming_events(api))
+            get_upcoming_events(api, store=store, stream=sys.stdout)
+            print()
         elif command == "upcoming -r":
-            print(get_upcoming_reminders(api))
+            get_upcoming_reminders(api, store=store, stream=sys.stdout)
+            print()
         elif command == "past -e":
             while True:
                 try:
                     past_date = input("Enter the date how long in the past in YYYY-MM-DD format only: ")
                     date = datetime.datetime.strptime(past_date, "%Y-%m-%d").isoformat() + ".000000Z"
-                    print(get_past_events(api, date))
+                    get_past_events(api, date, store=store, stream=sys.stdout)
+                    print()
                     break
                 except ValueError:
                     print("Wrong format please try again")
@@ -364,16 +604,19 @@ def run_calendar(api):
                 try:
                     past_date = input("Enter the date how long in the past in YYYY-MM-DD format only: ")
                     date = datetime.datetime.strptime(past_date, "%Y-%m-%d").isoformat() + ".000000Z"
-                    print(get_past_reminders(api, date))
+                    get_past_reminders(api, date, store=store, stream=sys.stdout)
+                    print()
                     break
                 except ValueError:
                     print("Wrong format please try again")
         elif command == "search -e":
             query = input("Enter search query: ")
-            print(get_searched_events(api, query))
+            get_searched_events(api, query, sys.stdout, index)
+            print()
         elif command == "search -r":
             query = input("Enter search query: ")
-            print(get_searched_reminders(api, query))
+            get_searched_reminders(api, query, sys.stdout, index)
+            print()
         elif command == "navigate":
             nav_type = ["MONTH", "DAY", "YEAR"]
             while True:
@@ -387,26 +630,39 @@ def run_calendar(api):
                     nav_date = input("Enter date of navigation exactly in DD Month YYYY format(eg. 21 January 2020): ")
                     date_inputted = datetime.datetime.strptime(nav_date, '%d %B %Y')
                     date = date_formatter(date_inputted, nav_type[nav])
-                    print(navigate_calendar(api, date, nav_type[nav]))
+                    print(navigate_calendar(api, date, nav_type[nav], store))
                     decision = input("View Event? y/n \n")
                     if decision == "y":
                         event = input("Input full name of the event: ")
-                        events = api.events().list(calendarId='primary', singleEvents=True, orderBy='startTime',
-                                                   q=event).execute()
                         try:
-                            sole_event = get_selected_event(events.get('items', []))
+                            events = list(list_events(api, DETAIL_FIELDS, singleEvents=True, orderBy='startTime',
+                                                      q=event))
+                            if offline is not None:
+                                events = offline.overlay(events)  # reminder edits not sent yet
+                        except Exception as error:
+                            if offline is None or not is_offline_error(error):
+                                raise
+                            events = offline.find(event)
+                        try:
+                            sole_event = get_selected_event(events)
                             print(get_detailed_event(sole_event))
                             print(get_detailed_reminders(sole_event))
                             des = input("Enter 'del' to delete event, 'del -r' to delete reminders.").strip().lower()
                             if des == "del":
-                                delete_events(api, sole_event)
-                                print("Deleted event successfully")
+                                if send_or_queue(offline, 'delete', sole_event,
+                                                 lambda: delete_events(api, sole_event)):
+                                    print("Offline, the event will be deleted once back online")
+                                else:
+                                    print("Deleted event successfully")
                                 break
                             elif des == "del -r":
                                 reminder_index = get_selected_reminders(sole_event)
                                 if reminder_index is not None:
-                                    delete_reminders(api, sole_event, reminder_index)
-                                    print("Deleted reminder succesfully")
+                                    delete_reminders(api, sole_event, reminder_index, offline)
+                                    if offline is not None and offline.offline:
+                                        print("Offline, the reminder will be deleted once back online")
+                                    else:
+                                        print("Deleted reminder succesfully")
                                 break
                             else:
                                 print("No delete instruction, returning to calendar...")
@@ -427,20 +683,22 @@ def run_calendar(api):
             print("\n")
             print("Contact devs at acho0057@student.monash.edu and apan0027@student.monash.edu for further help")
         elif command == "exit":
+            if offline is not None:
+                offline.flush(api)  # the reminder edits still held back
             break
 
 
 def get_selected_event(results):
     dict = {}
-    prompt = ""
+    prompt = []
 
     for event in range(len(results)):
         dict[event] = results[event]
 
-        start = results[event]['start'].get('dateTime', results[event]['start'].get('date'))
-        prompt += str(event) + ": " + results[event].get('summary', "No title") + "," + start + "\n"
+        decoded = Event.decode(results[event])
+        prompt.append(str(event) + ": " + decoded.title + "," + decoded.start_text + "\n")
     # if dict
-    print(prompt)
+    print("".join(prompt))
 
     userselect = None
     try:
@@ -456,7 +714,7 @@ def get_selected_event(results):
 
 def get_selected_reminders(event):
     dict = {}
-    prompt = ""
+    prompt = []
     reminderobj = event.get("reminders", {})
 
     if reminderobj.get("useDefault", False):
@@ -465,11 +723,11 @@ def get_selected_reminders(event):
     overrides = reminderobj.get("overrides", [])
 
     for i in range(len(overrides)):
-        prompt += str(i) + ". Reminder through " + overrides[i].get("method") + " " + str(
-            overrides[i].get("minutes")) + " minutes before event starts\n"
+        prompt.append(str(i) + ". Reminder through " + overrides[i].get("method") + " " + str(
+            overrides[i].get("minutes")) + " minutes before event starts\n")
         dict[i] = overrides[i]
 
-    print(prompt)
+    print("".join(prompt))
     selected = None
     try:
         index = int(input("Select a reminder to delete: "))
@@ -493,8 +751,21 @@ def date_formatter(date_inputted, nav_type):
 
 
 def main():
-    api = get_calendar_api()
-    run_calendar(api)
+    timing = "--timing" in sys.argv
+    for argument in sys.argv:
+        if argument.startswith("--pool-size="):  # connections kept alive, see CalendarTransport.py
+            set_pool_size(int(argument[len("--pool-size="):]))
+    api = LazyCalendarApi(report=timing)
+    store = OfflineStore(EventStore(), clock=clock)
+    atexit.register(store.flush, api)  # also when interrupted
+    index = SearchIndex(store)
+    if "--expand-locally" in sys.argv:  # list recurring events once and generate their instances here
+        windows = RecurrenceExpander(store=store, clock=clock)
+    else:
+        windows = WindowIndex(store)
+    if timing:
+        print("Startup took %.0f ms" % ((time.perf_counter() - STARTED) * 1000))
+    run_calendar(api, windows, index, store)
 
 
 if __name__ == "__main__":  # Prevents the main() function from being called by the test suite runner
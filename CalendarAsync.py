@@ -0,0 +1,168 @@
+# Asyncio counterpart of the query functions in Calendar.py, for server processes answering many users' queries
+# concurrently on one event loop. Requests go straight to the REST endpoint through a pooled aiohttp session.
+# aiohttp is only needed by this module: pip install aiohttp
+# https://developers.google.com/calendar/v3/reference/events/list
+import asyncio
+from urllib.parse import quote
+import Calendar
+
+EVENTS_URL = "https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events"
+
+
+class AsyncCalendarError(Exception):
+    """
+    Raised when the API answers with an error status
+    """
+
+    def __init__(self, status, message):
+        super().__init__("Calendar API returned %d: %s" % (status, message))
+        self.status = status
+
+
+class AsyncCalendarClient:
+    """
+    Sends events().list requests without blocking the event loop. All requests share one aiohttp session,
+    whose connector keeps up to pool_size connections alive for reuse.
+    Use as "async with AsyncCalendarClient(credentials) as client:" or call close() when done.
+    """
+
+    def __init__(self, credentials=None, pool_size=100, session=None):
+        self.credentials = credentials
+        self.pool_size = pool_size
+        self.session = session
+        self.lock = None  # guards loading and refreshing the credentials, made inside the running event loop
+        self.lock_loop = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def get_session(self):
+        if self.session is None:
+            import aiohttp
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size))
+        return self.session
+
+    async def get_headers(self):
+        if self.credentials is None or not self.credentials.valid:
+            loop = asyncio.get_running_loop()
+            if self.lock is None or self.lock_loop is not loop:  # a lock only works on the loop which made it
+                self.lock, self.lock_loop = asyncio.Lock(), loop
+            # Concurrent first queries wait for one load (or refresh) instead of each starting their own
+            async with self.lock:
+                if self.credentials is None:
+                    # Loading (and maybe refreshing) the credentials does blocking I/O, keep it off the event loop
+                    self.credentials = await loop.run_in_executor(None, Calendar.get_credentials)
+                if not self.credentials.valid:
+                    from google.auth.transport.requests import Request
+                    await loop.run_in_executor(None, self.credentials.refresh, Request())
+        headers = {}
+        self.credentials.apply(headers)
+        return headers
+
+    async def list(self, calendarId='primary', **query):
+        """
+        Fetch one page of events().list, taking the same keyword arguments as the discovery client
+        """
+        params = {}
+        for key, value in query.items():
+            if value is None:
+                continue
+            params[key] = ("true" if value else "false") if isinstance(value, bool) else value
+        session = await self.get_session()
+        # calendar ids are emails (team@group.calendar.google.com, ...), quoted as one path segment
+        async with session.get(EVENTS_URL.format(calendar_id=quote(calendarId, safe='')), params=params,
+                               headers=await self.get_headers()) as response:
+            if response.status >= 400:
+                raise AsyncCalendarError(response.status, await response.text())
+            return await response.json()
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+async def list_events(client, fields=None, page_size=Calendar.PAGE_SIZE, **query):
+    """
+    Asynchronously yield every event matching the query, following nextPageToken like Calendar.list_events
+    """
+    page_token = None
+    while True:
+        events_result = await client.list(calendarId='primary', pageToken=page_token, maxResults=page_size,
+                                          fields=fields, **query)
+        for event in events_result.get('items', []):
+            yield event
+        if 'nextPageToken' not in events_result:  # last page reached
+            break
+        page_token = events_result['nextPageToken']
+
+
+async def render(line_function, events):
+    """
+    Join the lines of Calendar.event_lines or Calendar.reminder_lines for events arriving asynchronously
+    """
+    lines = []
+    async for event in events:
+        lines.extend(line_function((event,)))
+    return "".join(lines)
+
+
+async def get_upcoming_events(client, starting_time=None):
+    if starting_time is None:
+        starting_time = Calendar.clock.timestamp()
+    # Block of code below adapted from: https://stackoverflow.com/a/48750522/
+    if len(starting_time.split('-')) != 3:  # check if the len is 3.
+        raise ValueError("starting time provided is not of format")
+    events = list_events(client, Calendar.LIST_FIELDS, timeMin=starting_time, singleEvents=True,
+                         orderBy='startTime')
+    return await render(Calendar.event_lines, events)
+
+
+async def get_past_events(client, starting_time, end_time=None):
+    if end_time is None:
+        end_time = Calendar.clock.timestamp()
+    Calendar.validate_window(starting_time, end_time)
+    events = list_events(client, Calendar.LIST_FIELDS, timeMin=starting_time, timeMax=end_time, singleEvents=True,
+                         orderBy='startTime')
+    return await render(Calendar.event_lines, events)
+
+
+async def get_upcoming_reminders(client, starting_time=None):
+    if starting_time is None:
+        starting_time = Calendar.clock.timestamp()
+    # Block of code below adapted from: https://stackoverflow.com/a/48750522/
+    if len(starting_time.split('-')) != 3:  # check if the len is 3.
+        raise ValueError("starting time provided is not of format")
+    events = list_events(client, Calendar.REMINDER_FIELDS, timeMin=starting_time, singleEvents=True,
+                         orderBy='startTime')
+    return await render(Calendar.reminder_lines, events)
+
+
+async def get_past_reminders(client, starting_time, end_time=None):
+    if end_time is None:
+        end_time = Calendar.clock.timestamp()
+    Calendar.validate_window(starting_time, end_time)
+    events = list_events(client, Calendar.REMINDER_FIELDS, timeMin=starting_time, timeMax=end_time,
+                         singleEvents=True, orderBy='startTime')
+    return await render(Calendar.reminder_lines, events)
+
+
+async def get_searched_events(client, query):
+    if query is None:
+        raise TypeError
+    elif query.strip() == "":
+        raise ValueError
+    events = list_events(client, Calendar.LIST_FIELDS, singleEvents=True, orderBy='startTime', q=query)
+    return await render(Calendar.event_lines, events)
+
+
+async def get_searched_reminders(client, query):
+    if query is None:
+        raise TypeError
+    elif query.strip() == "":
+        raise ValueError
+    events = list_events(client, Calendar.REMINDER_FIELDS, singleEvents=True, orderBy='startTime', q=query)
+    return await render(Calendar.reminder_lines, events)
@@ -0,0 +1,89 @@
+# Benchmark for the partial response field masks used by the list calls in Calendar.py.
+# The server side projection is reproduced locally on synthetic events, so no API access is needed.
+# Run with: python CalendarBenchmarkFields.py [number of events]
+import json
+import sys
+import time
+import Calendar
+
+
+def parse_mask(mask):
+    """
+    Turn a fields mask such as "nextPageToken,items(id,start)" into a nested dict, {} meaning the whole value
+    """
+    tree = {}
+    stack = [tree]
+    name = ""
+    for char in mask + ",":
+        if char in ",()":
+            if name.strip():
+                stack[-1][name.strip()] = {}
+            if char == "(":
+                stack.append(stack[-1][name.strip()])
+            elif char == ")":
+                stack.pop()
+            name = ""
+        else:
+            name += char
+    return tree
+
+
+def project(value, tree):
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [project(each, tree) for each in value]
+    return {key: project(value[key], tree[key]) for key in tree if key in value}
+
+
+def make_page(count):
+    items = []
+    for i in range(count):
+        items.append({
+            "kind": "calendar#event",
+            "etag": "\"31%08d\"" % i,
+            "id": "event%d" % i,
+            "status": "confirmed",
+            "htmlLink": "https://www.google.com/calendar/event?eid=event%d" % i,
+            "created": "2020-10-09T04:10:47.000Z",
+            "updated": "2020-10-09T04:10:47.000Z",
+            "summary": "Meeting %d" % i,
+            "description": "Agenda for the weekly sync. " * 20,
+            "location": "Monash University, Wellington Rd, Clayton VIC 3800, Australia",
+            "creator": {"email": "organiser@monash.edu", "self": True},
+            "organizer": {"email": "organiser@monash.edu", "self": True},
+            "start": {"dateTime": "2020-10-10T02:00:00+11:00"},
+            "end": {"dateTime": "2020-10-10T03:00:00+11:00"},
+            "iCalUID": "event%d@google.com" % i,
+            "sequence": 0,
+            "attendees": [{"email": "student%d@student.monash.edu" % n, "responseStatus": "needsAction"}
+                          for n in range(15)],
+            "conferenceData": {"entryPoints": [{"entryPointType": "video", "uri": "https://meet.google.com/abc"}],
+                               "conferenceSolution": {"name": "Google Meet"}, "conferenceId": "abc-defg-hij"},
+            "reminders": {"useDefault": False, "overrides": [{"method": "popup", "minutes": 10}]},
+        })
+    return {"kind": "calendar#events", "nextPageToken": "next", "items": items}
+
+
+def measure(payload):
+    body = json.dumps(payload)
+    started = time.perf_counter()
+    json.loads(body)
+    return len(body.encode("utf-8")), time.perf_counter() - started
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    page = make_page(count)
+    full_bytes, full_time = measure(page)
+    print("%d events" % count)
+    print("%-16s %12s %12s" % ("profile", "bytes", "parse ms"))
+    print("%-16s %12d %12.1f" % ("full", full_bytes, full_time * 1000))
+    for name, mask in (("LIST_FIELDS", Calendar.LIST_FIELDS), ("REMINDER_FIELDS", Calendar.REMINDER_FIELDS),
+                       ("DETAIL_FIELDS", Calendar.DETAIL_FIELDS)):
+        size, parse_time = measure(project(page, parse_mask(mask)))
+        print("%-16s %12d %12.1f  (%.1f%% of full)" % (name, size, parse_time * 1000, 100.0 * size / full_bytes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Benchmark for the import cost of Calendar.py, measured in fresh interpreters with python -X importtime as a
+# process that already imported it would find everything in sys.modules. The Google client libraries are only
+# imported once get_calendar_api is called, so they are measured separately as the cost of the first API call.
+# Run with: python CalendarBenchmarkImportTime.py [runs], exits with status 1 when Calendar is over budget
+import os
+import subprocess
+import sys
+
+# Cumulative import time aimed at for Calendar.py, in milliseconds
+IMPORT_BUDGET_MS = 100
+MODULES = ("Calendar", "googleapiclient.discovery", "google_auth_oauthlib.flow")
+
+
+def cumulative_import_ms(module):
+    """
+    Cumulative import time of module in a new interpreter, as reported by python -X importtime
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    for line in result.stderr.splitlines():
+        columns = line.split("|")
+        if len(columns) == 3 and columns[2].strip() == module:
+            return int(columns[1]) / 1000
+    return None
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print("best of %d runs, budget for Calendar %d ms" % (runs, IMPORT_BUDGET_MS))
+    print("%-28s %12s" % ("module", "ms"))
+    best = {}
+    for module in MODULES:
+        try:
+            timings = [cumulative_import_ms(module) for run in range(runs)]
+        except subprocess.CalledProcessError:
+            print("%-28s %12s" % (module, "missing"))
+            continue
+        best[module] = min(timings)
+        print("%-28s %12.1f" % (module, best[module]))
+    if best.get("Calendar", 0) > IMPORT_BUDGET_MS:
+        print("Calendar took %.1f ms to import, over the budget of %d ms" % (best["Calendar"], IMPORT_BUDGET_MS))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
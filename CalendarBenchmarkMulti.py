@@ -0,0 +1,43 @@
+# Benchmark for the multi calendar agenda of CalendarMulti.py: the calendars queried one after the other against
+# fan_out's pool of worker threads. Each request of the mocked api sleeps for a round trip to the API, so no API
+# access is needed and the time measured is how much of that latency is overlapped.
+# Run with: python CalendarBenchmarkMulti.py [number of calendars] [round trip in ms]
+import sys
+import time
+from unittest.mock import Mock
+from CalendarMulti import MAX_WORKERS, fan_out
+
+
+def make_api_factory(round_trip):
+    def list_events(calendarId, **query):
+        def execute():
+            time.sleep(round_trip)
+            return {"items": [{"summary": "Meeting of " + calendarId,
+                               "start": {"dateTime": "2020-10-10T02:00:00+11:00"}}]}
+
+        request = Mock()
+        request.execute.side_effect = execute
+        return request
+
+    def factory():
+        api = Mock()
+        api.events.return_value.list.side_effect = list_events
+        return api
+
+    return factory
+
+
+def main():
+    calendars = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    round_trip = (float(sys.argv[2]) if len(sys.argv) > 2 else 100) / 1000
+    calendar_ids = ["calendar%d@group.calendar.google.com" % number for number in range(calendars)]
+    print("%d calendars, %.0f ms per round trip" % (calendars, round_trip * 1000))
+    print("%-10s %12s" % ("workers", "ms"))
+    for workers in (1, MAX_WORKERS):
+        started = time.perf_counter()
+        list(fan_out(make_api_factory(round_trip), calendar_ids, max_workers=workers))
+        print("%-10d %12.1f" % (workers, (time.perf_counter() - started) * 1000))
+
+
+if __name__ == "__main__":
+    main()
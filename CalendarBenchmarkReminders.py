@@ -0,0 +1,55 @@
+# Benchmark for the reminder daemon of CalendarReminders.py: loading the reminders of many events into the heap,
+# then firing a day of them. Firing costs a pop from the heap per reminder however many are scheduled, so the
+# time per fired reminder should hardly grow with the number of events.
+# Run with: python CalendarBenchmarkReminders.py [number of events]
+import datetime
+import sys
+import time
+from unittest.mock import Mock
+import Calendar
+import CalendarStore
+from CalendarReminders import ReminderScheduler
+
+NOW = datetime.datetime(2020, 10, 5, 0, 0)
+
+
+def make_events(count):
+    # one event a minute, with two reminders each
+    return [{"id": str(number), "summary": "Meeting %d" % number,
+             "start": {"dateTime": (NOW + datetime.timedelta(minutes=number)).isoformat() + "Z"},
+             "end": {"dateTime": (NOW + datetime.timedelta(minutes=number)).isoformat() + "Z"},
+             "reminders": {"useDefault": False, "overrides": [{"method": "popup", "minutes": 5},
+                                                              {"method": "popup", "minutes": 10}]}}
+            for number in range(count)]
+
+
+def measure(count):
+    """
+    Milliseconds to load the reminders of count events and to fire the first day of them, and how many fired
+    """
+    store = CalendarStore.EventStore(":memory:")
+    api = Mock()
+    api.events.return_value.list.return_value.execute.return_value = {"items": make_events(count),
+                                                                      "nextSyncToken": "sync1"}
+    store.sync(api)
+    clock = Calendar.FixedClock(NOW)
+    scheduler = ReminderScheduler(store, lambda event, reminder: None, clock)
+    started = time.perf_counter()
+    scheduler.load()
+    loaded = time.perf_counter() - started
+    clock.advance(days=1)
+    started = time.perf_counter()
+    fired = scheduler.fire_due()
+    return loaded * 1000, (time.perf_counter() - started) * 1000, fired
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print("%-10s %12s %12s %14s" % ("events", "load ms", "fire ms", "us/reminder"))
+    for count in (largest // 100, largest // 10, largest):
+        load_ms, fire_ms, fired = measure(count)
+        print("%-10d %12.1f %12.1f %14.2f" % (count, load_ms, fire_ms, fire_ms * 1000 / fired))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Microbenchmark for the text rendering in Calendar.py.
+# Compares the old "results += ..." loops with the line generators joined once and with streaming each line.
+# Run with: python CalendarBenchmarkRendering.py [number of events]
+import io
+import sys
+import time
+import Calendar
+
+
+def make_events(count):
+    return [{
+        "summary": "Meeting %d" % i,
+        "start": {"dateTime": "2020-10-10T02:00:00+11:00"},
+        "reminders": {"useDefault": False, "overrides": [{"method": "popup", "minutes": 10},
+                                                         {"method": "email", "minutes": 30}]},
+    } for i in range(count)]
+
+
+def concatenate_events(events):
+    # The loop previously used by get_upcoming_events, kept here as the baseline
+    results = ""
+    for event in events:
+        start = event['start'].get('dateTime', event['start'].get('date'))
+        results += event.get('summary', "No title") + "," + start + "\n"
+    return results
+
+
+def concatenate_reminders(events):
+    # The loop previously used by get_upcoming_reminders, kept here as the baseline
+    reminders = ""
+    for event in events:
+        if event['reminders'].get("useDefault") == True:
+            reminders += event.get('summary', "No title") + "," + "Reminder through popup 10 minutes before event starts"
+        else:
+            for i in event["reminders"].get("overrides", []):
+                reminders += event.get('summary', "No title") + "," + "Reminder through " + i.get("method") + " " + str(
+                    i.get("minutes")) + " minutes before event starts"
+        reminders += "\n"
+    return reminders
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    events = make_events(count)
+    print("%d events" % count)
+    print("%-38s %10s" % ("renderer", "ms"))
+    print("%-38s %10.1f" % ("events, += concatenation", timed(concatenate_events, events)))
+    print("%-38s %10.1f" % ("events, format_events (join)", timed(Calendar.format_events, events)))
+    print("%-38s %10.1f" % ("events, format_events (stream)", timed(Calendar.format_events, events, io.StringIO())))
+    print("%-38s %10.1f" % ("reminders, += concatenation", timed(concatenate_reminders, events)))
+    print("%-38s %10.1f" % ("reminders, format_reminders (join)", timed(Calendar.format_reminders, events)))
+    print("%-38s %10.1f" % ("reminders, format_reminders (stream)",
+                            timed(Calendar.format_reminders, events, io.StringIO())))
+
+
+if __name__ == "__main__":
+    main()
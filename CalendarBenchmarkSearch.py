@@ -0,0 +1,58 @@
+# Benchmark for the local search of CalendarSearch.py: the inverted index of SearchIndex against scanning the text
+# of every stored event for each query, the way a local q= would. The events are synced into an EventStore in
+# memory from a mocked api, so no API access is needed.
+# Run with: python CalendarBenchmarkSearch.py [number of events] [searches]
+import sys
+import time
+from unittest.mock import Mock
+import CalendarStore
+from CalendarModel import Event
+from CalendarSearch import SearchIndex, field_texts, tokenize
+
+QUERIES = ("meet team 7", "lecture", "team 42", "clayton")
+
+
+def make_store(count):
+    store = CalendarStore.EventStore(":memory:")
+    api = Mock()
+    api.events.return_value.list.return_value.execute.return_value = {"items": [
+        {"id": str(i), "summary": "Meeting %d with team %d" % (i, i % 50), "status": "confirmed",
+         "location": "Clayton campus" if i % 3 else "Caulfield campus",
+         "start": {"dateTime": "2020-10-05T02:00:00Z"}, "end": {"dateTime": "2020-10-05T03:00:00Z"},
+         "reminders": {"useDefault": True}} for i in range(count)], "nextSyncToken": "sync1"}
+    store.sync(api)
+    return store
+
+
+def scan(events, query):
+    # every word of the query is a prefix of a word of the event, as SearchIndex matches
+    terms = tokenize(query)
+    return [event for event in events
+            if all(any(word.startswith(term) for field, text in field_texts(event) for word in tokenize(text))
+                   for term in terms)]
+
+
+def measure(search, searches):
+    started = time.perf_counter()
+    for i in range(searches):
+        for query in QUERIES:
+            search(query)
+    return (time.perf_counter() - started) * 1000 / (searches * len(QUERIES))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    searches = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    store = make_store(count)
+    index = SearchIndex(store)
+    started = time.perf_counter()
+    index.build()
+    print("%d events, index built in %.1f ms" % (count, (time.perf_counter() - started) * 1000))
+    events = [Event.decode(event) for event in store.query()]
+    print("%-10s %12s" % ("search", "ms/query"))
+    print("%-10s %12.3f" % ("scan", measure(lambda query: scan(events, query), searches)))
+    print("%-10s %12.3f" % ("index", measure(index.search, searches)))
+
+
+if __name__ == "__main__":
+    main()
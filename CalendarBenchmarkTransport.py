@@ -0,0 +1,124 @@
+# Benchmark for the pooled transport of CalendarTransport.py against a stub HTTPS server on localhost, so no API
+# access is needed. Without the pool each client (a worker thread of CalendarMulti, a call of get_calendar_api)
+# has an Http of its own and pays for a TCP connection and a TLS handshake, with the pool the clients of the
+# process share kept alive connections. The stub runs in a process of its own so that it does not compete with
+# the clients for the interpreter, its certificate is made with the openssl command.
+# Run with: python CalendarBenchmarkTransport.py [clients] [requests per client] [threads]
+import json
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httplib2
+from CalendarTransport import ConnectionPool, PooledHttp, close_http
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Answers every GET with a small events().list page, counting the connections made to it
+    """
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # or every response waits for the client's delayed ACK
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        with StubHandler.lock:
+            StubHandler.connections += 1
+        BaseHTTPRequestHandler.setup(self)
+
+    def do_GET(self):
+        if self.path == "/connections":  # read and reset the count
+            with StubHandler.lock:
+                body = json.dumps(StubHandler.connections).encode("utf-8")
+                StubHandler.connections = 0
+        else:
+            body = json.dumps({"items": [{"id": "event0", "summary": "Meeting", "start": {
+                "dateTime": "2020-10-10T02:00:00+11:00"}}]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(directory):
+    """
+    Run the stub server on a free port, with the certificate and key found in directory, printing the port
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem"))
+    server = ThreadingHTTPServer(("localhost", 0), StubHandler)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    print(server.server_port, flush=True)
+    server.serve_forever()
+
+
+def start_server(directory):
+    """
+    Make a self signed certificate for localhost in directory and start the stub server with it.
+    Returns the server process, the certificate file and the port
+    """
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost",
+                    "-addext", "subjectAltName=DNS:localhost", "-keyout", key, "-out", cert],
+                   check=True, capture_output=True)
+    server = subprocess.Popen([sys.executable, __file__, "--serve", directory], stdout=subprocess.PIPE, text=True)
+    return server, cert, int(server.stdout.readline())
+
+
+def run(url, clients, requests, threads, transport, cert):
+    """
+    clients clients, each sending requests requests on one of threads threads. transport() gives the Http of
+    a client. Returns the milliseconds per request and the connections the server saw
+    """
+    counter = httplib2.Http(ca_certs=cert)
+    counter.request(url.split("/calendar")[0] + "/connections")
+
+    def client(number):
+        http = transport()
+        for i in range(requests):
+            response, content = http.request(url, "GET")
+            assert response.status == 200
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(client, range(clients)))
+    per_request = (time.perf_counter() - started) * 1000 / (clients * requests)
+    response, content = counter.request(url.split("/calendar")[0] + "/connections")
+    close_http(counter)
+    return per_request, json.loads(content)
+
+
+def main():
+    if sys.argv[1:2] == ["--serve"]:
+        serve(sys.argv[2])
+        return
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    with tempfile.TemporaryDirectory() as directory:
+        server, cert, port = start_server(directory)
+        url = "https://localhost:%d/calendar/v3/calendars/primary/events" % port
+        pool = ConnectionPool(threads, lambda: httplib2.Http(ca_certs=cert))
+        print("%d clients of %d requests on %d threads" % (clients, requests, threads))
+        print("%-12s %12s %12s" % ("transport", "ms/request", "connections"))
+        for name, transport in (("unpooled", lambda: httplib2.Http(ca_certs=cert)),
+                                ("pooled", lambda: PooledHttp(pool))):
+            per_request, connections = run(url, clients, requests, threads, transport, cert)
+            print("%-12s %12.3f %12d" % (name, per_request, connections))
+        pool.close()
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Benchmark for the reminder writes of Calendar.py: the whole event sent back through events().update against the
+# reminders only sent through events().patch (patch_event), for events with growing attendee lists.
+# The requests go through httplib2, the transport of the client, to a stub server on localhost, so no API access
+# is needed and the latency measured is the cost of encoding and shipping the body.
+# Run with: python CalendarBenchmarkWrites.py [requests per size]
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock
+import httplib2
+import Calendar
+from CalendarBenchmarkFields import make_page
+
+ATTENDEES = (10, 100, 1000)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Reads the request body and answers with a small event, as the API does for a write
+    """
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # or every response waits for the client's delayed ACK
+
+    def answer(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = b'{"id": "event0", "updated": "2020-10-10T23:20:50.520Z"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_PUT = do_PATCH = answer
+
+    def log_message(self, *args):
+        pass
+
+
+def make_event(attendees):
+    event = make_page(1)["items"][0]
+    event["attendees"] = [{"email": "student%d@student.monash.edu" % n, "responseStatus": "needsAction"}
+                          for n in range(attendees)]
+    event["reminders"] = {"useDefault": False, "overrides": [{"method": "popup", "minutes": 10}]}
+    return event
+
+
+def sent_body(method, event):
+    """
+    The body Calendar.py hands to the client for a reminder removal, recorded on a mocked api
+    """
+    api = Mock()
+    if method == "PUT":
+        api.events().update(calendarId='primary', eventId=event['id'], body=event)
+        return api.events.return_value.update.call_args[1]["body"]
+    Calendar.patch_event(api, event, 'reminders')
+    return api.events.return_value.patch.call_args[1]["body"]
+
+
+def measure(http, url, method, body, count):
+    started = time.perf_counter()
+    for i in range(count):
+        http.request(url, method, body=json.dumps(body), headers={"Content-Type": "application/json"})
+    return (time.perf_counter() - started) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:%d/calendar/v3/calendars/primary/events/event0" % server.server_port
+    http = httplib2.Http()
+    print("%d requests per size" % count)
+    print("%-10s %-6s %12s %12s" % ("attendees", "method", "bytes", "ms/request"))
+    for attendees in ATTENDEES:
+        event = make_event(attendees)
+        results = {}
+        for method in ("PUT", "PATCH"):
+            body = sent_body(method, event)
+            results[method] = len(json.dumps(body).encode("utf-8")), measure(http, url, method, body, count)
+            print("%-10d %-6s %12d %12.3f" % (attendees, method, results[method][0], results[method][1] * 1000))
+        print("%-10s %-6s %11.1f%% %11.1f%%" % ("", "ratio", 100.0 * results["PATCH"][0] / results["PUT"][0],
+                                               100.0 * results["PATCH"][1] / results["PUT"][1]))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
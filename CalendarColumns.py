@@ -0,0 +1,170 @@
+# Columnar table of events for reports over years of history. Start and end times are kept as epoch seconds in
+# arrays sorted by start, summaries and calendar ids are interned and stored as small integer codes.
+# Filters and totals work on whole column slices with bisect and the C implemented map/sum/compress, so they
+# never loop over event dicts in Python.
+import bisect
+import datetime
+import operator
+from array import array
+from itertools import compress, repeat
+import Calendar
+from CalendarModel import decode_events, parse_time
+
+# Only the columns of the table are requested from the API
+TABLE_FIELDS = "nextPageToken,items(summary,start,end)"
+
+
+def epoch(moment):
+    """
+    Epoch seconds of an aware datetime or of an RFC3339 timestamp
+    """
+    if isinstance(moment, str):
+        moment = parse_time(moment)
+    return moment.timestamp()
+
+
+class EventTable:
+    """
+    Events as columns: starts and ends (epoch seconds, ordered by start), and codes into the interned
+    summaries and calendar_ids. Build one with from_events or from_pairs.
+    """
+
+    def __init__(self, starts, ends, summary_codes, calendar_codes, summaries, calendar_ids):
+        self.starts = starts
+        self.ends = ends
+        self.summary_codes = summary_codes
+        self.calendar_codes = calendar_codes
+        self.summaries = summaries
+        self.calendar_ids = calendar_ids
+        # the longest event bounds how far before a window an overlapping event can start
+        self.max_duration = max(map(operator.sub, ends, starts), default=0.0)
+
+    @classmethod
+    def from_events(cls, events, calendar_id='primary'):
+        """
+        Table of a stream of events (API dicts or CalendarModel.Event) of one calendar
+        """
+        return cls.from_pairs(zip(repeat(calendar_id), decode_events(events)))
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """
+        Table of (calendar id, Event) pairs, such as CalendarMulti.fan_out returns
+        """
+        summaries, calendar_ids = [], []
+        summary_code, calendar_code = {}, {}
+        rows = []
+        for calendar_id, event in pairs:
+            if event.summary not in summary_code:
+                summary_code[event.summary] = len(summaries)
+                summaries.append(event.summary)
+            if calendar_id not in calendar_code:
+                calendar_code[calendar_id] = len(calendar_ids)
+                calendar_ids.append(calendar_id)
+            start = event.start.timestamp()
+            end = start if event.end is None else event.end.timestamp()
+            rows.append((start, end, summary_code[event.summary], calendar_code[calendar_id]))
+        rows.sort()  # usually already in start order (orderBy=startTime), then sorting is linear
+        columns = list(zip(*rows)) or [(), (), (), ()]
+        return cls(array('d', columns[0]), array('d', columns[1]), array('l', columns[2]), array('l', columns[3]),
+                   summaries, calendar_ids)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def row(self, index):
+        """
+        (start, end, summary, calendar id) of one row, times as aware UTC datetimes
+        """
+        utc = datetime.timezone.utc
+        return (datetime.datetime.fromtimestamp(self.starts[index], utc),
+                datetime.datetime.fromtimestamp(self.ends[index], utc),
+                self.summaries[self.summary_codes[index]], self.calendar_ids[self.calendar_codes[index]])
+
+    def select(self, mask, first=0, last=None):
+        """
+        Table of the rows first to last for which mask (an iterable of booleans over those rows) is true
+        """
+        last = len(self) if last is None else last
+        mask = list(mask)
+        return EventTable(array('d', compress(self.starts[first:last], mask)),
+                          array('d', compress(self.ends[first:last], mask)),
+                          array('l', compress(self.summary_codes[first:last], mask)),
+                          array('l', compress(self.calendar_codes[first:last], mask)), self.summaries,
+                          self.calendar_ids)
+
+    def between(self, starting_time, end_time):
+        """
+        Events overlapping the window, same semantics as timeMin/timeMax. Times are datetimes or RFC3339 text
+        """
+        low, high = epoch(starting_time), epoch(end_time)
+        first = bisect.bisect_left(self.starts, low - self.max_duration)
+        last = bisect.bisect_left(self.starts, high)
+        return self.select(map(operator.gt, self.ends[first:last], repeat(low)), first, last)
+
+    def for_calendar(self, calendar_id):
+        if calendar_id not in self.calendar_ids:
+            return self.select([], 0, 0)
+        return self.select(map(operator.eq, self.calendar_codes, repeat(self.calendar_ids.index(calendar_id))))
+
+    def count_by(self, period_start, next_period, tz=datetime.timezone.utc):
+        """
+        [(start of the period, number of events starting in it)] for the periods holding events. The rows are
+        sorted, so each period costs one bisect however many events it holds
+        """
+        counts = []
+        index = 0
+        while index < len(self):
+            moment = datetime.datetime.fromtimestamp(self.starts[index], tz)
+            period = period_start(moment)
+            boundary = next_period(period).timestamp()
+            following = bisect.bisect_left(self.starts, boundary, index)
+            counts.append((period, following - index))
+            index = following
+        return counts
+
+    def count_by_day(self, tz=datetime.timezone.utc):
+        return [(period.date(), count) for period, count in self.count_by(day_start, next_day, tz)]
+
+    def count_by_month(self, tz=datetime.timezone.utc):
+        return [((period.year, period.month), count) for period, count in self.count_by(month_start, next_month, tz)]
+
+    def busy_hours(self, starting_time=None, end_time=None):
+        """
+        Total hours of the events, cut to the window when one is given. Overlapping events each count
+        """
+        if starting_time is None:
+            return sum(map(operator.sub, self.ends, self.starts)) / 3600
+        low, high = epoch(starting_time), epoch(end_time)
+        table = self.between(starting_time, end_time)
+        return sum(map(operator.sub, map(min, table.ends, repeat(high)), map(max, table.starts, repeat(low)))) / 3600
+
+
+def day_start(moment):
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_day(period):
+    return period + datetime.timedelta(days=1)  # wall clock arithmetic, so days across a DST change are right
+
+
+def month_start(moment):
+    return day_start(moment).replace(day=1)
+
+
+def next_month(period):
+    if period.month == 12:
+        return period.replace(year=period.year + 1, month=1)
+    return period.replace(month=period.month + 1)
+
+
+def get_event_table(api, starting_time, end_time=None):
+    """
+    Table of the events of the window (such as get_past_events lists), fetching only the columns needed
+    """
+    if end_time is None:
+        end_time = Calendar.clock.timestamp()
+    Calendar.validate_window(starting_time, end_time)
+    events = Calendar.list_events(api, TABLE_FIELDS, timeMin=starting_time, timeMax=end_time, singleEvents=True,
+                                  orderBy='startTime')
+    return EventTable.from_events(events)
@@ -0,0 +1,172 @@
+# Free/busy and conflict detection over one or more calendars. The events of a window are swept once in start
+# order: a cluster grows while the next event starts before the cluster ends, so clusters holding more than one
+# event are conflicts, and clusters which overlap or touch are merged into busy blocks. Free slots are the gaps
+# between the blocks. Apart from sorting (linear for events already in start order) every step is one pass.
+# Calendars which are not cached locally, or the primary one to reconcile the cache with the server, are asked
+# of the freebusy endpoint: https://developers.google.com/calendar/v3/reference/freebusy/query
+import datetime
+from itertools import chain
+from operator import itemgetter
+import Calendar
+from CalendarModel import Event, parse_time
+
+# The most calendars the freebusy endpoint accepts in one request
+FREEBUSY_CALENDARS = 50
+# Only the fields deciding whether and when an event blocks time
+BUSY_FIELDS = "nextPageToken,items(id,summary,status,transparency,start,end)"
+
+
+def epoch(timestamp):
+    return parse_time(timestamp).timestamp()
+
+
+def to_time(seconds):
+    return datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc)
+
+
+def event_intervals(events, calendar_id='primary'):
+    """
+    (start, end, (calendar id, event)) of the API events which block time. Cancelled events, events shown as
+    available (transparent) and events lasting no time do not. Only the times are parsed, the few events in
+    conflicts are decoded later
+    """
+    for event in events:
+        if event.get('status') == 'cancelled' or event.get('transparency') == 'transparent' or 'end' not in event:
+            continue
+        start = epoch(event['start'].get('dateTime', event['start'].get('date')))
+        end = epoch(event['end'].get('dateTime', event['end'].get('date')))
+        if end > start:
+            yield start, end, (calendar_id, event)
+
+
+def sweep(intervals):
+    """
+    Yield [start, end, items] clusters of overlapping (start, end, item) intervals sorted by start.
+    Intervals touching end to start do not overlap
+    """
+    cluster = None
+    for start, end, item in intervals:
+        if cluster is not None and start < cluster[1]:
+            cluster[2].append(item)
+            if end > cluster[1]:
+                cluster[1] = end
+        else:
+            if cluster is not None:
+                yield cluster
+            cluster = [start, end, [item]]
+    if cluster is not None:
+        yield cluster
+
+
+def merge(periods):
+    """
+    [start, end] blocks of (start, end) periods sorted by start, merged where they overlap or touch
+    """
+    blocks = []
+    for start, end in periods:
+        if blocks and start <= blocks[-1][1]:
+            if end > blocks[-1][1]:
+                blocks[-1][1] = end
+        else:
+            blocks.append([start, end])
+    return blocks
+
+
+class FreeBusy:
+    """
+    Busy blocks, conflicts and free slots of a window, times as aware UTC datetimes. intervals are
+    (start, end, (calendar id, event or None)) in epoch seconds, None standing for a busy period the freebusy
+    endpoint reported without details, and periods are (start, end) only counted as busy, not swept for
+    conflicts. Each conflict lists the (calendar id, CalendarModel.Event or None) pairs overlapping
+    """
+
+    def __init__(self, starting_time, end_time, intervals, periods=(), errors=None):
+        self.low, self.high = epoch(starting_time), epoch(end_time)
+        self.errors = {} if errors is None else errors
+        clusters = list(sweep(sorted(intervals, key=itemgetter(0))))
+        self.conflicts = [(to_time(start), to_time(end), [(calendar_id, event and Event.decode(event))
+                                                          for calendar_id, event in items])
+                          for start, end, items in clusters if len(items) > 1]
+        blocks = merge(sorted(chain(((start, end) for start, end, items in clusters), periods)))
+        # events started before the window, or ending after it, only count inside it
+        self.blocks = [(max(start, self.low), min(end, self.high)) for start, end in blocks
+                       if end > self.low and start < self.high]
+
+    @property
+    def busy(self):
+        return [(to_time(start), to_time(end)) for start, end in self.blocks]
+
+    def free_slots(self, minutes):
+        """
+        (start, end) of the gaps between busy blocks lasting at least minutes
+        """
+        length = minutes * 60
+        slots = []
+        free_from = self.low
+        for start, end in self.blocks + [(self.high, self.high)]:
+            if start - free_from >= length:
+                slots.append((to_time(free_from), to_time(start)))
+            free_from = end
+        return slots
+
+
+def query_free_busy(api, calendar_ids, starting_time, end_time):
+    """
+    Busy periods {calendar id: [(start, end)]} (epoch seconds) of the freebusy endpoint, asking for up to
+    FREEBUSY_CALENDARS calendars per request, and {calendar id: [reason]} of the calendars it could not read
+    """
+    busy, errors = {}, {}
+    for first in range(0, len(calendar_ids), FREEBUSY_CALENDARS):
+        body = {"timeMin": starting_time, "timeMax": end_time,
+                "items": [{"id": calendar_id} for calendar_id in calendar_ids[first:first + FREEBUSY_CALENDARS]]}
+        result = api.freebusy().query(body=body).execute()
+        for calendar_id, calendar in result.get('calendars', {}).items():
+            if calendar.get('errors'):
+                errors[calendar_id] = [error.get('reason') for error in calendar['errors']]
+            busy[calendar_id] = [(epoch(period['start']), epoch(period['end'])) for period in calendar.get('busy', [])]
+    return busy, errors
+
+
+def get_free_busy(api, starting_time, end_time, store=None, calendar_ids=None, reconcile=False):
+    """
+    Free/busy of the window over the primary calendar and the calendars of calendar_ids. Primary events come
+    from the store (or one list request) and are swept locally, the other calendars' busy periods come from
+    the freebusy endpoint and are swept along, so double bookings across calendars are conflicts too.
+    With reconcile the server's busy periods of the primary calendar are merged into the blocks as well, in
+    case the store has not synced an event yet
+    """
+    Calendar.validate_window(starting_time, end_time)
+    if store is not None:
+        events = store.get_events(api, starting_time, end_time)
+    else:
+        events = Calendar.list_events(api, BUSY_FIELDS, timeMin=starting_time, timeMax=end_time, singleEvents=True,
+                                      orderBy='startTime')
+    intervals = list(event_intervals(events))
+    remote = [calendar_id for calendar_id in calendar_ids or [] if calendar_id != 'primary']
+    if reconcile:
+        remote.append('primary')
+    busy, errors = query_free_busy(api, remote, starting_time, end_time) if remote else ({}, {})
+    for calendar_id, periods in busy.items():
+        if calendar_id != 'primary':
+            intervals.extend((start, end, (calendar_id, None)) for start, end in periods)
+    return FreeBusy(starting_time, end_time, intervals, busy.get('primary', ()), errors)
+
+
+def free_busy_lines(free_busy, minutes):
+    """
+    Yield the busy blocks, the conflicts and the free slots of at least minutes, one per line
+    """
+    for start, end in free_busy.busy:
+        yield "Busy: " + start.isoformat() + " - " + end.isoformat() + "\n"
+    for start, end, items in free_busy.conflicts:
+        titles = ", ".join(calendar_id + ": " + ("busy" if event is None else event.title)
+                           for calendar_id, event in items)
+        yield "Conflict: " + titles + " (" + start.isoformat() + " - " + end.isoformat() + ")\n"
+    for start, end in free_busy.free_slots(minutes):
+        yield "Free: " + start.isoformat() + " - " + end.isoformat() + "\n"
+    for calendar_id, reasons in free_busy.errors.items():
+        yield "Could not read " + calendar_id + ": " + ", ".join(reasons) + "\n"
+
+
+def format_free_busy(free_busy, minutes, stream=None):
+    return Calendar.render(free_busy_lines(free_busy, minutes), stream)
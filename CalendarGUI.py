@@ -20,11 +20,17 @@ import pickle
 import os.path
 import sys
 import os
+import itertools
+import queue
+import threading
 from tkinter import *
 from tkinter import ttk
-from googleapiclient.discovery import build
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+from Calendar import list_events, load_discovery_document, LazyCalendarApi, Clock, DETAIL_FIELDS, patch_event
+from CalendarStore import EventStore
+from CalendarIntervals import WindowIndex
+from CalendarWidgets import VirtualListbox
+from CalendarModel import Event
+from CalendarTransport import authorized_http
 
 # If modifying these scopes, delete the file token.pickle.
 SCOPES = ['https://www.googleapis.com/auth/calendar']
@@ -38,6 +44,11 @@ def get_calendar_api():
     Get an object which allows you to consume the Google Calendar API.
     You do not need to worry about what this function exactly does, nor create test cases for it.
     """
+    # Deferred imports, see get_calendar_api in Calendar.py
+    from googleapiclient.discovery import build_from_document
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+
     creds = None
     # The file token.pickle stores the user's access and refresh tokens, and is
     # created automatically when the authorization flow completes for the first
@@ -58,45 +69,44 @@ def get_calendar_api():
         with open('token.pickle', 'wb') as token:
             pickle.dump(creds, token)
 
-    return build('calendar', 'v3', credentials=creds)
+    return build_from_document(load_discovery_document(), http=authorized_http(creds))
 
 
 def get_detailed_event(event):
     detailed_description = ""
-    if event.get("summary") == None:  # None means no key for event title, subsequent event data cannnot be retrieved
-        raise ValueError("Wrong argument passed into")
     # NOTE:
     # if parameter passed in is of other type, Attribute Errors will be raised
-    detailed_description += "Title: " + event['summary'] + "\n"
-
-    if event.get("visibility") is not None:
-        detailed_description += "Visibility: " + event.get("visibility") + "\n"
-    detailed_description += "Status: " + event["status"] + "\n"
-    detailed_description += "Created: " + event["created"] + "\n"
-    detailed_description += "Creator: " + event["creator"].get("email") + "\n"
-    detailed_description += "Start: " + event['start'].get('dateTime', event['start'].get('date')) + "\n"
-    detailed_description += "End: " + event['end'].get('dateTime', event['end'].get('date')) + "\n"
-    if event.get("location") is not None:
-        detailed_description += "Location: " + event.get("location") + "\n"
-    if event.get("attendees") is not None:
+    event = Event.decode(event)
+    if event.summary == None:  # None means no key for event title, subsequent event data cannnot be retrieved
+        raise ValueError("Wrong argument passed into")
+    detailed_description += "Title: " + event.summary + "\n"
+
+    if event.visibility is not None:
+        detailed_description += "Visibility: " + event.visibility + "\n"
+    detailed_description += "Status: " + event.status + "\n"
+    detailed_description += "Created: " + event.created + "\n"
+    detailed_description += "Creator: " + event.creator + "\n"
+    detailed_description += "Start: " + event.start_text + "\n"
+    detailed_description += "End: " + event.end_text + "\n"
+    if event.location is not None:
+        detailed_description += "Location: " + event.location + "\n"
+    if event.attendees is not None:
         detailed_description += "Attendees: "
-        for attendees in event["attendees"]:
-            detailed_description += attendees.get("email") + ", "
+        for email in event.attendees:
+            detailed_description += email + ", "
     detailed_description = detailed_description[:-2]  # strip commas at the end
     detailed_description += "\n"
     return detailed_description
 
 
-def reload_event_list():
-    global events
-
-    query = None
-    starting_time = datetime.datetime.utcnow().isoformat() + 'Z'
+def get_window():
+    """
+    The (starting_time, end_time) chosen with the filters. A starting_time of FROM_NOW means from the time of
+    the fetch on (it stays the same window as time passes), None means no bound
+    """
+    starting_time = FROM_NOW
     end_time = None
 
-    if searchIn.get().strip() != "":
-        query = searchIn.get()
-
     past_date_tokens = verify_date(dateIn.get())
     if past_checked.get() and past_date_tokens:
         d = past_date_tokens[0]
@@ -110,41 +120,222 @@ def reload_event_list():
         period = get_periods(d, m, y)
         starting_time = period[0]
         end_time = period[1]
+    return starting_time, end_time
+
+
+def reload_event_list():
+    global fetch_generation, fetch_request, fetch_more, fetch_pending, fetch_complete
+
+    query = None
+
+    if searchIn.get().strip() != "":
+        query = searchIn.get()
+
+    window = get_window()
+    starting_time, end_time = window
+    if starting_time == FROM_NOW:
+        starting_time = clock.timestamp()
+
+    # Every reload supersedes the fetches still in flight, their results are dropped when they come back
+    fetch_generation += 1
+    fetch_request = (window, query)
+    if root is None:  # no main loop to hand the results back to, fetch in place
+        show_events(fetch_events(api, fetch_generation, starting_time, end_time, query))
+        return
+
+    if fetch_more is not None:
+        fetch_more.set()  # wakes a worker waiting for a scroll, so that it notices it was superseded
+    fetch_more = threading.Event()
+    fetch_pending = True
+    fetch_complete = False
+    show_loading(True)
+    threading.Thread(target=fetch_in_background,
+                     args=(fetch_generation, fetch_more, starting_time, end_time, query), daemon=True).start()
+    schedule_poll()
+
+
+def event_source(fetch_api, starting_time, end_time, query):
+    if store is not None and query is None:
+        return store.get_events(fetch_api, starting_time, end_time)
+    return list_events(fetch_api, DETAIL_FIELDS, page_size=PAGE_ROWS, timeMin=starting_time, timeMax=end_time,
+                       singleEvents=True, orderBy='startTime', q=query)
+
+
+def fetch_events(fetch_api, generation, starting_time, end_time, query):
+    """
+    Fetch the events to list, giving up (returning None) as soon as a newer reload supersedes this one
+    """
+    fetched = []
+    for event in event_source(fetch_api, starting_time, end_time, query):
+        if generation != fetch_generation:
+            return None  # stops before the next page is requested
+        fetched.append(event)
+    return fetched
+
+
+def fetch_in_background(generation, more, starting_time, end_time, query):
+    """
+    Worker thread body. Fetches run one at a time on their own client (the discovery client is not thread safe),
+    so a burst of filter changes waits for the superseded fetch to give up instead of piling up requests.
+    The pages of a server query are only requested once the list is scrolled near its end (more is set),
+    the local store is read in one go
+    """
+    with fetch_lock:
+        if generation != fetch_generation:
+            return  # superseded while waiting for the lock, not even the first page is requested
+        try:
+            source = iter(event_source(fetch_api, starting_time, end_time, query))
+            while generation == fetch_generation:
+                page = list(itertools.islice(source, PAGE_ROWS))
+                complete = len(page) < PAGE_ROWS
+                fetch_results.put((generation, page, complete))
+                if complete:
+                    break
+                if store is None or query is not None:
+                    more.wait()
+                    more.clear()
+        except Exception as error:
+            fetch_results.put((generation, error, True))
+
+
+def load_more_events():
+    """
+    Called by the event list when it is scrolled near its end
+    """
+    global fetch_pending
+    if fetch_pending or fetch_complete or fetch_more is None:
+        return
+    fetch_pending = True
+    show_loading(True)
+    fetch_more.set()
+    schedule_poll()
+
 
-    events = api.events().list(calendarId='primary', timeMin=starting_time, timeMax=end_time, singleEvents=True,
-                               orderBy='startTime', q=query).execute().get("items", [])
+def schedule_poll():
+    global polling
+    if not polling:
+        polling = True
+        root.after(POLL_INTERVAL_MS, poll_fetch_results)
 
-    eventlist.delete(0, END)
-    for i in events:
-        summary = i["summary"]
-        eventlist.insert(END, summary)
 
+def poll_fetch_results():
+    """
+    Runs on the Tk main loop, which is the only thread allowed to touch the widgets
+    """
+    global polling, fetch_pending, fetch_complete, shown_generation
+    while not fetch_results.empty():
+        generation, result, complete = fetch_results.get()
+        if generation != fetch_generation:
+            continue  # superseded
+        fetch_complete = complete
+        # the pages of the local store keep coming without a scroll
+        fetch_pending = not complete and store is not None and fetch_request[1] is None
+        show_loading(fetch_pending)
+        if isinstance(result, Exception):
+            root.report_callback_exception(type(result), result, result.__traceback__)
+        elif shown_generation != generation:
+            shown_generation = generation
+            show_events(result, complete)
+        else:
+            append_events(result, complete)
+    if fetch_pending:
+        root.after(POLL_INTERVAL_MS, poll_fetch_results)
+    else:
+        polling = False
+
+
+def show_loading(loading):
+    lbl2.configure(text="Events (loading...)" if loading else "Events")
+    root.configure(cursor="watch" if loading else "")
+
+
+def show_events(fetched, complete=True):
+    list_events_found(fetched)
+    if complete:
+        update_search_index()
+
+
+def append_events(page, complete):
+    events.extend(page)
+    eventlist.append([event["summary"] for event in page])
+    if complete:
+        update_search_index()
+
+
+def update_search_index():
+    global search_index
+    window, query = fetch_request
+    if query is None:
+        # every event of the window is loaded, later searches within it can be answered locally
+        search_index = (window, index_events(events))
+
+
+def list_events_found(found):
+    global events
+    events = found
+
+    eventlist.set_items([event["summary"] for event in events])
     reminderlist.delete(0, END)
     eventdetails.delete(1.0, END)
     delete_event_btn.configure(state="disable")
 
 
+def index_events(loaded):
+    """
+    Pair every event with the lower case text searches are matched against, computed once per load
+    """
+    index = []
+    for event in loaded:
+        text = [event.get("summary", ""), event.get("description", ""), event.get("location", "")]
+        text.extend(attendee.get("email", "") for attendee in event.get("attendees", []))
+        index.append(("\n".join(text).lower(), event))
+    return index
+
+
+def filter_events(index, term):
+    """
+    Events whose text contains every word of the search term
+    """
+    words = term.lower().split()
+    return [event for text, event in index if all(word in text for word in words)]
+
+
+def on_search_typed(*args):
+    """
+    Runs on every key press in the search box, the search itself waits until typing pauses
+    """
+    global search_after_id
+    if search_after_id is not None:
+        root.after_cancel(search_after_id)
+    search_after_id = root.after(SEARCH_DEBOUNCE_MS, search_as_you_type)
+
+
+def search_as_you_type():
+    global search_after_id
+    search_after_id = None
+    if search_index is None or search_index[0] != get_window():
+        # the loaded events are not the whole window (a search result, other filters, still loading)
+        reload_event_list()
+        return
+    term = searchIn.get().strip()
+    list_events_found(filter_events(search_index[1], term) if term else [event for text, event in search_index[1]])
+
+
 def load_event_details(*args):
     idxs = eventlist.curselection()
     if len(idxs) == 1:
         idx = int(idxs[0])
-        event = events[idx]
+        event = Event.decode(events[idx])
         text = get_detailed_event(event)
         eventdetails.delete(1.0, END)
         eventdetails.insert(END, text)
         reminderlist.delete(0, END)
-        default = {
-            "useDefault": False,
-            "overrides": []
-        }
-        event_reminders_obj = event.get("reminders", default)
-        if event_reminders_obj.get("useDefault", False):
+        if event.use_default:
             reminderstr = "Popup 10 minutes before event starts"
             reminderlist.insert(END, reminderstr)
         else:
-            overrides = event_reminders_obj.get("overrides", [])
-            for each in overrides:
-                reminderstr = each.get("method") + " " + str(each.get("minutes")) + " minutes before event starts"
+            for each in event.reminders:
+                reminderstr = each.method + " " + str(each.minutes) + " minutes before event starts"
                 reminderlist.insert(END, reminderstr)
 
         delete_event_btn.configure(state="normal")
@@ -173,7 +364,7 @@ def delete_reminder():
             event['reminders'] = {"useDefault": False, "overrides": []}
         else:
             event['reminders']["overrides"].pop(idx)
-        api.events().update(calendarId='primary', eventId=event['id'], body=event).execute()
+        patch_event(api, event, 'reminders').execute()
         load_event_details()
 
 
@@ -205,7 +396,7 @@ def get_periods(date, month, year):
             enddate = datetime.datetime.strptime(year + "-" + endmonth + "-" + endday + " 23:59:59",
                                                  '%Y-%m-%d %H:%M:%S').isoformat() + "Z"
         except ValueError:
-            startdate = datetime.datetime.utcnow().isoformat() + 'Z'
+            startdate = clock.timestamp()
             enddate = None
     else:
         startdate = None
@@ -224,7 +415,8 @@ def verify_date(string):
     try:
         valid_date = int(tokens[0]) in list(range(1, 32))
         valid_month = int(tokens[1]) in list(range(1,13))
-        valid_year = five_years_ago < int(tokens[2]) < two_years_later
+        this_year = clock.now().year
+        valid_year = this_year - 5 < int(tokens[2]) < this_year + 2
         if valid_date and valid_month and valid_year :
             return tokens
         else:
@@ -304,12 +496,36 @@ def bind_elements_command():
     delete_event_btn.configure(command=delete_event)
     delete_reminder_btn.configure(command=delete_reminder)
     # Bind element actions to their respective functions
+    searchIn.bind('<KeyRelease>', on_search_typed)
     eventlist.bind('<<ListboxSelect>>', load_event_details)
     reminderlist.bind('<<ListboxSelect>>', enable_delete_reminder)
 
 
 events = None
 api = None
+store = None
+clock = Clock()
+FROM_NOW = "now"  # starting time of the upcoming events, see get_window
+
+# background fetches of the event list, see reload_event_list
+POLL_INTERVAL_MS = 50
+fetch_api = None
+fetch_generation = 0
+fetch_lock = threading.Lock()
+fetch_results = queue.Queue()
+polling = False
+fetch_request = None
+fetch_more = None  # set to ask the worker for the next page
+fetch_pending = False  # waiting for a page
+fetch_complete = True
+shown_generation = 0
+# rows per page of the event list, each page is one request to the API
+PAGE_ROWS = 500
+
+# search as you type, see search_as_you_type
+SEARCH_DEBOUNCE_MS = 250
+search_after_id = None
+search_index = None
 
 # init variables for all GUI elements
 root = c = sch = searchIn = searchBtn = eventlist = refreshBtn = delete_event_btn = past_checked = past_checkbox = dateIn = updateBtn = nv \
@@ -328,7 +544,9 @@ years = ["All"] + [str(i) for i in range(five_years_ago, two_years_later)]
 
 if __name__ == "__main__":  # main function
     # gets the api
-    api = get_calendar_api()
+    api = LazyCalendarApi(get_calendar_api)
+    fetch_api = LazyCalendarApi(get_calendar_api)
+    store = WindowIndex(EventStore())
 
     # Init GUI elements
     # Create and grid the outer content frame
@@ -343,7 +561,9 @@ if __name__ == "__main__":  # main function
 
     # Events List Elements
     lbl2 = Label(c, text="Events")
-    eventlist = Listbox(c, height=8, exportselection=False)
+    evf = ttk.Frame(c)
+    eventlist = VirtualListbox(Listbox(evf, height=8, exportselection=False), ttk.Scrollbar(evf), rows=8,
+                               near_end=load_more_events)
     refreshBtn = ttk.Button(c, text="Refresh")
     delete_event_btn = ttk.Button(c, text="Delete", state="disable")
 
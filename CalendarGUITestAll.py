@@ -1,7 +1,11 @@
 from datetime import datetime
+import threading
+import time
 import unittest
 from unittest.mock import Mock, patch
+import Calendar
 import CalendarGUI
+import CalendarWidgets
 
 # NOTE: ALL THE TESTS HERE ARE FOR THE GUI
 # EACH CLASS INDICATE A FUNCTION IN CalendarGUI.py
@@ -143,6 +147,14 @@ class CalendarGUITestReloadEventList(unittest.TestCase):
     # METHOD UNDER TEST: reload_event_list
     # Strategy: Path Coverage
 
+    def setUp(self):
+        # These tests were written in October 2020, freeze the clock there so the range of valid years stays put
+        self.clock = CalendarGUI.clock
+        CalendarGUI.clock = Calendar.FixedClock(datetime(2020, 10, 15))
+
+    def tearDown(self):
+        CalendarGUI.clock = self.clock
+
     # These are each of the UI elements that require user inputs
     @patch.object(CalendarGUI, 'delete_event_btn')
     @patch.object(CalendarGUI, 'eventdetails')
@@ -208,13 +220,13 @@ class CalendarGUITestReloadEventList(unittest.TestCase):
         self.assertEqual(nav_date.call_count, 0)
         self.assertEqual(nav_month.call_count, 0)
         self.assertEqual(nav_year.call_count, 0)
-        self.assertEqual(eventlist.insert.call_count, 2)
+        self.assertEqual(len(eventlist.set_items.call_args[0][0]), 2)
 
         # constant
         self.assertEqual(past_checked.get.call_count, 1)
         self.assertEqual(dateIn.get.call_count, 1)
         self.assertEqual(CalendarGUI.api.events.return_value.list.return_value.execute.call_count, 1)
-        self.assertEqual(eventlist.delete.call_count, 1)
+        self.assertEqual(eventlist.set_items.call_count, 1)
         self.assertEqual(reminderlist.delete.call_count, 1)
         self.assertEqual(details.delete.call_count, 1)
         self.assertEqual(deleteBtn.configure.call_count, 1)
@@ -299,13 +311,13 @@ class CalendarGUITestReloadEventList(unittest.TestCase):
         self.assertEqual(nav_date_input.get.call_count, 0)
         self.assertEqual(nav_month_input.get.call_count, 0)
         self.assertEqual(nav_year_input.get.call_count, 0)
-        self.assertEqual(eventlist.insert.call_count, 3)
+        self.assertEqual(len(eventlist.set_items.call_args[0][0]), 3)
 
         # constants
         self.assertEqual(past_checked.get.call_count, 1)
         self.assertEqual(dateIn.get.call_count, 1)
         self.assertEqual(CalendarGUI.api.events.return_value.list.return_value.execute.call_count, 1)
-        self.assertEqual(eventlist.delete.call_count, 1)
+        self.assertEqual(eventlist.set_items.call_count, 1)
         self.assertEqual(reminderlist.delete.call_count, 1)
         self.assertEqual(details.delete.call_count, 1)
         self.assertEqual(deleteBtn.configure.call_count, 1)
@@ -376,13 +388,13 @@ class CalendarGUITestReloadEventList(unittest.TestCase):
         self.assertEqual(nav_date_input.get.call_count, 0)
         self.assertEqual(nav_month_input.get.call_count, 0)
         self.assertEqual(nav_year_input.get.call_count, 0)
-        self.assertEqual(eventlist.insert.call_count, 2)
+        self.assertEqual(len(eventlist.set_items.call_args[0][0]), 2)
 
         # constants
         self.assertEqual(past_checked.get.call_count, 1)
         self.assertEqual(dateIn.get.call_count, 1)
         self.assertEqual(CalendarGUI.api.events.return_value.list.return_value.execute.call_count, 1)
-        self.assertEqual(eventlist.delete.call_count, 1)
+        self.assertEqual(eventlist.set_items.call_count, 1)
         self.assertEqual(reminderlist.delete.call_count, 1)
         self.assertEqual(details.delete.call_count, 1)
         self.assertEqual(deleteBtn.configure.call_count, 1)
@@ -454,17 +466,50 @@ class CalendarGUITestReloadEventList(unittest.TestCase):
         self.assertEqual(nav_date_input.get.call_count, 1)
         self.assertEqual(nav_month_input.get.call_count, 1)
         self.assertEqual(nav_year_input.get.call_count, 1)
-        self.assertEqual(eventlist.insert.call_count, 2)
+        self.assertEqual(len(eventlist.set_items.call_args[0][0]), 2)
 
         # constants
         self.assertEqual(past_checked.get.call_count, 1)
         self.assertEqual(dateIn.get.call_count, 1)
         self.assertEqual(CalendarGUI.api.events.return_value.list.return_value.execute.call_count, 1)
-        self.assertEqual(eventlist.delete.call_count, 1)
+        self.assertEqual(eventlist.set_items.call_count, 1)
         self.assertEqual(reminderlist.delete.call_count, 1)
         self.assertEqual(details.delete.call_count, 1)
         self.assertEqual(deleteBtn.configure.call_count, 1)
 
+    # These are each of the UI elements that require user inputs
+    @patch.object(CalendarGUI, 'delete_event_btn')
+    @patch.object(CalendarGUI, 'eventdetails')
+    @patch.object(CalendarGUI, 'reminderlist')
+    @patch.object(CalendarGUI, 'eventlist')
+    @patch.object(CalendarGUI, 'nav_year')
+    @patch.object(CalendarGUI, 'nav_month')
+    @patch.object(CalendarGUI, 'nav_date')
+    @patch.object(CalendarGUI, 'navigate_checked')
+    @patch.object(CalendarGUI, 'dateIn')
+    @patch.object(CalendarGUI, 'past_checked')
+    @patch.object(CalendarGUI, 'searchIn')
+    def test_reload_event_list_navigate_all_years(self, searchIn, past_checked, dateIn, navigate_checked,
+                                                  nav_date_input, nav_month_input, nav_year_input,
+                                                  eventlist, reminderlist, details, deleteBtn):
+        searchIn.get.return_value = ""
+        past_checked.get.return_value = 0
+        dateIn.get.return_value = ""
+        navigate_checked.get.return_value = 1
+        nav_date_input.get.return_value = "All"  # Show events on All dates of All months of All years
+        nav_month_input.get.return_value = "All"
+        nav_year_input.get.return_value = "All"
+        CalendarGUI.api = Mock()
+        CalendarGUI.api.events.return_value.list.return_value.execute.return_value = {"items": [
+            {"summary": "test1", "start": {"dateTime": "2018-10-03T02:00:00.000000Z"}}]}
+
+        CalendarGUI.reload_event_list()
+        # every event, past ones included, not only the upcoming ones
+        kwargs = CalendarGUI.api.events.return_value.list.call_args[1]
+        self.assertIsNone(kwargs["timeMin"])
+        self.assertIsNone(kwargs["timeMax"])
+        self.assertEqual(len(eventlist.set_items.call_args[0][0]), 1)
+
     # These are each of the UI elements that require user inputs
     @patch.object(CalendarGUI, 'delete_event_btn')
     @patch.object(CalendarGUI, 'eventdetails')
@@ -530,13 +575,13 @@ class CalendarGUITestReloadEventList(unittest.TestCase):
         self.assertEqual(nav_date_input.get.call_count, 0)
         self.assertEqual(nav_month_input.get.call_count, 0)
         self.assertEqual(nav_year_input.get.call_count, 0)
-        self.assertEqual(eventlist.insert.call_count, 2)
+        self.assertEqual(len(eventlist.set_items.call_args[0][0]), 2)
 
         # constants
         self.assertEqual(past_checked.get.call_count, 1)
         self.assertEqual(dateIn.get.call_count, 1)
         self.assertEqual(CalendarGUI.api.events.return_value.list.return_value.execute.call_count, 1)
-        self.assertEqual(eventlist.delete.call_count, 1)
+        self.assertEqual(eventlist.set_items.call_count, 1)
         self.assertEqual(reminderlist.delete.call_count, 1)
         self.assertEqual(details.delete.call_count, 1)
         self.assertEqual(deleteBtn.configure.call_count, 1)
@@ -590,13 +635,13 @@ class CalendarGUITestReloadEventList(unittest.TestCase):
         self.assertEqual(nav_date_input.get.call_count, 0)
         self.assertEqual(nav_month_input.get.call_count, 0)
         self.assertEqual(nav_year_input.get.call_count, 0)
-        self.assertEqual(eventlist.insert.call_count, 1)
+        self.assertEqual(len(eventlist.set_items.call_args[0][0]), 1)
 
         # constants
         self.assertEqual(past_checked.get.call_count, 1)
         self.assertEqual(dateIn.get.call_count, 1)
         self.assertEqual(CalendarGUI.api.events.return_value.list.return_value.execute.call_count, 1)
-        self.assertEqual(eventlist.delete.call_count, 1)
+        self.assertEqual(eventlist.set_items.call_count, 1)
         self.assertEqual(reminderlist.delete.call_count, 1)
         self.assertEqual(details.delete.call_count, 1)
         self.assertEqual(deleteBtn.configure.call_count, 1)
@@ -651,13 +696,13 @@ class CalendarGUITestReloadEventList(unittest.TestCase):
         self.assertEqual(nav_date_input.get.call_count, 1)
         self.assertEqual(nav_month_input.get.call_count, 1)
         self.assertEqual(nav_year_input.get.call_count, 1)
-        self.assertEqual(eventlist.insert.call_count, 1)
+        self.assertEqual(len(eventlist.set_items.call_args[0][0]), 1)
 
         # constants
         self.assertEqual(past_checked.get.call_count, 1)
         self.assertEqual(dateIn.get.call_count, 1)
         self.assertEqual(CalendarGUI.api.events.return_value.list.return_value.execute.call_count, 1)
-        self.assertEqual(eventlist.delete.call_count, 1)
+        self.assertEqual(eventlist.set_items.call_count, 1)
         self.assertEqual(reminderlist.delete.call_count, 1)
         self.assertEqual(details.delete.call_count, 1)
         self.assertEqual(deleteBtn.configure.call_count, 1)
@@ -926,7 +971,7 @@ class CalendarGUITestDeleteReminder(unittest.TestCase):
         self.assertFalse(CalendarGUI.events[0]['reminders']['useDefault'])
         self.assertEqual(len(CalendarGUI.events[0]['reminders']['overrides']), 2)
         reminder_selected = 0
-        self.assertEqual(CalendarGUI.api.events.return_value.update.return_value.execute.call_count, reminder_selected)
+        self.assertEqual(CalendarGUI.api.events.return_value.patch.return_value.execute.call_count, reminder_selected)
         self.assertEqual(load_event_details.call_count, reminder_selected)
 
     # This is a function that may be called
@@ -947,7 +992,7 @@ class CalendarGUITestDeleteReminder(unittest.TestCase):
         self.assertFalse(CalendarGUI.events[0]['reminders']['useDefault'])
         self.assertEqual(len(CalendarGUI.events[0]['reminders']['overrides']), 2)
         reminder_selected = 0
-        self.assertEqual(CalendarGUI.api.events.return_value.update.return_value.execute.call_count, reminder_selected)
+        self.assertEqual(CalendarGUI.api.events.return_value.patch.return_value.execute.call_count, reminder_selected)
         self.assertEqual(load_event_details.call_count, reminder_selected)
 
     # This is a function that may be called
@@ -968,7 +1013,9 @@ class CalendarGUITestDeleteReminder(unittest.TestCase):
         self.assertFalse(CalendarGUI.events[0]['reminders']['useDefault'])
         self.assertEqual(len(CalendarGUI.events[0]['reminders']['overrides']), 1)
         reminder_selected = 1
-        self.assertEqual(CalendarGUI.api.events.return_value.update.return_value.execute.call_count, reminder_selected)
+        self.assertEqual(CalendarGUI.api.events.return_value.patch.return_value.execute.call_count, reminder_selected)
+        # the attendees are not sent back
+        self.assertEqual(list(CalendarGUI.api.events.return_value.patch.call_args[1]["body"]), ['reminders'])
         self.assertEqual(load_event_details.call_count, reminder_selected)
 
     # This is a function that may be called
@@ -989,7 +1036,7 @@ class CalendarGUITestDeleteReminder(unittest.TestCase):
         self.assertFalse(CalendarGUI.events[1]['reminders']['useDefault'])
         self.assertEqual(len(CalendarGUI.events[1]['reminders']['overrides']), 0)
         reminder_selected = 1
-        self.assertEqual(CalendarGUI.api.events.return_value.update.return_value.execute.call_count, reminder_selected)
+        self.assertEqual(CalendarGUI.api.events.return_value.patch.return_value.execute.call_count, reminder_selected)
         self.assertEqual(load_event_details.call_count, reminder_selected)
 
 
@@ -1175,6 +1222,14 @@ class CalendarGUITestVerifyDate(unittest.TestCase):
     # METHOD UNDER TEST: verify_date
     # Strategy: Path Coverage & MC/DC for the decision (valid_data && valid_month && valid_year)
 
+    def setUp(self):
+        # These tests were written in October 2020, freeze the clock there so the range of valid years stays put
+        self.clock = CalendarGUI.clock
+        CalendarGUI.clock = Calendar.FixedClock(datetime(2020, 10, 15))
+
+    def tearDown(self):
+        CalendarGUI.clock = self.clock
+
     def test_verify_date_invalid_length(self):
         datestr = "10/10"
         self.assertFalse(CalendarGUI.verify_date(datestr))
@@ -1268,6 +1323,371 @@ class CalendarGUITestEnableDeleteReminder(unittest.TestCase):
         self.assertEqual(delete_reminder_btn.configure.call_count, event_selected) # Delete reminder button should be enabled
 
 
+class CalendarGUITestBackgroundFetch(unittest.TestCase):
+
+    # METHOD UNDER TEST: reload_event_list with a running main loop, fetch_events, load_more_events
+    # and poll_fetch_results
+    # Strategy: Branch Coverage
+
+    def setUp(self):
+        CalendarGUI.clock = Calendar.FixedClock(datetime(2020, 10, 15))
+        CalendarGUI.fetch_api = Mock()
+        CalendarGUI.fetch_api.events.return_value.list.return_value.execute.return_value = {
+            "items": [{"summary": "test1"}, {"summary": "test2"}]}
+        CalendarGUI.polling = False
+        CalendarGUI.fetch_pending = False
+
+    def tearDown(self):
+        # release a worker still waiting for a scroll
+        CalendarGUI.fetch_generation += 1
+        if CalendarGUI.fetch_more is not None:
+            CalendarGUI.fetch_more.set()
+        self.wait_for_workers()
+        CalendarGUI.clock = Calendar.Clock()
+        CalendarGUI.fetch_api = None
+        CalendarGUI.fetch_more = None
+        CalendarGUI.fetch_complete = True
+        CalendarGUI.polling = False
+        CalendarGUI.search_index = None
+        while not CalendarGUI.fetch_results.empty():
+            CalendarGUI.fetch_results.get()
+
+    def wait_for_workers(self):
+        for thread in threading.enumerate():
+            if thread is not threading.main_thread():
+                thread.join(5)
+
+    def wait_for_page(self):
+        deadline = time.time() + 5
+        while CalendarGUI.fetch_results.empty() and time.time() < deadline:
+            time.sleep(0.01)
+
+    @patch.object(CalendarGUI, 'delete_event_btn')
+    @patch.object(CalendarGUI, 'eventdetails')
+    @patch.object(CalendarGUI, 'reminderlist')
+    @patch.object(CalendarGUI, 'eventlist')
+    @patch.object(CalendarGUI, 'lbl2')
+    @patch.object(CalendarGUI, 'root')
+    @patch.object(CalendarGUI, 'navigate_checked')
+    @patch.object(CalendarGUI, 'dateIn')
+    @patch.object(CalendarGUI, 'past_checked')
+    @patch.object(CalendarGUI, 'searchIn')
+    def test_reload_event_list_fetches_in_background(self, searchIn, past_checked, dateIn, navigate_checked, root,
+                                                     lbl2, eventlist, reminderlist, details, deleteBtn):
+        searchIn.get.return_value = ""
+        past_checked.get.return_value = 0
+        navigate_checked.get.return_value = 0
+        CalendarGUI.reload_event_list()
+
+        # the list is only touched on the main loop, with the loading indicator shown in the meantime
+        lbl2.configure.assert_called_with(text="Events (loading...)")
+        self.assertEqual(root.after.call_count, 1)
+        self.wait_for_workers()
+        CalendarGUI.poll_fetch_results()
+
+        eventlist.set_items.assert_called_once_with(["test1", "test2"])
+        lbl2.configure.assert_called_with(text="Events")
+        self.assertEqual(root.after.call_count, 1)  # no more polling once the result is shown
+        self.assertFalse(CalendarGUI.polling)
+        self.assertTrue(CalendarGUI.fetch_complete)
+
+    @patch.object(CalendarGUI, 'delete_event_btn')
+    @patch.object(CalendarGUI, 'eventdetails')
+    @patch.object(CalendarGUI, 'reminderlist')
+    @patch.object(CalendarGUI, 'eventlist')
+    @patch.object(CalendarGUI, 'lbl2')
+    @patch.object(CalendarGUI, 'root')
+    @patch.object(CalendarGUI, 'navigate_checked')
+    @patch.object(CalendarGUI, 'dateIn')
+    @patch.object(CalendarGUI, 'past_checked')
+    @patch.object(CalendarGUI, 'searchIn')
+    def test_reload_event_list_superseded(self, searchIn, past_checked, dateIn, navigate_checked, root, lbl2,
+                                          eventlist, reminderlist, details, deleteBtn):
+        searchIn.get.side_effect = ["first", "first", "second", "second"]
+        past_checked.get.return_value = 0
+        navigate_checked.get.return_value = 0
+        CalendarGUI.reload_event_list()
+        CalendarGUI.reload_event_list()
+        self.wait_for_workers()
+        CalendarGUI.poll_fetch_results()
+
+        # only the events of the latest search are listed, and polling was only started once
+        eventlist.set_items.assert_called_once_with(["test1", "test2"])
+        self.assertEqual(root.after.call_count, 1)
+        self.assertEqual(CalendarGUI.fetch_api.events.return_value.list.call_args[1]["q"], "second")
+
+    @patch.object(CalendarGUI, 'PAGE_ROWS', 2)
+    @patch.object(CalendarGUI, 'delete_event_btn')
+    @patch.object(CalendarGUI, 'eventdetails')
+    @patch.object(CalendarGUI, 'reminderlist')
+    @patch.object(CalendarGUI, 'eventlist')
+    @patch.object(CalendarGUI, 'lbl2')
+    @patch.object(CalendarGUI, 'root')
+    @patch.object(CalendarGUI, 'navigate_checked')
+    @patch.object(CalendarGUI, 'dateIn')
+    @patch.object(CalendarGUI, 'past_checked')
+    @patch.object(CalendarGUI, 'searchIn')
+    def test_reload_event_list_pages_loaded_on_scroll(self, searchIn, past_checked, dateIn, navigate_checked, root,
+                                                      lbl2, eventlist, reminderlist, details, deleteBtn):
+        searchIn.get.return_value = ""
+        past_checked.get.return_value = 0
+        navigate_checked.get.return_value = 0
+        execute = CalendarGUI.fetch_api.events.return_value.list.return_value.execute
+        execute.side_effect = [{"items": [{"summary": "test1"}, {"summary": "test2"}], "nextPageToken": "2"},
+                               {"items": [{"summary": "test3"}]}]
+        CalendarGUI.reload_event_list()
+        self.wait_for_page()
+        CalendarGUI.poll_fetch_results()
+
+        # the second page is not requested until the list is scrolled near its end
+        eventlist.set_items.assert_called_once_with(["test1", "test2"])
+        self.assertFalse(CalendarGUI.fetch_complete)
+        self.assertFalse(CalendarGUI.polling)
+        self.assertIsNone(CalendarGUI.search_index)  # the local set is incomplete
+        time.sleep(0.05)
+        self.assertEqual(execute.call_count, 1)
+
+        CalendarGUI.load_more_events()
+        CalendarGUI.load_more_events()  # already waiting for the page
+        self.wait_for_workers()
+        CalendarGUI.poll_fetch_results()
+
+        eventlist.append.assert_called_once_with(["test3"])
+        self.assertEqual(execute.call_count, 2)
+        self.assertTrue(CalendarGUI.fetch_complete)
+        self.assertEqual(len(CalendarGUI.search_index[1]), 3)
+        CalendarGUI.load_more_events()  # nothing left to load
+        self.assertEqual(root.after.call_count, 2)
+
+    @patch.object(CalendarGUI, 'PAGE_ROWS', 2)
+    @patch.object(CalendarGUI, 'store')
+    @patch.object(CalendarGUI, 'delete_event_btn')
+    @patch.object(CalendarGUI, 'eventdetails')
+    @patch.object(CalendarGUI, 'reminderlist')
+    @patch.object(CalendarGUI, 'eventlist')
+    @patch.object(CalendarGUI, 'lbl2')
+    @patch.object(CalendarGUI, 'root')
+    @patch.object(CalendarGUI, 'navigate_checked')
+    @patch.object(CalendarGUI, 'dateIn')
+    @patch.object(CalendarGUI, 'past_checked')
+    @patch.object(CalendarGUI, 'searchIn')
+    def test_reload_event_list_store_read_in_one_go(self, searchIn, past_checked, dateIn, navigate_checked, root,
+                                                    lbl2, eventlist, reminderlist, details, deleteBtn, store):
+        searchIn.get.return_value = ""
+        past_checked.get.return_value = 0
+        navigate_checked.get.return_value = 0
+        store.get_events.return_value = iter([{"summary": "test1"}, {"summary": "test2"}, {"summary": "test3"}])
+        CalendarGUI.reload_event_list()
+        self.wait_for_workers()
+        CalendarGUI.poll_fetch_results()
+
+        eventlist.set_items.assert_called_once_with(["test1", "test2"])
+        eventlist.append.assert_called_once_with(["test3"])
+        self.assertTrue(CalendarGUI.fetch_complete)
+        self.assertFalse(CalendarGUI.polling)
+
+    @patch.object(CalendarGUI, 'eventlist')
+    @patch.object(CalendarGUI, 'lbl2')
+    @patch.object(CalendarGUI, 'root')
+    def test_poll_fetch_results_error(self, root, lbl2, eventlist):
+        error = ValueError("fetch failed")
+        CalendarGUI.fetch_results.put((CalendarGUI.fetch_generation, error, True))
+        CalendarGUI.poll_fetch_results()
+        root.report_callback_exception.assert_called_once_with(ValueError, error, None)
+        self.assertEqual(eventlist.set_items.call_count, 0)
+
+    @patch.object(CalendarGUI, 'root')
+    def test_poll_fetch_results_not_ready(self, root):
+        CalendarGUI.fetch_pending = True
+        CalendarGUI.fetch_results.put((CalendarGUI.fetch_generation - 1, [], True))  # stale result is dropped
+        CalendarGUI.poll_fetch_results()
+        self.assertEqual(root.after.call_count, 1)  # keep polling for the latest one
+        self.assertTrue(CalendarGUI.fetch_results.empty())
+
+    def test_fetch_events_gives_up_when_superseded(self):
+        CalendarGUI.fetch_api.events.return_value.list.return_value.execute.return_value = {
+            "items": [{"summary": "test1"}], "nextPageToken": "2"}
+        generation = CalendarGUI.fetch_generation - 1
+        self.assertIsNone(CalendarGUI.fetch_events(CalendarGUI.fetch_api, generation, "2020-10-15T00:00:00Z",
+                                                   None, None))
+        # the next page is never requested
+        self.assertEqual(CalendarGUI.fetch_api.events.return_value.list.return_value.execute.call_count, 1)
+
+    def test_fetch_in_background_superseded_before_starting(self):
+        CalendarGUI.fetch_in_background(CalendarGUI.fetch_generation - 1, threading.Event(), "2020-10-15T00:00:00Z",
+                                        None, None)
+        # nothing requested, nothing put for the main loop
+        self.assertEqual(CalendarGUI.fetch_api.events.return_value.list.call_count, 0)
+        self.assertTrue(CalendarGUI.fetch_results.empty())
+
+
+class CalendarGUITestSearchAsYouType(unittest.TestCase):
+
+    # METHOD UNDER TEST: on_search_typed, search_as_you_type and show_events
+    # Strategy: Branch Coverage
+
+    def setUp(self):
+        self.loaded = [
+            {"summary": "Lecture", "location": "Building 10", "attendees": [{"email": "alice@example.com"}]},
+            {"summary": "Lab", "description": "Bring the lecture notes"},
+            {"summary": "Exam"},
+        ]
+        CalendarGUI.search_index = ((None, None), CalendarGUI.index_events(self.loaded))
+        CalendarGUI.search_after_id = None
+
+    def tearDown(self):
+        CalendarGUI.search_index = None
+        CalendarGUI.fetch_request = None
+
+    @patch.object(CalendarGUI, 'root')
+    def test_on_search_typed_debounced(self, root):
+        root.after.side_effect = ["after#1", "after#2"]
+        CalendarGUI.on_search_typed()
+        CalendarGUI.on_search_typed()
+        # the search scheduled by the first key press is cancelled by the second one
+        root.after_cancel.assert_called_once_with("after#1")
+        self.assertEqual(root.after.call_count, 2)
+        self.assertEqual(CalendarGUI.search_after_id, "after#2")
+
+    @patch.object(CalendarGUI, 'reload_event_list')
+    @patch.object(CalendarGUI, 'get_window', return_value=(None, None))
+    @patch.object(CalendarGUI, 'delete_event_btn')
+    @patch.object(CalendarGUI, 'eventdetails')
+    @patch.object(CalendarGUI, 'reminderlist')
+    @patch.object(CalendarGUI, 'eventlist')
+    @patch.object(CalendarGUI, 'searchIn')
+    def test_search_answered_locally(self, searchIn, eventlist, reminderlist, details, deleteBtn, get_window,
+                                     reload_event_list):
+        searchIn.get.return_value = " LECT "
+        CalendarGUI.search_as_you_type()
+        self.assertEqual(CalendarGUI.events, self.loaded[:2])  # summary and description match
+
+        searchIn.get.return_value = "lecture alice@"
+        CalendarGUI.search_as_you_type()
+        self.assertEqual(CalendarGUI.events, self.loaded[:1])  # every word has to match
+
+        searchIn.get.return_value = ""
+        CalendarGUI.search_as_you_type()
+        self.assertEqual(CalendarGUI.events, self.loaded)
+        self.assertEqual(reload_event_list.call_count, 0)
+
+    @patch.object(CalendarGUI, 'reload_event_list')
+    @patch.object(CalendarGUI, 'get_window', return_value=("2020-10-01T00:00:00Z", "2020-10-02T00:00:00Z"))
+    def test_search_falls_back_to_server(self, get_window, reload_event_list):
+        # the loaded events are for another window
+        CalendarGUI.search_as_you_type()
+        self.assertEqual(reload_event_list.call_count, 1)
+        # nothing loaded yet
+        CalendarGUI.search_index = None
+        CalendarGUI.search_as_you_type()
+        self.assertEqual(reload_event_list.call_count, 2)
+
+    @patch.object(CalendarGUI, 'delete_event_btn')
+    @patch.object(CalendarGUI, 'eventdetails')
+    @patch.object(CalendarGUI, 'reminderlist')
+    @patch.object(CalendarGUI, 'eventlist')
+    def test_show_events_index(self, eventlist, reminderlist, details, deleteBtn):
+        window = ("2020-10-01T00:00:00Z", None)
+        # a server search result is not the whole window, so the index is kept
+        CalendarGUI.fetch_request = (window, "lab")
+        CalendarGUI.show_events(self.loaded[1:2])
+        self.assertEqual(CalendarGUI.search_index[0], (None, None))
+
+        CalendarGUI.fetch_request = (window, None)
+        CalendarGUI.show_events(self.loaded)
+        self.assertEqual(CalendarGUI.search_index[0], window)
+        self.assertEqual(eventlist.set_items.call_count, 2)
+
+
+class CalendarGUITestVirtualListbox(unittest.TestCase):
+
+    # CLASS UNDER TEST: VirtualListbox in CalendarWidgets.py
+    # Strategy: Branch Coverage
+
+    def setUp(self):
+        self.listbox = Mock()
+        self.listbox.curselection.return_value = ()
+        self.scrollbar = Mock()
+        self.near_end = Mock()
+        self.items = ["event %d" % i for i in range(10000)]
+        self.view = CalendarWidgets.VirtualListbox(self.listbox, self.scrollbar, rows=8, near_end=self.near_end)
+        self.view.set_items(self.items)
+        self.listbox.reset_mock()
+
+    def test_only_visible_rows_materialized(self):
+        view = CalendarWidgets.VirtualListbox(Mock(), Mock(), rows=8)
+        view.set_items(self.items)
+        self.assertEqual(view.listbox.insert.call_count, 8)
+        view.scrollbar.set.assert_called_with(0, 8 / 10000)
+
+    def test_unchanged_rows_not_rewritten(self):
+        self.view.set_items(self.items)
+        self.assertEqual(self.listbox.insert.call_count, 0)
+        self.assertEqual(self.listbox.delete.call_count, 0)
+
+        changed = list(self.items)
+        changed[3] = "renamed"
+        self.view.set_items(changed)
+        self.listbox.delete.assert_called_once_with(3)
+        self.listbox.insert.assert_called_once_with(3, "renamed")
+
+    def test_fewer_items_than_rows(self):
+        self.view.set_items(self.items[:3])
+        self.listbox.delete.assert_called_once_with(3, CalendarWidgets.END)
+        self.assertEqual(self.view.shown, self.items[:3])
+        self.view.set_items([])
+        self.scrollbar.set.assert_called_with(0, 1)
+
+    def test_scroll_cost_independent_of_length(self):
+        self.view.yview("moveto", "0.5")
+        self.assertEqual(self.view.offset, 5000)
+        self.assertEqual(self.view.shown, self.items[5000:5008])
+        self.assertEqual(self.listbox.insert.call_count, 8)
+        self.view.yview("scroll", "1", "pages")
+        self.assertEqual(self.view.offset, 5008)
+        self.view.yview("scroll", "-1", "units")
+        self.assertEqual(self.view.offset, 5007)
+        self.view.yview("moveto", "1.0")
+        self.assertEqual(self.view.offset, 10000 - 8)  # clamped to the last screen
+
+    def test_mouse_wheel(self):
+        self.assertEqual(self.view.on_wheel(Mock(num=5, delta=0)), "break")
+        self.assertEqual(self.view.offset, 3)
+        self.view.on_wheel(Mock(num=0, delta=120))
+        self.view.on_wheel(Mock(num=4, delta=0))
+        self.assertEqual(self.view.offset, 0)
+
+    def test_selection_is_index_in_whole_list(self):
+        self.view.yview("moveto", "0.01")
+        self.listbox.curselection.return_value = ("2",)
+        self.assertEqual(self.view.curselection(), (102,))
+        # the selection is kept while its row is scrolled out of view, and shown again when it comes back
+        self.listbox.curselection.return_value = ()
+        self.view.yview("scroll", "1", "pages")
+        self.assertEqual(self.view.curselection(), (102,))
+        self.view.yview("scroll", "-1", "pages")
+        self.listbox.selection_set.assert_called_with(2)
+        self.view.set_items(self.items)
+        self.assertEqual(self.view.curselection(), ())
+
+    def test_near_end_loads_next_page(self):
+        self.near_end.reset_mock()
+        self.view.yview("moveto", "0.5")
+        self.assertEqual(self.near_end.call_count, 0)
+        self.view.yview("moveto", "0.9990")
+        self.assertEqual(self.near_end.call_count, 1)
+        self.view.append(["event 10000"])
+        self.assertEqual(self.near_end.call_count, 2)
+        self.assertEqual(len(self.view.items), 10001)
+
+    def test_grid_and_bind(self):
+        self.view.grid(row=2, columnspan=2)
+        self.listbox.master.grid.assert_called_once_with(row=2, columnspan=2)
+        handler = Mock()
+        self.view.bind('<<ListboxSelect>>', handler)
+        self.listbox.bind.assert_called_once_with('<<ListboxSelect>>', handler, add='+')
+
+
 class CalendarGUIUIElementsTest(unittest.TestCase):
 
     # METHOD UNDER TEST: assign_elements_to_grid and bind_elements_command
@@ -1321,8 +1741,9 @@ class CalendarGUIUIElementsTest(unittest.TestCase):
     @patch.object(CalendarGUI, 'nav_year_input')
     @patch.object(CalendarGUI, 'nav_month_input')
     @patch.object(CalendarGUI, 'nav_date_input')
-    def test_bind_elements_command(self, nav_date_input, nav_month_input, nav_year_input, searchBtn, refreshBtn,
-                                   updateBtn, past_checkbox, navigate_checkbox, delete_event_btn,
+    @patch.object(CalendarGUI, 'searchIn')
+    def test_bind_elements_command(self, searchIn, nav_date_input, nav_month_input, nav_year_input, searchBtn,
+                                   refreshBtn, updateBtn, past_checkbox, navigate_checkbox, delete_event_btn,
                                    delete_reminder_btn, eventlist, reminderlist):
 
         CalendarGUI.bind_elements_command()
@@ -1340,6 +1761,7 @@ class CalendarGUIUIElementsTest(unittest.TestCase):
         self.assertEqual(delete_reminder_btn.configure.call_count, 1)
         self.assertEqual(eventlist.bind.call_count, 1)
         self.assertEqual(reminderlist.bind.call_count, 1)
+        self.assertEqual(searchIn.bind.call_count, 1)
 
 
 def main():
@@ -1349,6 +1771,7 @@ def main():
                     CalendarGUITestDeleteReminder, CalendarGUITestEnableDateTextbox, CalendarGUITestEnablePeriods,
                     CalendarGUITestGetPeriods,
                     CalendarGUITestVerifyDate, CalendarGUITestEnableDeleteReminder,
+                    CalendarGUITestBackgroundFetch, CalendarGUITestSearchAsYouType, CalendarGUITestVirtualListbox,
                     CalendarGUIUIElementsTest]  # Test Classes
     for classes in test_classes:
         suite = unittest.TestLoader().loadTestsFromTestCase(classes)
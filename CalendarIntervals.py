@@ -0,0 +1,121 @@
+# In-memory interval index over the cached events, answering time window queries (upcoming, past, navigate DAY,
+# MONTH or YEAR, the GUI periods) in O(log n + k) for k events in the window, multi-day events included.
+# Events starting inside the window are a slice of the events sorted by start, found with bisect. Events which
+# started before the window and are still going are found with a centered interval tree.
+import bisect
+from CalendarModel import parse_time
+
+INFINITY = float('inf')
+# Intervals kept in a list scanned linearly instead of splitting further, a constant cost per query
+LEAF_SIZE = 32
+
+
+def epoch(timestamp):
+    return parse_time(timestamp).timestamp()
+
+
+class IntervalTree:
+    """
+    Static centered interval tree over (start, end, key) intervals, answering which intervals contain a moment.
+    Each node keeps the intervals containing its center, sorted by start and by end, and every center is the
+    start of one of the node's intervals, so no node is empty and a query visits O(log n) nodes.
+    Subtrees of at most LEAF_SIZE intervals are plain lists.
+    """
+
+    def __init__(self, intervals):
+        self.root = self.build(sorted(intervals))
+
+    def build(self, intervals):
+        if len(intervals) <= LEAF_SIZE:
+            return intervals
+        center = intervals[len(intervals) // 2][0]
+        left, here, right = [], [], []
+        for interval in intervals:  # still sorted by start
+            if interval[1] < center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        return (center, here, sorted(here, key=lambda interval: interval[1], reverse=True), self.build(left),
+                self.build(right))
+
+    def containing(self, moment):
+        """
+        Intervals with start <= moment < end
+        """
+        found = []
+        node = self.root
+        while isinstance(node, tuple):
+            center, by_start, by_end, left, right = node
+            if moment < center:
+                for interval in by_start:  # all end at or after the center, so after moment
+                    if interval[0] > moment:
+                        break
+                    found.append(interval)
+                node = left
+            else:
+                for interval in by_end:  # all start at or before the center, so at or before moment
+                    if interval[1] <= moment:
+                        break
+                    found.append(interval)
+                node = right
+        found.extend(interval for interval in node if interval[0] <= moment < interval[1])
+        return found
+
+
+class WindowIndex:
+    """
+    Serves get_events like the EventStore it wraps (so it can be passed wherever a store is), answering the
+    window query from memory. Changes synced by the store mark the index stale, it is rebuilt on the next query.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.stale = True
+        self.events = []  # ordered by start
+        self.starts = []
+        self.ends = []
+        self.tree = None
+        store.listeners.append(self)
+
+    def apply(self, event):
+        self.stale = True
+
+    def clear(self):
+        self.stale = True
+
+    def build(self):
+        self.events = list(self.store.query())
+        self.starts = [epoch(event['start'].get('dateTime', event['start'].get('date'))) for event in self.events]
+        self.ends = []
+        for start, event in zip(self.starts, self.events):
+            end = event.get('end')
+            self.ends.append(start if end is None else epoch(end.get('dateTime', end.get('date'))))
+        # events starting before a window and still going are the ones containing its start
+        self.tree = IntervalTree(zip(self.starts, self.ends, range(len(self.events))))
+        self.stale = False
+
+    def query(self, starting_time=None, end_time=None):
+        """
+        Events overlapping the window ordered by start time, same semantics as EventStore.query
+        """
+        if self.stale:
+            self.build()
+        low = -INFINITY if starting_time is None else epoch(starting_time)
+        high = INFINITY if end_time is None else epoch(end_time)
+        if high <= low:
+            return []
+        first = bisect.bisect_left(self.starts, low)
+        last = bisect.bisect_left(self.starts, high)
+        while first < last and self.ends[first] <= low:  # events lasting no time, right at the window start
+            first += 1
+        earlier = sorted(key for start, end, key in self.tree.containing(low) if start < low)
+        return [self.events[key] for key in earlier] + self.events[first:last]
+
+    def get_events(self, api, starting_time=None, end_time=None):
+        """
+        Bring the store up to date with a (small) delta request, then answer the query from memory
+        """
+        self.store.sync(api)
+        return self.query(starting_time, end_time)
@@ -0,0 +1,136 @@
+# Compact model of the events returned by the Google Calendar API. Decoding an event once replaces the nested
+# dict lookups (event['start'].get('dateTime', event['start'].get('date')), event['reminders']...) the formatters
+# used to repeat, and the __slots__ classes take a fraction of the memory of the raw JSON for cached calendars.
+# https://developers.google.com/calendar/v3/reference/events#resource
+import datetime
+import re
+
+
+def parse_time(text):
+    """
+    Parse an RFC3339 timestamp (or an all day YYYY-MM-DD date, taken as midnight) into an aware UTC datetime
+    """
+    if text is None:
+        return None
+    if len(text) == 10:  # all day events only carry a date
+        return datetime.datetime.strptime(text, "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc)
+    if '.' in text:  # fromisoformat is picky about fractions
+        text = re.sub(r'\.\d+', '', text)
+    parsed = datetime.datetime.fromisoformat(text.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.astimezone(datetime.timezone.utc)
+
+
+class Reminder:
+    __slots__ = ('method', 'minutes')
+
+    def __init__(self, method, minutes):
+        self.method = method
+        self.minutes = minutes
+
+    def describe(self):
+        return "Reminder through " + self.method + " " + str(self.minutes) + " minutes before event starts"
+
+
+# what "useDefault": true stands for
+DEFAULT_REMINDER = Reminder("popup", 10)
+
+
+class Event:
+    """
+    The fields of an event the CLI and GUI show. start and end are parsed into datetimes the first time they
+    are used, start_text and end_text keep the text sent by the API for display.
+    """
+    __slots__ = ('id', 'summary', 'status', 'visibility', 'created', 'creator', 'location', 'description',
+                 'attendees', 'start_text', 'end_text', 'use_default', 'reminders', '_start', '_end')
+
+    @classmethod
+    def decode(cls, event):
+        """
+        Build an Event from the JSON of the API (an Event is returned as is)
+        """
+        if isinstance(event, cls):
+            return event
+        decoded = cls()
+        decoded.id = event.get('id')
+        decoded.summary = event.get('summary')
+        decoded.status = event.get('status')
+        decoded.visibility = event.get('visibility')
+        decoded.created = event.get('created')
+        decoded.creator = event.get('creator', {}).get('email')
+        decoded.location = event.get('location')
+        decoded.description = event.get('description')
+        attendees = event.get('attendees')
+        decoded.attendees = None if attendees is None else tuple(attendee.get('email') for attendee in attendees)
+        start = event.get('start')
+        decoded.start_text = None if start is None else start.get('dateTime', start.get('date'))
+        end = event.get('end')
+        decoded.end_text = None if end is None else end.get('dateTime', end.get('date'))
+        reminders = event.get('reminders', {})
+        decoded.use_default = reminders.get('useDefault') == True
+        decoded.reminders = tuple(Reminder(override.get('method'), override.get('minutes'))
+                                  for override in reminders.get('overrides', []))
+        decoded._start = decoded._end = None
+        return decoded
+
+    @property
+    def title(self):
+        return "No title" if self.summary is None else self.summary
+
+    @property
+    def start(self):
+        if self._start is None:
+            self._start = parse_time(self.start_text)
+        return self._start
+
+    @property
+    def end(self):
+        if self._end is None:
+            self._end = parse_time(self.end_text)
+        return self._end
+
+    def reminder_texts(self):
+        """
+        One "Reminder through ..." text per reminder of the event
+        """
+        if self.use_default:
+            return [DEFAULT_REMINDER.describe()]
+        return [reminder.describe() for reminder in self.reminders]
+
+
+def decode_events(events):
+    """
+    Decode a stream of events lazily, one at a time
+    """
+    for event in events:
+        yield Event.decode(event)
+
+
+class Clock:
+    """
+    Source of the current time (naive UTC). Functions read the module level Calendar.clock when they are called
+    rather than when they are defined, so a long running session always queries from the real "now", and tests
+    can swap in a FixedClock to control time. The modules Calendar.py imports take a clock as a parameter
+    """
+
+    def now(self):
+        return datetime.datetime.utcnow()
+
+    def timestamp(self):
+        return self.now().isoformat() + 'Z'
+
+
+class FixedClock(Clock):
+    """
+    A clock which stands still until advanced
+    """
+
+    def __init__(self, current):
+        self.current = current
+
+    def now(self):
+        return self.current
+
+    def advance(self, **delta):
+        self.current += datetime.timedelta(**delta)
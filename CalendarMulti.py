@@ -0,0 +1,89 @@
+# Aggregated agenda over many calendars (shared team calendars, rooms, ...) of the user's calendar list.
+# The calendars are queried in parallel by a bounded pool of worker threads, then their start time ordered
+# results are merged with a k-way heap merge, so the agenda costs about one round trip instead of one per calendar.
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import Calendar
+from CalendarModel import decode_events
+
+# Worker threads querying calendars at the same time
+MAX_WORKERS = 8
+
+
+def get_calendar_ids(api, min_access_role=None):
+    """
+    Ids of every calendar in the user's calendar list, following nextPageToken
+    """
+    calendar_ids = []
+    page_token = None
+    while True:
+        calendars_result = api.calendarList().list(pageToken=page_token, minAccessRole=min_access_role,
+                                                   fields="nextPageToken,items(id)").execute()
+        calendar_ids.extend(calendar['id'] for calendar in calendars_result.get('items', []))
+        if 'nextPageToken' not in calendars_result:
+            break
+        page_token = calendars_result['nextPageToken']
+    return calendar_ids
+
+
+def start_key(pair):
+    return pair[1].start
+
+
+def fan_out(api_factory, calendar_ids, fields=Calendar.LIST_FIELDS, max_workers=MAX_WORKERS, **query):
+    """
+    Run the same events().list query against every calendar on a pool of at most max_workers threads.
+    The discovery client is not thread safe, so each worker builds its own through api_factory the first time
+    it is used. The workers call it at the same time, so it must not load the credentials itself: use
+    Calendar.get_calendar_api_factory() rather than Calendar.get_calendar_api.
+    Returns an iterator of (calendar id, CalendarModel.Event) pairs in start time order across all calendars
+    """
+    local = threading.local()
+
+    def fetch(calendar_id):
+        if getattr(local, 'api', None) is None:
+            local.api = api_factory()
+        events = Calendar.list_events(local.api, fields, calendarId=calendar_id, singleEvents=True,
+                                      orderBy='startTime', **query)
+        return [(calendar_id, event) for event in decode_events(events)]
+
+    if not calendar_ids:
+        return iter([])
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calendar_ids))) as pool:
+        streams = list(pool.map(fetch, calendar_ids))
+    # Each stream is already ordered by startTime, heapq.merge only compares the heads of the streams
+    return heapq.merge(*streams, key=start_key)
+
+
+def agenda_lines(pairs):
+    """
+    Yield one "calendar: title,start" line per event
+    """
+    for calendar_id, event in pairs:
+        yield calendar_id + ": " + event.title + "," + event.start_text + "\n"
+
+
+def get_agenda(api_factory=None, calendar_ids=None, starting_time=None, end_time=None, query=None,
+               max_workers=MAX_WORKERS, stream=None):
+    """
+    Upcoming (starting_time), past (starting_time and end_time) or searched (query) events of many calendars
+    as one agenda. When no calendar ids are given every calendar of the user's calendar list is used.
+    Without api_factory the clients are built by Calendar.get_calendar_api_factory()
+    """
+    if query is not None and query.strip() == "":
+        raise ValueError
+    if starting_time is None and query is None:
+        starting_time = Calendar.clock.timestamp()
+    if starting_time is not None and end_time is not None:
+        Calendar.validate_window(starting_time, end_time)
+    elif starting_time is not None and len(starting_time.split('-')) != 3:
+        raise ValueError("starting time provided is not of format")
+
+    if api_factory is None:
+        api_factory = Calendar.get_calendar_api_factory()
+    if calendar_ids is None:
+        calendar_ids = get_calendar_ids(api_factory())
+    pairs = fan_out(api_factory, calendar_ids, max_workers=max_workers, timeMin=starting_time, timeMax=end_time,
+                    q=query)
+    return Calendar.render(agenda_lines(pairs), stream)
@@ -0,0 +1,239 @@
+# Offline mode. When the API cannot be reached the CLI keeps working from the last synced snapshot of the
+# EventStore, and deletes are kept in an outbox table of the same database. The outbox is replayed, oldest first,
+# on the first sync which gets through. Each replayed request carries the etag the event had when it was
+# changed (If-Match), so an event changed on the server in the meantime is left alone and reported as a conflict.
+# The outbox also holds back reminder edits made online (write_behind): the edits of one event are coalesced
+# into a single patch of its reminders, sent when the flush timer goes off or when the CLI exits.
+import json
+import threading
+from CalendarModel import Clock
+
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    sequence INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    etag TEXT,
+    body TEXT NOT NULL
+);
+"""
+
+# Statuses of a replayed request which mean the event was changed (412) or deleted (404, 410) on the server
+CONFLICT_STATUS = 412
+GONE_STATUSES = (404, 410)
+# Statuses of a busy or failing server (as Calendar.RETRY_STATUSES): the sync serves the snapshot, and the
+# queued writes wait for the next sync. Any other error refuses the write for good
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Seconds a reminder edit waits in the outbox for more edits of the same event before being sent
+FLUSH_DELAY = 10
+
+
+def status_of(error):
+    return getattr(getattr(error, 'resp', None), 'status', None)
+
+
+def is_offline_error(error):
+    """
+    Whether error means the API could not be reached at all, rather than that it answered with an error
+    """
+    if isinstance(error, OSError):  # DNS failures, refused or reset connections, timeouts
+        return True
+    from httplib2 import ServerNotFoundError  # deferred, see get_calendar_api in Calendar.py
+    from google.auth.exceptions import TransportError  # refreshing the credentials failed
+    return isinstance(error, (ServerNotFoundError, TransportError))
+
+
+def is_transient_error(error):
+    """
+    Whether error is waited out with the snapshot (the API cannot be reached, or is busy or failing)
+    """
+    return is_offline_error(error) or status_of(error) in RETRY_STATUSES
+
+
+class OfflineStore:
+    """
+    Wraps an EventStore (and can be wrapped by the indexes in its place). A sync which cannot reach the API
+    leaves the store as it was and sets offline, so the queries are answered from the snapshot of the last
+    sync, synced_at telling how old it is.
+    """
+
+    def __init__(self, store, flush_delay=FLUSH_DELAY, clock=None):
+        self.store = store
+        self.clock = Clock() if clock is None else clock  # stamps the syncs, see synced_at
+        self.listeners = store.listeners
+        self.offline = False
+        self.conflicts = []  # events of queued writes which were not replayed, the event changed on the server
+        self.failed = []  # (event, error) of queued writes the server refused
+        self.flush_error = None  # why the last flush sent nothing, e.g. the credentials could not be refreshed
+        self.flush_delay = flush_delay
+        self.timer = None
+        self.lock = threading.RLock()  # the flush timer replays from its own thread
+        store.connection.executescript(OUTBOX_SCHEMA)
+
+    def sync(self, api):
+        with self.lock:
+            try:
+                self.replay(api, held=self.timer is not None)
+                self.store.sync(api)
+            except Exception as error:
+                if not is_transient_error(error):
+                    raise
+                self.offline = True
+                return
+            self.offline = False
+        with self.store.connection:
+            self.store.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('syncedAt', ?)",
+                                          (self.clock.now().strftime('%Y-%m-%d %H:%M'),))
+
+    def synced_at(self):
+        row = self.store.connection.execute("SELECT value FROM meta WHERE key = 'syncedAt'").fetchone()
+        return row[0] if row else None
+
+    def query(self, starting_time=None, end_time=None):
+        return self.store.query(starting_time, end_time)
+
+    def clear(self):
+        self.store.clear()
+
+    def get_events(self, api, starting_time=None, end_time=None):
+        """
+        Sync if the API can be reached, then answer the query from the snapshot
+        """
+        self.sync(api)
+        return self.query(starting_time, end_time)
+
+    def find(self, name):
+        """
+        Events of the snapshot whose title contains name, for picking an event (as q= would) while offline
+        """
+        name = name.lower()
+        return [event for event in self.query() if name in event.get('summary', '').lower()]
+
+    def queue(self, kind, event):
+        """
+        Keep a write for later, 'delete' the event, 'update' it to event or patch its 'reminders' to those of
+        event, and apply it to the snapshot. Reminder edits of an event still queued are merged into one write,
+        which keeps the etag of the first edit
+        """
+        with self.lock, self.store.connection:
+            row = None
+            if kind == 'reminders':
+                row = self.store.connection.execute("SELECT sequence FROM outbox WHERE kind = 'reminders' AND "
+                                                    "event_id = ?", (event['id'],)).fetchone()
+            if row is None:
+                self.store.connection.execute("INSERT INTO outbox (kind, event_id, etag, body) VALUES (?, ?, ?, ?)",
+                                              (kind, event['id'], event.get('etag'), json.dumps(event)))
+            else:
+                self.store.connection.execute("UPDATE outbox SET body = ? WHERE sequence = ?",
+                                              (json.dumps(event), row[0]))
+            if kind == 'delete':
+                event = {'id': event['id'], 'status': 'cancelled'}
+            elif kind == 'reminders':  # event may be a partial response, the snapshot keeps the rest
+                stored = self.store.connection.execute("SELECT body FROM events WHERE id = ?",
+                                                       (event['id'],)).fetchone()
+                if stored is not None:
+                    event = dict(json.loads(stored[0]), reminders=event['reminders'])
+            self.store.apply(event)
+
+    def write_behind(self, api, event):
+        """
+        Queue the reminders of event to be patched, sending them flush_delay seconds after the first edit
+        """
+        self.queue('reminders', event)
+        with self.lock:
+            if self.timer is None:
+                self.timer = threading.Timer(self.flush_delay, self.flush, (api,))
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self, api):
+        """
+        Send the queued writes now. While the API cannot be reached they stay queued for the next sync, as they
+        do on any other error, which is kept for the banner: the flush runs on the timer's thread and at exit,
+        where raising would only print a traceback
+        """
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            try:
+                self.replay(api)
+            except Exception as error:
+                if is_offline_error(error):
+                    self.offline = True
+                else:
+                    self.flush_error = error
+
+    def overlay(self, events):
+        """
+        The events read from the API, with the changes still queued for them applied
+        """
+        queued = dict(self.store.connection.execute("SELECT event_id, body FROM outbox WHERE kind != 'delete' "
+                                                    "ORDER BY sequence").fetchall())
+        return [json.loads(queued[event.get('id')]) if event.get('id') in queued else event for event in events]
+
+    def pending(self):
+        return self.store.connection.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def replay(self, api, held=False):
+        """
+        Send the queued writes oldest first, but with held the reminder edits waiting for the flush timer.
+        A write whose event changed on the server is dropped into conflicts, one whose event is gone is dropped,
+        one refused by the server is dropped into failed. If the API cannot be reached (raised) or the server is
+        busy (not raised, the sync carries on from the snapshot) the rest stay queued
+        """
+        rows = self.store.connection.execute("SELECT sequence, kind, event_id, etag, body FROM outbox "
+                                             "ORDER BY sequence").fetchall()
+        for sequence, kind, event_id, etag, body in rows:
+            if held and kind == 'reminders':
+                continue
+            event = json.loads(body)
+            if kind == 'delete':
+                request = api.events().delete(calendarId='primary', eventId=event_id)
+            elif kind == 'reminders':
+                request = api.events().patch(calendarId='primary', eventId=event_id,
+                                             body={'reminders': event['reminders']})
+            else:  # a patch, as the event may be a partial response which an update would strip
+                request = api.events().patch(calendarId='primary', eventId=event_id, body=event)
+            if etag is not None:
+                request.headers['If-Match'] = etag
+            try:
+                response = request.execute()
+            except Exception as error:
+                if is_offline_error(error):
+                    raise
+                status = status_of(error)
+                if status in RETRY_STATUSES:
+                    return
+                if status == CONFLICT_STATUS:
+                    self.conflicts.append(event)
+                elif status not in GONE_STATUSES:
+                    self.failed.append((event, error))
+                response = None
+            with self.store.connection:
+                self.store.connection.execute("DELETE FROM outbox WHERE sequence = ?", (sequence,))
+                if kind != 'delete' and isinstance(response, dict):
+                    self.store.apply(response)  # its new etag, for the next edit of the event
+
+    def banner(self):
+        """
+        Text telling the user the results come from the snapshot, and which writes could not be replayed
+        """
+        lines = []
+        if self.offline:
+            lines.append("Offline: showing the events as of the last sync (" + (self.synced_at() or "never")
+                         + " UTC), " + str(self.pending()) + " change(s) waiting to be sent")
+        for event in self.conflicts:
+            lines.append("Not sent, changed on the server in the meantime: " + event.get('summary', 'No title'))
+        if self.flush_error is not None:
+            lines.append("Could not send the changes (" + (str(self.flush_error) or type(self.flush_error).__name__)
+                         + "), " + str(self.pending()) + " change(s) waiting to be sent")
+        for event, error in self.failed:
+            status = status_of(error)
+            lines.append("Not sent, refused by the server" + ("" if status is None else " (" + str(status) + ")")
+                         + ": " + event.get('summary', 'No title'))
+        self.conflicts = []
+        self.failed = []
+        self.flush_error = None
+        return "\n".join(lines)
@@ -0,0 +1,387 @@
+# Local expansion of recurring events. Listing with singleEvents=True makes the server send every instance of a
+# recurring event, so a daily meeting over a few years is hundreds of near identical events. Listing with
+# singleEvents=False only sends the recurring (master) events and their exceptions (moved, edited or cancelled
+# instances), and the instances of the window are generated here from the RRULE, RDATE and EXDATE lines, lazily
+# and in start order. https://developers.google.com/calendar/v3/recurringevents
+# Rules using parts not handled here (BYSETPOS, BYWEEKNO, BYYEARDAY, BYHOUR, ...) are expanded by the server,
+# through events().instances for that event only, as are events in a time zone other than UTC when there is no
+# zoneinfo (Python 3.8) to follow their daylight saving changes.
+import datetime
+import heapq
+from CalendarModel import Clock, parse_time
+from CalendarOffline import is_transient_error
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python 3.8, see get_zone
+    ZoneInfo = None
+
+UTC = datetime.timezone.utc
+UTC_NAMES = ("UTC", "Etc/UTC", "GMT", "Etc/GMT")
+WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+RULE_PARTS = {"FREQ", "INTERVAL", "COUNT", "UNTIL", "BYDAY", "BYMONTHDAY", "BYMONTH", "WKST"}
+# How far after its start an open ended window (upcoming events) expands recurring events
+HORIZON = datetime.timedelta(days=366)
+# Periods in a row without an occurrence before a rule is taken as never matching again (e.g. February 30th)
+MAX_EMPTY_PERIODS = 5000
+
+
+def days_in_month(year, month):
+    following = datetime.date(year + month // 12, month % 12 + 1, 1)
+    return (following - datetime.timedelta(days=1)).day
+
+
+def parse_stamp(text, zone):
+    """
+    Datetime (naive, wall clock of zone) or date of an iCalendar DATE or DATE-TIME value, a trailing Z is UTC
+    """
+    if len(text) == 8:
+        return datetime.datetime.strptime(text, "%Y%m%d").date()
+    moment = datetime.datetime.strptime(text.rstrip("Z"), "%Y%m%dT%H%M%S")
+    if text.endswith("Z"):
+        moment = moment.replace(tzinfo=UTC).astimezone(zone).replace(tzinfo=None)
+    return moment
+
+
+def parse_offset(text):
+    """
+    UTC offset of an RFC3339 timestamp as a timedelta
+    """
+    return datetime.datetime.fromisoformat(text[:19]) - parse_time(text).replace(tzinfo=None)
+
+
+def get_zone(name, fallback):
+    """
+    The time zone called name, fallback without a name or for an unknown one. Without zoneinfo only UTC is known,
+    any other zone raises ValueError: keeping one UTC offset would move the instances after a daylight saving
+    change by an hour, so the server expands the event instead
+    """
+    if name is None:
+        return fallback
+    if ZoneInfo is None:
+        if name in UTC_NAMES:
+            return UTC
+        raise ValueError(name)
+    try:
+        return ZoneInfo(name)
+    except (KeyError, ValueError):  # ZoneInfoNotFoundError is a KeyError
+        return fallback
+
+
+class Rule:
+    """
+    An RRULE with FREQ DAILY, WEEKLY, MONTHLY or YEARLY and the INTERVAL, COUNT, UNTIL, BYDAY, BYMONTHDAY,
+    BYMONTH and WKST parts. Raises ValueError for anything else
+    """
+    __slots__ = ('freq', 'interval', 'count', 'until', 'by_day', 'by_month_day', 'by_month', 'week_start')
+
+    def __init__(self, text, zone):
+        parts = dict(part.split("=", 1) for part in text[len("RRULE:"):].split(";"))
+        if not set(parts) <= RULE_PARTS or parts.get("FREQ") not in FREQUENCIES:
+            raise ValueError(text)
+        self.freq = parts["FREQ"]
+        self.interval = int(parts.get("INTERVAL", 1))
+        self.count = int(parts["COUNT"]) if "COUNT" in parts else None
+        self.until = parse_stamp(parts["UNTIL"], zone) if "UNTIL" in parts else None
+        self.by_day = None
+        if "BYDAY" in parts:  # e.g. MO,WE or 2TU (second Tuesday) or -1FR (last Friday)
+            self.by_day = [(int(day[:-2]) if day[:-2] else None, WEEKDAYS.index(day[-2:]))
+                           for day in parts["BYDAY"].split(",")]
+        self.by_month_day = [int(day) for day in parts["BYMONTHDAY"].split(",")] if "BYMONTHDAY" in parts else None
+        self.by_month = [int(month) for month in parts["BYMONTH"].split(",")] if "BYMONTH" in parts else None
+        self.week_start = WEEKDAYS.index(parts.get("WKST", "MO"))
+        if self.freq == "YEARLY" and self.by_month is None and (self.by_day or self.by_month_day):
+            raise ValueError(text)  # days of the whole year
+
+    def month_days(self, year, month, default_day):
+        last = days_in_month(year, month)
+        days = None
+        if self.by_month_day is not None:
+            days = {day if day > 0 else last + 1 + day for day in self.by_month_day}
+        if self.by_day is not None:
+            weekdays = set()
+            for ordinal, weekday in self.by_day:
+                matching = list(range((weekday - datetime.date(year, month, 1).weekday()) % 7 + 1, last + 1, 7))
+                if ordinal is None:
+                    weekdays.update(matching)
+                elif -len(matching) <= ordinal <= len(matching) and ordinal != 0:
+                    weekdays.add(matching[ordinal - 1 if ordinal > 0 else ordinal])
+            days = weekdays if days is None else days & weekdays
+        if days is None:
+            days = {default_day}
+        return [datetime.date(year, month, day) for day in sorted(days) if 1 <= day <= last]
+
+    def period_dates(self, first, period):
+        """
+        Dates of the period-th period (a day, week, month or year every interval) counted from first, in order
+        """
+        step = period * self.interval
+        if self.freq == "DAILY":
+            dates = [first + datetime.timedelta(days=step)]
+            if self.by_day is not None:
+                dates = [date for date in dates if date.weekday() in {weekday for ordinal, weekday in self.by_day}]
+            if self.by_month_day is not None:
+                dates = [date for date in dates if date.day in self.by_month_day
+                         or date.day - days_in_month(date.year, date.month) - 1 in self.by_month_day]
+        elif self.freq == "WEEKLY":
+            week = first - datetime.timedelta(days=(first.weekday() - self.week_start) % 7 - 7 * step)
+            weekdays = [first.weekday()] if self.by_day is None else [weekday for ordinal, weekday in self.by_day]
+            dates = sorted({week + datetime.timedelta(days=(weekday - self.week_start) % 7) for weekday in weekdays})
+        elif self.freq == "MONTHLY":
+            year, month = divmod(first.year * 12 + first.month - 1 + step, 12)
+            dates = self.month_days(year, month + 1, first.day)
+        else:
+            months = [first.month] if self.by_month is None else sorted(self.by_month)
+            dates = [date for month in months for date in self.month_days(first.year + step, month, first.day)]
+        if self.by_month is not None and self.freq != "YEARLY":
+            dates = [date for date in dates if date.month in self.by_month]
+        return dates
+
+    def periods_before(self, first, day):
+        """
+        Whole periods from first which end before day, so the search for day can start right there
+        """
+        if self.freq == "DAILY":
+            periods = (day - first).days
+        elif self.freq == "WEEKLY":
+            periods = (day - first).days // 7
+        elif self.freq == "MONTHLY":
+            periods = (day.year - first.year) * 12 + day.month - first.month
+        else:
+            periods = day.year - first.year
+        return max(0, periods // self.interval - 1)
+
+    def occurrences(self, first, skip_to=None):
+        """
+        Yield the wall clock (naive) datetimes of the occurrences in order, first (the event start) included.
+        Without COUNT the periods ending before the date skip_to are not generated at all
+        """
+        period = 0
+        if self.count is None and skip_to is not None:
+            period = self.periods_before(first.date(), skip_to)
+        produced = 0
+        empty = 0
+        while empty < MAX_EMPTY_PERIODS:
+            dates = self.period_dates(first.date(), period)
+            empty = 0 if dates else empty + 1
+            for date in dates:
+                moment = datetime.datetime.combine(date, first.time())
+                if moment < first:
+                    continue
+                if self.until is not None and (moment.date() if type(self.until) is datetime.date
+                                               else moment) > self.until:
+                    return
+                produced += 1
+                if self.count is not None and produced > self.count:
+                    return
+                yield moment
+            period += 1
+
+
+def unique(moments):
+    previous = None
+    for moment in moments:
+        if moment != previous:
+            yield moment
+        previous = moment
+
+
+class Recurrence:
+    """
+    The recurrence of a master event: its rules, extra (RDATE) and excluded (EXDATE) dates, in the time zone
+    of the event's start. All day events recur on dates, at midnight UTC like CalendarModel.parse_time takes them
+    """
+
+    def __init__(self, event):
+        start = event['start']
+        self.all_day = 'dateTime' not in start
+        first = parse_time(start.get('dateTime', start.get('date')))
+        end = event.get('end', start)
+        self.duration = parse_time(end.get('dateTime', end.get('date'))) - first
+        if self.all_day:
+            self.zone = UTC
+        else:
+            self.zone = get_zone(start.get('timeZone'), datetime.timezone(parse_offset(start['dateTime'])))
+        self.first = first.astimezone(self.zone).replace(tzinfo=None)
+        self.rules, self.extra, self.excluded = [], [], set()
+        for line in event.get('recurrence', []):
+            name, values = line.split(":", 1)
+            name, *params = name.split(";")
+            params = dict(param.split("=", 1) for param in params)
+            if name == "RRULE":
+                self.rules.append(Rule(line, self.zone))
+            elif name in ("EXDATE", "RDATE"):
+                if params.get("VALUE") == "PERIOD":
+                    raise ValueError(line)
+                zone = get_zone(params.get("TZID"), self.zone)
+                moments = [self.wall_clock(parse_stamp(value, zone), zone) for value in values.split(",")]
+                if name == "EXDATE":
+                    self.excluded.update(moments)
+                else:
+                    self.extra.extend(moments)
+            else:
+                raise ValueError(line)
+        self.extra.sort()
+
+    def wall_clock(self, moment, zone):
+        """
+        A value of an EXDATE or RDATE line as a wall clock datetime of the event's zone
+        """
+        if type(moment) is datetime.date:
+            return datetime.datetime.combine(moment, self.first.time())
+        return moment.replace(tzinfo=zone).astimezone(self.zone).replace(tzinfo=None)
+
+    def to_utc(self, moment):
+        return moment.replace(tzinfo=self.zone).astimezone(UTC)
+
+    def instants(self, low=None, high=None):
+        """
+        Yield (start, wall clock start) of the instances overlapping the window [low, high), UTC datetimes
+        """
+        skip_to = None if low is None else (low - self.duration).astimezone(self.zone).date()
+        streams = [rule.occurrences(self.first, skip_to) for rule in self.rules] + [[self.first], self.extra]
+        for moment in unique(heapq.merge(*streams)):
+            start = self.to_utc(moment)
+            if high is not None and start >= high:
+                return
+            if moment in self.excluded or (low is not None and start + self.duration <= low):
+                continue
+            yield start, moment
+
+
+def original_start(event):
+    """
+    UTC start of the instance an exception (moved, edited or cancelled instance) stands for
+    """
+    original = event['originalStartTime']
+    return parse_time(original.get('dateTime', original.get('date')))
+
+
+def start_key(event):
+    return parse_time(event['start'].get('dateTime', event['start'].get('date')))
+
+
+def overlaps(event, low, high):
+    start = start_key(event)
+    end = event.get('end')
+    end = start if end is None else parse_time(end.get('dateTime', end.get('date')))
+    return (low is None or end > low) and (high is None or start < high)
+
+
+def make_instance(master, recurrence, start, moment):
+    """
+    The instance of master starting at start (UTC), looking like an instance sent with singleEvents=True
+    """
+    instance = dict(master)
+    del instance['recurrence']
+    instance['recurringEventId'] = master['id']
+    if recurrence.all_day:
+        instance['id'] = master['id'] + "_" + moment.strftime("%Y%m%d")
+        instance['start'] = {'date': moment.date().isoformat()}
+        instance['end'] = {'date': (moment + recurrence.duration).date().isoformat()}
+    else:
+        instance['id'] = master['id'] + "_" + start.strftime("%Y%m%dT%H%M%SZ")
+        instance['start'] = dict(master['start'], dateTime=start.astimezone(recurrence.zone).isoformat())
+        instance['end'] = dict(master.get('end', master['start']),
+                               dateTime=(start + recurrence.duration).astimezone(recurrence.zone).isoformat())
+    instance['originalStartTime'] = instance['start']
+    return instance
+
+
+def expand(master, low=None, high=None, exceptions=None):
+    """
+    Lazily yield the instances of master overlapping the window [low, high) (UTC datetimes) in start order,
+    leaving out the instances which have an exception. Raises ValueError for recurrences not handled here
+    """
+    recurrence = Recurrence(master)
+    exceptions = {} if exceptions is None else exceptions
+
+    def instances():
+        for start, moment in recurrence.instants(low, high):
+            if (master['id'], start) not in exceptions:
+                yield make_instance(master, recurrence, start, moment)
+
+    return instances()
+
+
+def follow_pages(method, **query):
+    """
+    Yield the items of every page of an events().list or events().instances request
+    """
+    page_token = None
+    while True:
+        result = method(pageToken=page_token, **query).execute()
+        yield from result.get('items', [])
+        if 'nextPageToken' not in result:  # last page reached
+            break
+        page_token = result['nextPageToken']
+
+
+def expand_events(api, events, starting_time=None, end_time=None):
+    """
+    Turn events listed with singleEvents=False (masters, exceptions and single events) into the instances of
+    the window in start order, as singleEvents=True and orderBy=startTime would have listed them.
+    Each master is expanded lazily, so the instances are generated as the result is read
+    """
+    low = None if starting_time is None else parse_time(starting_time)
+    high = None if end_time is None else parse_time(end_time)
+    masters, exceptions, singles = [], {}, []
+    for event in events:
+        if 'recurrence' in event:
+            masters.append(event)
+        elif 'recurringEventId' in event and 'originalStartTime' in event:
+            exceptions[(event['recurringEventId'], original_start(event))] = event
+        elif event.get('status') != 'cancelled':
+            singles.append(event)
+    streams = []
+    served = set()
+    for master in masters:
+        if master.get('status') == 'cancelled':
+            continue
+        try:
+            streams.append(expand(master, low, high, exceptions))
+        except ValueError:
+            served.add(master['id'])
+            # the server expands this one, its exceptions included
+            instances = follow_pages(api.events().instances, calendarId='primary', eventId=master['id'],
+                                     timeMin=starting_time, timeMax=end_time)
+            streams.append(sorted(instances, key=start_key))
+    # exceptions of the masters expanded here, moved or edited, are listed like single events
+    singles.extend(event for (master_id, start), event in exceptions.items()
+                   if master_id not in served and event.get('status') != 'cancelled')
+    streams.append(sorted((event for event in singles if overlaps(event, low, high)), key=start_key))
+    return heapq.merge(*streams, key=start_key)
+
+
+class RecurrenceExpander:
+    """
+    Serves get_events like an EventStore (so it can be passed wherever a store is), listing the window with
+    singleEvents=False and expanding the recurring events locally. Without an end the window stops horizon
+    after its start, or from clock's now without a start. When store (an OfflineStore) is given it is synced
+    first, sending its queued writes, and while the API cannot be reached the events come from its snapshot
+    """
+
+    def __init__(self, horizon=HORIZON, page_size=2500, store=None, clock=None):
+        self.horizon = horizon
+        self.page_size = page_size
+        self.store = store
+        self.clock = Clock() if clock is None else clock
+
+    def get_events(self, api, starting_time=None, end_time=None):
+        if end_time is None:
+            start = self.clock.now().replace(tzinfo=UTC) if starting_time is None else parse_time(starting_time)
+            end_time = (start + self.horizon).strftime("%Y-%m-%dT%H:%M:%SZ")
+        try:
+            if self.store is not None:
+                self.store.sync(api)  # sends the queued writes first, and clears offline once the API answers
+                if self.store.offline:
+                    return self.store.query(starting_time, end_time)
+            # inside the try, api.events() builds the client of a LazyCalendarApi and can fail while offline
+            events = follow_pages(api.events().list, calendarId='primary', timeMin=starting_time,
+                                  timeMax=end_time, singleEvents=False, maxResults=self.page_size)
+            return expand_events(api, events, starting_time, end_time)
+        except Exception as error:
+            if self.store is None or not is_transient_error(error):
+                raise
+            return self.store.get_events(api, starting_time, end_time)  # the snapshot, with its banner
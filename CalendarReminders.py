@@ -0,0 +1,152 @@
+# Reminder daemon, firing the reminders of the cached events when they are due instead of only listing them.
+# Every reminder (start of its event minus its minutes) sits in a min-heap keyed by fire time, so the daemon
+# sleeps until the earliest one, and firing or adding a reminder costs O(log n) however many are tracked.
+# It listens to the EventStore: each incremental sync pushes the new reminders of the changed events, and the
+# entries of their old reminders are dropped when they reach the top of the heap.
+import datetime
+import heapq
+import itertools
+import threading
+import Calendar
+from CalendarModel import DEFAULT_REMINDER, Event
+from CalendarOffline import is_transient_error
+from CalendarStore import EventStore
+
+# Seconds between incremental syncs picking up new, changed and deleted events
+SYNC_INTERVAL = 300
+
+
+def print_reminder(event, reminder):
+    print(event.title + "," + event.start_text + ": " + reminder.describe(), flush=True)
+
+
+class ReminderScheduler:
+    """
+    Calls notify(event, reminder) (a CalendarModel Event and Reminder) once for every reminder of the store's
+    upcoming events, at its fire time. Reminders whose time passed before load are not fired
+    """
+
+    def __init__(self, store, notify=print_reminder, clock=None):
+        self.store = store
+        self.notify = notify
+        self.clock = Calendar.clock if clock is None else clock
+        self.loaded = False
+        self.heap = []  # (fire time, sequence, event id, version, Event, Reminder)
+        self.versions = {}  # event id -> version of its entries still valid, older entries are stale
+        self.scheduled = {}  # event id -> number of entries of the current version
+        self.stale = 0
+        self.sequence = itertools.count()  # keeps entries of equal fire time apart without comparing events
+        self.fired_until = None
+        store.listeners.append(self)
+
+    def now(self):
+        return self.clock.now().replace(tzinfo=datetime.timezone.utc).timestamp()
+
+    def entries(self, event):
+        event = Event.decode(event)
+        version = self.versions[event.id] = self.versions.get(event.id, 0) + 1
+        start = event.start.timestamp()
+        reminders = [DEFAULT_REMINDER] if event.use_default else event.reminders
+        entries = [(start - reminder.minutes * 60, next(self.sequence), event.id, version, event, reminder)
+                   for reminder in reminders]
+        entries = [entry for entry in entries if entry[0] > self.fired_until]
+        self.scheduled[event.id] = len(entries)
+        return entries
+
+    def load(self):
+        """
+        Schedule the reminders of every upcoming event of the store, heapified in one go
+        """
+        self.fired_until = self.now()
+        self.heap = []
+        self.versions = {}
+        self.scheduled = {}
+        self.stale = 0
+        for event in self.store.query(self.clock.timestamp()):
+            self.heap.extend(self.entries(event))
+        heapq.heapify(self.heap)
+        self.loaded = True
+
+    def apply(self, event):
+        """
+        Called by the store for every event it receives from the API
+        """
+        if not self.loaded:
+            return  # load() will read it from the store
+        self.stale += self.scheduled.pop(event['id'], 0)
+        if event.get('status') == 'cancelled':
+            self.versions[event['id']] = self.versions.get(event['id'], 0) + 1
+        else:
+            for entry in self.entries(event):
+                heapq.heappush(self.heap, entry)
+        if self.stale > len(self.heap) // 2:
+            self.compact()
+
+    def clear(self):
+        self.loaded = False
+        self.heap = []
+
+    def compact(self):
+        """
+        Drop the stale entries of changed and deleted events, so they cannot outgrow the live ones
+        """
+        self.heap = [entry for entry in self.heap if self.versions.get(entry[2]) == entry[3]]
+        heapq.heapify(self.heap)
+        self.stale = 0
+
+    def next_fire_time(self):
+        while self.heap and self.versions.get(self.heap[0][2]) != self.heap[0][3]:
+            heapq.heappop(self.heap)
+            self.stale -= 1
+        return self.heap[0][0] if self.heap else None
+
+    def fire_due(self):
+        """
+        Notify every reminder due by now, in fire time order. Returns how many were fired
+        """
+        now = self.now()
+        fired = 0
+        while self.next_fire_time() is not None and self.heap[0][0] <= now:
+            fire_time, sequence, event_id, version, event, reminder = heapq.heappop(self.heap)
+            self.scheduled[event_id] -= 1
+            self.notify(event, reminder)
+            fired += 1
+        self.fired_until = now
+        return fired
+
+    def run(self, api, stop=None, sync_interval=SYNC_INTERVAL):
+        """
+        Fire reminders until stop (a threading.Event) is set, syncing the store every sync_interval seconds.
+        In between it sleeps until the next reminder or sync, so an idle daemon takes no CPU. A sync which fails
+        because the API cannot be reached, or is busy, is tried again at the next interval, the reminders
+        already known still firing in the meantime
+        """
+        stop = threading.Event() if stop is None else stop
+        next_sync = self.now()
+        while not stop.is_set():
+            if self.now() >= next_sync:
+                try:
+                    self.store.sync(api)
+                except Exception as error:
+                    if not is_transient_error(error):
+                        raise
+                if not self.loaded:  # first run, or the store started over as its sync token expired
+                    self.load()
+                next_sync = self.now() + sync_interval
+            self.fire_due()
+            deadline = next_sync
+            if self.next_fire_time() is not None:
+                deadline = min(deadline, self.next_fire_time())
+            stop.wait(max(0.0, deadline - self.now()))
+
+
+def main():
+    scheduler = ReminderScheduler(EventStore())
+    try:
+        scheduler.run(Calendar.LazyCalendarApi())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":  # Prevents main() from being called by the test suite runner
+    main()
@@ -0,0 +1,129 @@
+# Local full text search over the events of the EventStore, so searches are answered without a round trip.
+# The inverted index maps every word of the summary, description, location and attendee emails to the events
+# (and fields) containing it. It is kept up to date by the store's incremental sync.
+import bisect
+import re
+from CalendarModel import Event
+
+FIELDS = ('summary', 'description', 'location', 'attendees')
+
+
+def tokenize(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def field_texts(event):
+    """
+    Yield (field, text) for every searchable text of a CalendarModel.Event
+    """
+    for field in FIELDS[:3]:
+        if getattr(event, field):
+            yield field, getattr(event, field)
+    for email in event.attendees or ():
+        if email:
+            yield 'attendees', email
+
+
+class SearchIndex:
+    """
+    Inverted index over the events of an EventStore. It is built from the store on the first search, after
+    that the store hands every event it syncs (see EventStore.apply) to the index.
+    Every word of a query must match (AND), and each one matches the words it is a prefix of.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.built = False
+        self.postings = {}  # word -> {event id: fields containing the word}
+        self.vocabulary = []  # sorted words, for prefix lookups
+        self.events = {}  # event id -> Event, decoded once when indexed
+        self.words = {}  # event id -> words of the event, to remove it again
+        store.listeners.append(self)
+
+    def build(self):
+        self.clear()
+        self.built = True
+        for event in self.store.query():
+            self.add(event)
+
+    def clear(self):
+        self.postings = {}
+        self.vocabulary = []
+        self.events = {}
+        self.words = {}
+
+    def apply(self, event):
+        """
+        Called by the store for every event it receives from the API
+        """
+        if not self.built:
+            return  # build() will read it from the store
+        self.remove(event['id'])
+        if event.get('status') != 'cancelled':
+            self.add(event)
+
+    def add(self, event):
+        event = Event.decode(event)
+        words = set()
+        for field, text in field_texts(event):
+            for word in tokenize(text):
+                if word not in self.postings:
+                    self.postings[word] = {}
+                    bisect.insort(self.vocabulary, word)
+                self.postings[word].setdefault(event.id, set()).add(field)
+                words.add(word)
+        self.events[event.id] = event
+        self.words[event.id] = words
+        event.start  # parsed while indexing rather than on the first search, results are sorted by it
+
+    def remove(self, event_id):
+        for word in self.words.pop(event_id, ()):
+            postings = self.postings[word]
+            del postings[event_id]
+            if not postings:
+                del self.postings[word]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, word)]
+        self.events.pop(event_id, None)
+
+    def prefix_words(self, term):
+        """
+        Words of the index starting with term
+        """
+        position = bisect.bisect_left(self.vocabulary, term)
+        end = position
+        while end < len(self.vocabulary) and self.vocabulary[end].startswith(term):
+            end += 1
+        return self.vocabulary[position:end]
+
+    def search(self, query):
+        """
+        List of (Event, matched fields) for the events matching every word of the query, ordered by start time
+        """
+        if not self.built:
+            self.build()
+        terms = [self.prefix_words(term) for term in tokenize(query)]
+        if not terms:
+            return []
+        # intersect the event ids of the rarest terms first, fields are only collected for the events left
+        terms.sort(key=lambda words: sum(len(self.postings[word]) for word in words))
+        matched = None
+        for words in terms:
+            event_ids = set().union(*(self.postings[word] for word in words))
+            matched = event_ids if matched is None else matched & event_ids
+            if not matched:
+                return []
+        matched_words = set().union(*terms)
+        results = []
+        for event_id in sorted(matched, key=lambda event_id: self.events[event_id].start):
+            fields = set()
+            for word in self.words[event_id] & matched_words:
+                fields.update(self.postings[word][event_id])
+            results.append((self.events[event_id], sorted(fields, key=FIELDS.index)))
+        return results
+
+    def get_events(self, api, query):
+        """
+        Bring the store up to date with a (small) delta request, then search locally
+        """
+        self.store.sync(api)
+        return [event for event, fields in self.search(query)]
@@ -0,0 +1,126 @@
+# Local copy of the primary calendar, kept up to date through the incremental sync of the Google Calendar API.
+# https://developers.google.com/calendar/v3/sync
+import datetime
+import json
+import re
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id TEXT PRIMARY KEY,
+    start TEXT,
+    end TEXT,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_start ON events (start);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def utc_key(timestamp):
+    """
+    Normalise an RFC3339 timestamp (or an all day YYYY-MM-DD date) into a UTC string which sorts chronologically
+    """
+    if timestamp is None:
+        return None
+    if len(timestamp) == 10:  # all day events only carry a date
+        return timestamp + "T00:00:00Z"
+    timestamp = re.sub(r'\.\d+', '', timestamp).replace('Z', '+00:00')  # fromisoformat is picky about fractions
+    parsed = datetime.datetime.fromisoformat(timestamp)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc)
+    return parsed.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class EventStore:
+    """
+    SQLite backed store of events. The first sync downloads every event, after that only the events
+    changed or deleted since the last sync are requested using the syncToken.
+    """
+
+    def __init__(self, path='events.sqlite', page_size=2500):
+        # The GUI syncs from a background thread, never from two threads at the same time
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.page_size = page_size
+        self.connection.executescript(SCHEMA)
+        self.listeners = []  # indexes over the events (e.g. CalendarSearch.SearchIndex), told of every change
+
+    def get_sync_token(self):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'syncToken'").fetchone()
+        return row[0] if row else None
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM events")
+            self.connection.execute("DELETE FROM meta")
+        for listener in self.listeners:
+            listener.clear()
+
+    def sync(self, api):
+        try:
+            self._pull(api, self.get_sync_token())
+        except Exception as error:
+            from googleapiclient.errors import HttpError  # deferred, see get_calendar_api in Calendar.py
+            if not isinstance(error, HttpError) or error.resp.status != 410:
+                raise
+            # 410 Gone means the sync token expired, so start over with a full sync
+            self.clear()
+            self._pull(api, None)
+
+    def _pull(self, api, sync_token):
+        page_token = None
+        while True:
+            events_result = api.events().list(calendarId='primary', singleEvents=True, syncToken=sync_token,
+                                              pageToken=page_token, maxResults=self.page_size).execute()
+            with self.connection:
+                for event in events_result.get('items', []):
+                    self.apply(event)
+            if 'nextPageToken' not in events_result:  # last page carries the token for the next sync
+                break
+            page_token = events_result['nextPageToken']
+
+        if events_result.get('nextSyncToken') is not None:
+            with self.connection:
+                self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('syncToken', ?)",
+                                        (events_result['nextSyncToken'],))
+
+    def apply(self, event):
+        """
+        Insert, update or delete (for cancelled events) a single event received from the API
+        """
+        for listener in self.listeners:
+            listener.apply(event)
+        if event.get('status') == 'cancelled':
+            self.connection.execute("DELETE FROM events WHERE id = ?", (event['id'],))
+            return
+        start = event['start'].get('dateTime', event['start'].get('date'))
+        end = event.get('end', event['start'])
+        end = end.get('dateTime', end.get('date'))
+        self.connection.execute("INSERT OR REPLACE INTO events (id, start, end, body) VALUES (?, ?, ?, ?)",
+                                (event['id'], utc_key(start), utc_key(end), json.dumps(event)))
+
+    def query(self, starting_time=None, end_time=None):
+        """
+        Yield stored events overlapping the window ordered by start time, same semantics as timeMin/timeMax
+        """
+        sql = "SELECT body FROM events WHERE 1 = 1"
+        params = []
+        if starting_time is not None:
+            sql += " AND end > ?"
+            params.append(utc_key(starting_time))
+        if end_time is not None:
+            sql += " AND start < ?"
+            params.append(utc_key(end_time))
+        sql += " ORDER BY start"
+        for row in self.connection.execute(sql, params):
+            yield json.loads(row[0])
+
+    def get_events(self, api, starting_time=None, end_time=None):
+        """
+        Bring the store up to date with a (small) delta request, then answer the query locally
+        """
+        self.sync(api)
+        return self.query(starting_time, end_time)
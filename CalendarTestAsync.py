@@ -0,0 +1,167 @@
+import asyncio
+import unittest
+import time
+from unittest.mock import Mock, patch
+import CalendarAsync
+
+# NOTE: ALL THE TESTS HERE ARE FOR THE ASYNC QUERY FUNCTIONS IN CalendarAsync.py
+# Test Strategy : Branch Coverage
+
+
+class FakeClient:
+    # Stands in for AsyncCalendarClient, answering list() with the given pages in order
+    def __init__(self, pages, delay=0):
+        self.pages = list(pages)
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def list(self, **query):
+        self.calls.append(query)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return self.pages.pop(0) if self.pages else {}
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class CalendarTestAsync(unittest.TestCase):
+
+    def test_upcoming_events_invalid_date(self):
+        with self.assertRaises(ValueError):
+            run(CalendarAsync.get_upcoming_events(FakeClient([]), "January 1 2020"))
+
+    def test_upcoming_events_multiple_pages(self):
+        client = FakeClient([
+            {"items": [{"summary": "first", "start": {"dateTime": "2020-10-03T02:00:00Z"}}], "nextPageToken": "2"},
+            {"items": [{"summary": "second", "start": {"date": "2020-10-04"}}]},
+        ])
+        result = run(CalendarAsync.get_upcoming_events(client, "2020-10-03T00:00:00.000000Z"))
+        self.assertEqual(result, "first,2020-10-03T02:00:00Z\nsecond,2020-10-04\n")
+        self.assertEqual([call["pageToken"] for call in client.calls], [None, "2"])
+
+    def test_past_reminders_end_before_start(self):
+        with self.assertRaises(ValueError):
+            run(CalendarAsync.get_past_reminders(FakeClient([]), "2020-10-15T00:00:00Z", "2020-10-03T00:00:00Z"))
+
+    def test_past_reminders(self):
+        client = FakeClient([{"items": [{"summary": "test", "start": {"dateTime": "2020-10-05T02:00:00Z"},
+                                         "reminders": {"useDefault": True}}]}])
+        result = run(CalendarAsync.get_past_reminders(client, "2020-10-03T00:00:00Z", "2020-10-15T00:00:00Z"))
+        self.assertEqual(result, "test,Reminder through popup 10 minutes before event starts\n")
+
+    def test_searched_events_invalid_query(self):
+        with self.assertRaises(TypeError):
+            run(CalendarAsync.get_searched_events(FakeClient([]), None))
+        with self.assertRaises(ValueError):
+            run(CalendarAsync.get_searched_reminders(FakeClient([]), "  "))
+
+    def test_queries_run_concurrently(self):
+        # Many queries on one event loop overlap instead of waiting for each other
+        client = FakeClient([], delay=0.01)
+
+        async def many_queries():
+            return await asyncio.gather(*[CalendarAsync.get_searched_events(client, "user%d" % i)
+                                          for i in range(20)])
+
+        self.assertEqual(run(many_queries()), [""] * 20)
+        self.assertEqual(client.max_in_flight, 20)
+
+    def test_client_request_parameters(self):
+        # None values are dropped and booleans are sent the way the REST API expects
+        class FakeResponse:
+            status = 200
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc_info):
+                return False
+
+            async def json(self):
+                return {"items": []}
+
+        session = Mock()
+        session.get.return_value = FakeResponse()
+        credentials = Mock(valid=True)
+        client = CalendarAsync.AsyncCalendarClient(credentials, session=session)
+        self.assertEqual(run(client.list(singleEvents=True, q=None, maxResults=10)), {"items": []})
+        self.assertEqual(session.get.call_args[1]["params"], {"singleEvents": "true", "maxResults": 10})
+        self.assertEqual(credentials.apply.call_count, 1)
+        self.assertEqual(session.get.call_args[0][0], CalendarAsync.EVENTS_URL.format(calendar_id="primary"))
+        session.get.return_value = FakeResponse()
+        run(client.list(calendarId="en.australian#holiday@group.v.calendar.google.com"))
+        self.assertEqual(session.get.call_args[0][0], "https://www.googleapis.com/calendar/v3/calendars/"
+                                                      "en.australian%23holiday%40group.v.calendar.google.com/events")
+
+    def test_client_error_status(self):
+        class FakeResponse:
+            status = 403
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc_info):
+                return False
+
+            async def text(self):
+                return "Rate Limit Exceeded"
+
+        session = Mock()
+        session.get.return_value = FakeResponse()
+        client = CalendarAsync.AsyncCalendarClient(Mock(valid=True), session=session)
+        with self.assertRaises(CalendarAsync.AsyncCalendarError) as raised:
+            run(client.list())
+        self.assertEqual(raised.exception.status, 403)
+
+    def test_credentials_loaded_once(self):
+        # concurrent first queries wait for the one load of the credentials, and likewise for a refresh
+        class FakeResponse:
+            status = 200
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc_info):
+                return False
+
+            async def json(self):
+                return {"items": []}
+
+        def load():
+            time.sleep(0.05)  # reading the token file, let the other queries catch up
+            return credentials
+
+        def refresh(request):
+            time.sleep(0.05)
+            credentials.valid = True
+
+        async def gather(client):
+            return await asyncio.gather(*[client.list() for _ in range(10)])
+
+        session = Mock()
+        session.get.side_effect = lambda *args, **kwargs: FakeResponse()
+        credentials = Mock(valid=True)
+        client = CalendarAsync.AsyncCalendarClient(session=session)
+        with patch("Calendar.get_credentials", side_effect=load) as get_credentials:
+            self.assertEqual(run(gather(client)), [{"items": []}] * 10)
+        self.assertEqual(get_credentials.call_count, 1)
+        self.assertEqual(credentials.apply.call_count, 10)
+        credentials.valid = False
+        credentials.refresh.side_effect = refresh
+        run(gather(client))
+        self.assertEqual(credentials.refresh.call_count, 1)
+
+
+def main():
+    suite = unittest.TestLoader().loadTestsFromTestCase(CalendarTestAsync)
+    # This will run the test suite.
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+main()
@@ -0,0 +1,109 @@
+import unittest
+from unittest.mock import Mock
+from googleapiclient.errors import HttpError
+import Calendar
+
+# NOTE: ALL THE TESTS HERE ARE FOR THE delete_events_bulk AND delete_reminders_bulk METHODS IN Calendar.py
+# Test Strategy : Branch Coverage
+
+
+class FakeBatch:
+    # Stands in for BatchHttpRequest, failures maps a request id to the statuses returned on each attempt
+    def __init__(self, callback, failures, sizes):
+        self.callback = callback
+        self.failures = failures
+        self.sizes = sizes
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append(request_id)
+
+    def execute(self):
+        self.sizes.append(len(self.requests))
+        for request_id in self.requests:
+            statuses = self.failures.get(request_id, [])
+            if statuses:
+                self.callback(request_id, None, HttpError(Mock(status=statuses.pop(0)), b"Error"))
+            else:
+                self.callback(request_id, {}, None)
+
+
+def make_api(failures=None):
+    api = Mock()
+    api.sizes = []
+    api.new_batch_http_request.side_effect = lambda callback: FakeBatch(callback, failures or {}, api.sizes)
+    return api
+
+
+class CalendarTestDeleteEventsBulk(unittest.TestCase):
+
+    def test_none_event(self):
+        with self.assertRaises(TypeError):
+            Calendar.delete_events_bulk(make_api(), [None])
+
+    def test_empty_event_id(self):
+        with self.assertRaises(ValueError):
+            Calendar.delete_events_bulk(make_api(), [{}])
+
+    def test_no_events_or_query(self):
+        with self.assertRaises(TypeError):
+            Calendar.delete_events_bulk(make_api())
+
+    def test_events_sent_in_chunks(self):
+        # 120 deletes go out as batches of 50, 50 and 20
+        api = make_api()
+        events = [{"id": "event%d" % i} for i in range(120)]
+        results = Calendar.delete_events_bulk(api, events)
+        self.assertEqual(api.sizes, [50, 50, 20])
+        self.assertEqual(api.events.return_value.delete.call_count, 120)
+        self.assertEqual(len(results), 120)
+        self.assertTrue(all(result is None for result in results.values()))
+
+    def test_only_failed_requests_retried(self):
+        # event1 fails once with 503 and is the only one sent again, event2 fails with 404 and is not retried
+        api = make_api({"event1": [503], "event2": [404]})
+        events = [{"id": "event0"}, {"id": "event1"}, {"id": "event2"}]
+        results = Calendar.delete_events_bulk(api, events, backoff=0)
+        self.assertEqual(api.sizes, [3, 1])
+        self.assertIsNone(results["event0"])
+        self.assertIsNone(results["event1"])
+        self.assertEqual(results["event2"].resp.status, 404)
+
+    def test_retries_exhausted(self):
+        api = make_api({"event0": [503, 503, 503]})
+        results = Calendar.delete_events_bulk(api, [{"id": "event0"}], retries=2, backoff=0)
+        self.assertEqual(api.sizes, [1, 1, 1])
+        self.assertEqual(results["event0"].resp.status, 503)
+
+    def test_events_selected_by_query(self):
+        # Events to delete are listed through the search query first
+        api = make_api()
+        api.events.return_value.list.return_value.execute.return_value = {
+            "items": [{"id": "event0"}, {"id": "event1"}]
+        }
+        results = Calendar.delete_events_bulk(api, query="Exam")
+        self.assertEqual(api.events.return_value.list.call_args[1]["q"], "Exam")
+        self.assertEqual(sorted(results), ["event0", "event1"])
+
+    def test_reminders_cleared(self):
+        api = make_api()
+        events = [
+            {"id": "event0", "reminders": {"useDefault": True, "overrides": []}},
+            {"id": "event1", "reminders": {"useDefault": False, "overrides": [{'method': 'email', 'minutes': 1}]}},
+        ]
+        results = Calendar.delete_reminders_bulk(api, events)
+        self.assertEqual(api.events.return_value.patch.call_count, 2)
+        self.assertEqual(api.events.return_value.patch.call_args[1]["body"],
+                         {"reminders": {"useDefault": False, "overrides": []}})
+        for event in events:
+            self.assertEqual(event["reminders"], {"useDefault": False, "overrides": []})
+        self.assertTrue(all(result is None for result in results.values()))
+
+
+def main():
+    suite = unittest.TestLoader().loadTestsFromTestCase(CalendarTestDeleteEventsBulk)
+    # This will run the test suite.
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+main()
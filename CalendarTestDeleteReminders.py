@@ -48,7 +48,7 @@ class CalendarTestDeleteReminders(unittest.TestCase):
         }
 
         api = Mock()
-        api.events.return_value.update.return_value.execute.return_value = {
+        api.events.return_value.patch.return_value.execute.return_value = {
             'id': "test123",
             'reminders': {"useDefault": False, "overrides": [
                 {'method': 'email', 'minutes': 1}
@@ -57,7 +57,10 @@ class CalendarTestDeleteReminders(unittest.TestCase):
         }
 
         result = Calendar.delete_reminders(api, event, 1)
-        self.assertEqual(api.events.return_value.update.return_value.execute.call_count, 1)
+        self.assertEqual(api.events.return_value.patch.return_value.execute.call_count, 1)
+        # only the reminders are sent
+        api.events.return_value.patch.assert_called_once_with(calendarId='primary', eventId="test123", body={
+            'reminders': {"useDefault": False, "overrides": [{'method': 'email', 'minutes': 1}]}})
         self.assertTrue(result)
 
     def test_reminder_deleted_default(self):
@@ -67,14 +70,16 @@ class CalendarTestDeleteReminders(unittest.TestCase):
         }
 
         api = Mock()
-        api.events.return_value.update.return_value.execute.return_value = {
+        api.events.return_value.patch.return_value.execute.return_value = {
             'id': "test123",
             'reminders': {"useDefault": False, "overrides": []},
             'updated': "2020-10-10T23:20:50.52Z"
         }
 
         result = Calendar.delete_reminders(api, event)
-        self.assertEqual(api.events.return_value.update.return_value.execute.call_count, 1)
+        self.assertEqual(api.events.return_value.patch.return_value.execute.call_count, 1)
+        self.assertEqual(api.events.return_value.patch.call_args[1]["body"],
+                         {'reminders': {"useDefault": False, "overrides": []}})
         self.assertTrue(result)
 
 
@@ -0,0 +1,104 @@
+import datetime
+import json
+import tracemalloc
+import unittest
+import Calendar
+import CalendarModel
+
+# NOTE: ALL THE TESTS HERE ARE FOR THE Event AND Reminder MODEL IN CalendarModel.py
+# Test Strategy : Branch Coverage
+
+EVENT = {
+    "id": "1",
+    "summary": "FIT2107 Lecture",
+    "status": "confirmed",
+    "visibility": "private",
+    "created": "2020-09-30T01:00:00.000Z",
+    "creator": {"email": "alice@monash.edu", "self": True},
+    "location": "Clayton campus",
+    "attendees": [{"email": "alice@monash.edu", "responseStatus": "accepted"}, {"email": "bob@monash.edu"}],
+    "start": {"dateTime": "2020-10-05T13:00:00.000000+11:00", "timeZone": "Australia/Melbourne"},
+    "end": {"dateTime": "2020-10-05T15:00:00+11:00", "timeZone": "Australia/Melbourne"},
+    "reminders": {"useDefault": False, "overrides": [{"method": "email", "minutes": 1440},
+                                                      {"method": "popup", "minutes": 10}]},
+    "etag": "\"3198765432100000\"",
+    "htmlLink": "https://www.google.com/calendar/event?eid=MQ",
+    "iCalUID": "1@google.com",
+}
+
+
+class CalendarTestEventModel(unittest.TestCase):
+
+    def test_decode_fields(self):
+        event = CalendarModel.Event.decode(EVENT)
+        self.assertEqual(event.id, "1")
+        self.assertEqual(event.title, "FIT2107 Lecture")
+        self.assertEqual(event.creator, "alice@monash.edu")
+        self.assertEqual(event.attendees, ("alice@monash.edu", "bob@monash.edu"))
+        self.assertEqual(event.start_text, "2020-10-05T13:00:00.000000+11:00")
+        self.assertFalse(event.use_default)
+        self.assertEqual([(reminder.method, reminder.minutes) for reminder in event.reminders],
+                         [("email", 1440), ("popup", 10)])
+        self.assertIs(CalendarModel.Event.decode(event), event)
+
+    def test_decode_partial_event(self):
+        # list requests with a field mask only return some of the fields
+        event = CalendarModel.Event.decode({"summary": "test", "start": {"date": "2020-10-05"}})
+        self.assertIsNone(event.end_text)
+        self.assertIsNone(event.end)
+        self.assertIsNone(event.attendees)
+        self.assertEqual(event.reminder_texts(), [])
+        self.assertEqual(CalendarModel.Event.decode({}).title, "No title")
+        with self.assertRaises(AttributeError):
+            CalendarModel.Event.decode("not an event")
+
+    def test_times_parsed_once_into_utc(self):
+        event = CalendarModel.Event.decode(EVENT)
+        utc = datetime.timezone.utc
+        self.assertEqual(event.start, datetime.datetime(2020, 10, 5, 2, 0, tzinfo=utc))
+        self.assertIs(event.start, event.start)
+        self.assertEqual(event.end, datetime.datetime(2020, 10, 5, 4, 0, tzinfo=utc))
+        self.assertEqual(CalendarModel.parse_time("2020-10-05"), datetime.datetime(2020, 10, 5, tzinfo=utc))
+        self.assertEqual(CalendarModel.parse_time("2020-10-05T02:00:00"), datetime.datetime(2020, 10, 5, 2, tzinfo=utc))
+
+    def test_reminder_texts(self):
+        self.assertEqual(CalendarModel.Event.decode(EVENT).reminder_texts(),
+                         ["Reminder through email 1440 minutes before event starts",
+                          "Reminder through popup 10 minutes before event starts"])
+        default = CalendarModel.Event.decode({"reminders": {"useDefault": True}})
+        self.assertEqual(default.reminder_texts(), ["Reminder through popup 10 minutes before event starts"])
+
+    def test_formatters_read_raw_and_decoded_events_alike(self):
+        # raw events take the path which skips decoding
+        events = [EVENT, {"start": {"date": "2020-10-06"}, "reminders": {"useDefault": True}}]
+        decoded = [CalendarModel.Event.decode(event) for event in events]
+        self.assertEqual(Calendar.format_events(events), Calendar.format_events(decoded))
+        self.assertEqual(Calendar.format_events(events),
+                         "FIT2107 Lecture,2020-10-05T13:00:00.000000+11:00\nNo title,2020-10-06\n")
+        self.assertEqual(Calendar.format_reminders(events), Calendar.format_reminders(decoded))
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            CalendarModel.Event.decode(EVENT).colour = "red"
+
+    def test_smaller_than_json(self):
+        text = json.dumps([dict(EVENT, id=str(i)) for i in range(2000)])
+        tracemalloc.start()
+        raw = json.loads(text)
+        raw_size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        tracemalloc.start()
+        decoded = [CalendarModel.Event.decode(event) for event in json.loads(text)]  # the JSON is freed as we go
+        decoded_size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        self.assertEqual(len(raw), len(decoded))
+        self.assertLess(decoded_size, raw_size / 2)
+
+
+def main():
+    suite = unittest.TestLoader().loadTestsFromTestCase(CalendarTestEventModel)
+    # This will run the test suite.
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+main()
@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import Mock
+from googleapiclient.errors import HttpError
+import Calendar
+from CalendarTestFixtures import make_event, make_store
+
+# NOTE: ALL THE TESTS HERE ARE FOR THE EventStore CLASS IN CalendarStore.py
+# Test Strategy : Branch Coverage
+
+
+class CalendarTestEventStore(unittest.TestCase):
+
+    def test_first_sync_is_full_and_saves_sync_token(self):
+        # No sync token stored yet so a full sync happens, following every page
+        store, api = make_store(
+            {"items": [make_event("1", "first", "2020-10-03T02:00:00Z", "2020-10-03T03:00:00Z")],
+             "nextPageToken": "page2"},
+            {"items": [make_event("2", "second", "2020-10-04T02:00:00Z", "2020-10-04T03:00:00Z")],
+             "nextSyncToken": "sync1"})
+        store.sync(api)
+        self.assertEqual(api.events.return_value.list.return_value.execute.call_count, 2)
+        self.assertIsNone(api.events.return_value.list.call_args_list[0][1]["syncToken"])
+        self.assertEqual(store.get_sync_token(), "sync1")
+        self.assertEqual([event["summary"] for event in store.query()], ["first", "second"])
+
+    def test_incremental_sync_applies_changes_and_deletions(self):
+        # Second sync sends the stored token and applies updated and cancelled events
+        store, api = make_store(
+            {"items": [make_event("1", "first", "2020-10-03T02:00:00Z", "2020-10-03T03:00:00Z"),
+                       make_event("2", "second", "2020-10-04T02:00:00Z", "2020-10-04T03:00:00Z")],
+             "nextSyncToken": "sync1"},
+            {"items": [{"id": "1", "status": "cancelled"},
+                       make_event("2", "renamed", "2020-10-04T02:00:00Z", "2020-10-04T03:00:00Z")],
+             "nextSyncToken": "sync2"})
+        store.sync(api)
+        store.sync(api)
+        self.assertEqual(api.events.return_value.list.call_args_list[-1][1]["syncToken"], "sync1")
+        self.assertEqual(store.get_sync_token(), "sync2")
+        self.assertEqual([event["summary"] for event in store.query()], ["renamed"])
+
+    def test_expired_sync_token_falls_back_to_full_sync(self):
+        # A 410 response wipes the store and starts a new full sync
+        store, api = make_store(
+            {"items": [make_event("1", "stale", "2020-10-03T02:00:00Z", "2020-10-03T03:00:00Z")],
+             "nextSyncToken": "sync1"},
+            HttpError(Mock(status=410), b"Gone"),
+            {"items": [make_event("2", "fresh", "2020-10-04T02:00:00Z", "2020-10-04T03:00:00Z")],
+             "nextSyncToken": "sync2"})
+        store.sync(api)
+        store.sync(api)
+        self.assertIsNone(api.events.return_value.list.call_args_list[-1][1]["syncToken"])
+        self.assertEqual([event["summary"] for event in store.query()], ["fresh"])
+
+    def test_other_http_errors_are_raised(self):
+        store, api = make_store(HttpError(Mock(status=500), b"Error"))
+        with self.assertRaises(HttpError):
+            store.sync(api)
+
+    def test_query_window_includes_overlapping_events(self):
+        # Events overlapping the window boundaries are returned, like timeMin/timeMax on the API
+        store, api = make_store({
+            "items": [make_event("1", "before", "2020-09-01T02:00:00Z", "2020-09-01T03:00:00Z"),
+                      make_event("2", "overlapping", "2020-09-30T23:00:00Z", "2020-10-01T01:00:00Z"),
+                      make_event("3", "inside", "2020-10-10T10:00:00+11:00", "2020-10-10T11:00:00+11:00"),
+                      make_event("4", "after", "2020-11-01T02:00:00Z", "2020-11-01T03:00:00Z")],
+            "nextSyncToken": "sync1"})
+        past_events = Calendar.get_past_events(api, "2020-10-01T00:00:00.000000Z", "2020-10-31T23:59:59Z", store)
+        self.assertEqual(past_events, "overlapping,2020-09-30T23:00:00Z\ninside,2020-10-10T10:00:00+11:00\n")
+
+
+def main():
+    suite = unittest.TestLoader().loadTestsFromTestCase(CalendarTestEventStore)
+    # This will run the test suite.
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+main()
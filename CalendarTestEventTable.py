@@ -0,0 +1,98 @@
+import datetime
+import unittest
+import CalendarColumns
+import CalendarModel
+from CalendarTestFixtures import make_api, make_event
+
+# NOTE: ALL THE TESTS HERE ARE FOR THE COLUMNAR EventTable IN CalendarColumns.py
+# Test Strategy : Branch Coverage
+
+
+EVENTS = [
+    make_event("1", "Lecture", "2020-10-05T02:00:00Z", "2020-10-05T04:00:00Z"),
+    make_event("2", "Lab", "2020-10-05T05:00:00Z", "2020-10-05T06:30:00Z"),
+    # a conference spanning three days
+    make_event("3", "Conference", "2020-10-06T22:00:00Z", "2020-10-09T06:00:00Z"),
+    make_event("4", "Lecture", "2020-10-12T02:00:00Z", "2020-10-12T04:00:00Z"),
+    {"id": "5", "summary": "Public holiday", "start": {"date": "2020-11-03"}, "end": {"date": "2020-11-04"}},
+]
+
+UTC = datetime.timezone.utc
+
+
+class CalendarTestEventTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = CalendarColumns.EventTable.from_events(EVENTS)
+
+    def test_columns_and_interned_summaries(self):
+        self.assertEqual(len(self.table), 5)
+        self.assertEqual(self.table.summaries, ["Lecture", "Lab", "Conference", "Public holiday"])
+        self.assertEqual(list(self.table.summary_codes), [0, 1, 2, 0, 3])
+        self.assertEqual(self.table.starts.typecode, "d")
+        self.assertEqual(self.table.row(4), (datetime.datetime(2020, 11, 3, tzinfo=UTC),
+                                             datetime.datetime(2020, 11, 4, tzinfo=UTC), "Public holiday",
+                                             "primary"))
+
+    def test_rows_sorted_by_start(self):
+        table = CalendarColumns.EventTable.from_events(reversed(EVENTS))
+        self.assertEqual(list(table.starts), sorted(table.starts))
+        self.assertEqual(table.row(0)[2], "Lecture")
+
+    def test_between_includes_events_overlapping_the_window(self):
+        window = self.table.between("2020-10-08T00:00:00Z", "2020-10-12T03:00:00Z")
+        self.assertEqual([window.row(i)[2] for i in range(len(window))], ["Conference", "Lecture"])
+        self.assertEqual(len(self.table.between(datetime.datetime(2020, 10, 5, 4, tzinfo=UTC),
+                                                datetime.datetime(2020, 10, 5, 5, tzinfo=UTC))), 0)
+
+    def test_count_by_day_and_month(self):
+        self.assertEqual(self.table.count_by_day(), [(datetime.date(2020, 10, 5), 2), (datetime.date(2020, 10, 6), 1),
+                                                     (datetime.date(2020, 10, 12), 1),
+                                                     (datetime.date(2020, 11, 3), 1)])
+        self.assertEqual(self.table.count_by_month(), [((2020, 10), 4), ((2020, 11), 1)])
+        # the conference starts on the 7th in Melbourne
+        melbourne = datetime.timezone(datetime.timedelta(hours=11))
+        self.assertEqual(self.table.count_by_day(melbourne)[1], (datetime.date(2020, 10, 7), 1))
+
+    def test_count_by_month_across_years(self):
+        table = CalendarColumns.EventTable.from_events([
+            make_event("5", "Party", "2020-12-31T20:00:00Z", "2020-12-31T23:00:00Z"),
+            make_event("6", "Party", "2021-01-01T01:00:00Z", "2021-01-01T02:00:00Z"),
+        ])
+        self.assertEqual(table.count_by_month(), [((2020, 12), 1), ((2021, 1), 1)])
+
+    def test_busy_hours(self):
+        self.assertEqual(self.table.busy_hours(), 2 + 1.5 + 56 + 2 + 24)
+        # only the part of the conference inside the window counts
+        self.assertEqual(self.table.busy_hours("2020-10-09T00:00:00Z", "2020-10-12T03:00:00Z"), 6 + 1)
+
+    def test_for_calendar(self):
+        pairs = [("team", CalendarModel.Event.decode(EVENTS[0])), ("primary", CalendarModel.Event.decode(EVENTS[1])),
+                 ("team", CalendarModel.Event.decode(EVENTS[3]))]
+        table = CalendarColumns.EventTable.from_pairs(pairs)
+        self.assertEqual(table.for_calendar("team").busy_hours(), 4)
+        self.assertEqual(len(table.for_calendar("room")), 0)
+
+    def test_empty_table(self):
+        table = CalendarColumns.EventTable.from_events([])
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.count_by_day(), [])
+        self.assertEqual(table.busy_hours(), 0)
+        self.assertEqual(len(table.between("2020-10-01T00:00:00Z", "2020-10-02T00:00:00Z")), 0)
+
+    def test_get_event_table(self):
+        api = make_api({"items": EVENTS[:2]})
+        table = CalendarColumns.get_event_table(api, "2020-10-01T00:00:00Z", "2020-10-31T00:00:00Z")
+        self.assertEqual(len(table), 2)
+        self.assertEqual(api.events.return_value.list.call_args[1]["fields"], CalendarColumns.TABLE_FIELDS)
+        with self.assertRaises(ValueError):
+            CalendarColumns.get_event_table(api, "2020-10-31T00:00:00Z", "2020-10-01T00:00:00Z")
+
+
+def main():
+    suite = unittest.TestLoader().loadTestsFromTestCase(CalendarTestEventTable)
+    # This will run the test suite.
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+main()
@@ -0,0 +1,33 @@
+# Fixtures shared by the CalendarTest*.py modules: events as events().list returns them, and stores synced from a
+# mocked api. Not a test module itself, so it has no main() and is not run by the CI jobs.
+from unittest.mock import MagicMock
+import CalendarStore
+
+
+def make_event(event_id, summary, start, end=None, minutes=None, **fields):
+    """
+    An event as events().list returns it, lasting no time unless end is given. Its reminders are the default
+    ones, or popups the given minutes before it starts. fields are added to the event or replace the above
+    """
+    reminders = {"useDefault": True} if minutes is None else \
+        {"useDefault": False, "overrides": [{"method": "popup", "minutes": minute} for minute in minutes]}
+    event = {"id": event_id, "summary": summary, "status": "confirmed", "start": {"dateTime": start},
+             "end": {"dateTime": start if end is None else end}, "reminders": reminders}
+    event.update(fields)
+    return event
+
+
+def make_api(*pages):
+    """
+    A mocked api whose events().list requests are answered with pages, one page per request
+    """
+    api = MagicMock()
+    api.events.return_value.list.return_value.execute.side_effect = list(pages)
+    return api
+
+
+def make_store(*pages):
+    """
+    An EventStore in memory, not synced yet, and the api answering its syncs with pages
+    """
+    return CalendarStore.EventStore(":memory:"), make_api(*pages)
@@ -0,0 +1,170 @@
+import datetime
+import random
+import unittest
+from unittest.mock import Mock
+import CalendarFreeBusy
+from CalendarTestFixtures import make_event
+
+# NOTE: ALL THE TESTS HERE ARE FOR THE FREE/BUSY AND CONFLICT DETECTION IN CalendarFreeBusy.py
+# Test Strategy : Branch Coverage, plus random events compared with a minute by minute brute force
+
+
+EVENTS = [
+    make_event("1", "Breakfast", "2020-10-05T07:00:00Z", "2020-10-05T08:00:00Z"),
+    make_event("2", "Lecture", "2020-10-05T09:00:00Z", "2020-10-05T11:00:00Z"),
+    make_event("3", "Meeting", "2020-10-05T10:00:00Z", "2020-10-05T12:00:00Z"),  # overlaps the lecture
+    make_event("4", "Lunch", "2020-10-05T12:00:00Z", "2020-10-05T13:00:00Z"),  # right after, no conflict
+    make_event("5", "Focus time", "2020-10-05T14:00:00Z", "2020-10-05T16:00:00Z", transparency="transparent"),
+    make_event("6", "Moved", "2020-10-05T14:00:00Z", "2020-10-05T16:00:00Z", status="cancelled"),
+    make_event("7", "Deadline", "2020-10-05T15:00:00Z", "2020-10-05T15:00:00Z"),  # lasts no time
+    {"summary": "Unfinished", "start": {"dateTime": "2020-10-05T15:00:00Z"}},
+    make_event("8", "Dinner", "2020-10-05T18:30:00+11:00", "2020-10-05T23:00:00+11:00"),  # 07:30Z to 12:00Z
+]
+
+START, END = "2020-10-05T06:00:00Z", "2020-10-05T18:00:00Z"
+UTC = datetime.timezone.utc
+
+
+def at(hour, minute=0):
+    return datetime.datetime(2020, 10, 5, hour, minute, tzinfo=UTC)
+
+
+def make_api(events, calendars=None):
+    api = Mock()
+    api.events.return_value.list.return_value.execute.return_value = {"items": events}
+    api.freebusy.return_value.query.return_value.execute.return_value = {"calendars": calendars or {}}
+    return api
+
+
+class CalendarTestFreeBusy(unittest.TestCase):
+
+    def test_busy_blocks(self):
+        api = make_api(EVENTS)
+        free_busy = CalendarFreeBusy.get_free_busy(api, START, END)
+        # touching events merge into one block, transparent, cancelled and instant events do not count
+        self.assertEqual(free_busy.busy, [(at(7), at(13))])
+        self.assertEqual(api.freebusy.call_count, 0)
+        self.assertEqual(api.events.return_value.list.call_args[1]["fields"], CalendarFreeBusy.BUSY_FIELDS)
+
+    def test_conflicts(self):
+        free_busy = CalendarFreeBusy.get_free_busy(make_api(EVENTS), START, END)
+        self.assertEqual(len(free_busy.conflicts), 1)
+        start, end, items = free_busy.conflicts[0]
+        self.assertEqual((start, end), (at(7), at(12)))
+        self.assertEqual([event.title for calendar_id, event in items], ["Breakfast", "Dinner", "Lecture", "Meeting"])
+        self.assertEqual({calendar_id for calendar_id, event in items}, {"primary"})
+
+    def test_free_slots(self):
+        free_busy = CalendarFreeBusy.get_free_busy(make_api(EVENTS), START, END)
+        self.assertEqual(free_busy.free_slots(60), [(at(6), at(7)), (at(13), at(18))])
+        self.assertEqual(free_busy.free_slots(61), [(at(13), at(18))])
+        self.assertEqual(free_busy.free_slots(6 * 60), [])
+
+    def test_blocks_cut_to_window(self):
+        free_busy = CalendarFreeBusy.get_free_busy(make_api(EVENTS), "2020-10-05T10:30:00Z", "2020-10-05T12:30:00Z")
+        self.assertEqual(free_busy.busy, [(at(10, 30), at(12, 30))])
+        self.assertEqual(free_busy.free_slots(1), [])
+        empty = CalendarFreeBusy.get_free_busy(make_api([]), START, END)
+        self.assertEqual((empty.busy, empty.conflicts), ([], []))
+        self.assertEqual(empty.free_slots(30), [(at(6), at(18))])
+
+    def test_store_used_when_given(self):
+        store = Mock()
+        store.get_events.return_value = EVENTS[:2]
+        api = make_api([])
+        free_busy = CalendarFreeBusy.get_free_busy(api, START, END, store)
+        store.get_events.assert_called_once_with(api, START, END)
+        self.assertEqual(api.events.return_value.list.call_count, 0)
+        self.assertEqual(free_busy.busy, [(at(7), at(8)), (at(9), at(11))])
+
+    def test_other_calendars_from_freebusy_endpoint(self):
+        calendars = {
+            "team@group.calendar.google.com": {"busy": [{"start": "2020-10-05T16:00:00Z",
+                                                         "end": "2020-10-05T17:00:00Z"},
+                                                        {"start": "2020-10-05T12:30:00Z",
+                                                         "end": "2020-10-05T14:00:00Z"}]},
+            "room@resource.calendar.google.com": {"busy": [], "errors": [{"domain": "global",
+                                                                          "reason": "notFound"}]},
+        }
+        api = make_api(EVENTS[3:4], calendars)
+        free_busy = CalendarFreeBusy.get_free_busy(api, START, END, calendar_ids=["primary"] + list(calendars))
+        body = api.freebusy.return_value.query.call_args[1]["body"]
+        self.assertEqual([item["id"] for item in body["items"]], list(calendars))
+        self.assertEqual(free_busy.busy, [(at(12), at(14)), (at(16), at(17))])
+        # the team calendar is double booked with lunch
+        self.assertEqual([(calendar_id, event and event.title) for calendar_id, event in free_busy.conflicts[0][2]],
+                         [("primary", "Lunch"), ("team@group.calendar.google.com", None)])
+        self.assertEqual(free_busy.errors, {"room@resource.calendar.google.com": ["notFound"]})
+
+    def test_reconcile_primary(self):
+        # the server knows an event the store has not synced yet, the same lunch is not a conflict with itself
+        calendars = {"primary": {"busy": [{"start": "2020-10-05T12:00:00Z", "end": "2020-10-05T13:00:00Z"},
+                                          {"start": "2020-10-05T15:00:00Z", "end": "2020-10-05T16:00:00Z"}]}}
+        api = make_api(EVENTS[3:4], calendars)
+        free_busy = CalendarFreeBusy.get_free_busy(api, START, END, reconcile=True)
+        self.assertEqual(free_busy.busy, [(at(12), at(13)), (at(15), at(16))])
+        self.assertEqual(free_busy.conflicts, [])
+
+    def test_freebusy_requests_batched(self):
+        calendar_ids = ["calendar%d" % number for number in range(120)]
+        api = make_api([])
+        CalendarFreeBusy.get_free_busy(api, START, END, calendar_ids=calendar_ids)
+        self.assertEqual([len(call[1]["body"]["items"]) for call in api.freebusy.return_value.query.call_args_list],
+                         [50, 50, 20])
+
+    def test_invalid_window(self):
+        with self.assertRaises(ValueError):
+            CalendarFreeBusy.get_free_busy(make_api(EVENTS), END, START)
+
+    def test_matches_brute_force(self):
+        generator = random.Random(2107)
+        base = at(0)
+        events = []
+        for number in range(300):
+            start = generator.randint(0, 24 * 60 * 7)
+            events.append(make_event(str(number), str(number), (base + datetime.timedelta(minutes=start)).isoformat(),
+                                     (base + datetime.timedelta(minutes=start + generator.choice([15, 30, 60, 180])))
+                                     .isoformat()))
+        free_busy = CalendarFreeBusy.get_free_busy(make_api(events), base.isoformat(),
+                                                   (base + datetime.timedelta(days=8)).isoformat())
+        # count how many events cover each minute
+        covering = [0] * (24 * 60 * 8)
+        for event in events:
+            start = CalendarFreeBusy.epoch(event["start"]["dateTime"]) - base.timestamp()
+            end = CalendarFreeBusy.epoch(event["end"]["dateTime"]) - base.timestamp()
+            for minute in range(int(start // 60), int(end // 60)):
+                covering[minute] += 1
+        busy = [False] * len(covering)
+        for start, end in free_busy.busy:
+            for minute in range(int((start - base).total_seconds() // 60), int((end - base).total_seconds() // 60)):
+                busy[minute] = True
+        self.assertEqual(busy, [count > 0 for count in covering])
+        conflicted = [False] * len(covering)
+        for start, end, items in free_busy.conflicts:
+            self.assertGreater(len(items), 1)
+            for minute in range(int((start - base).total_seconds() // 60), int((end - base).total_seconds() // 60)):
+                conflicted[minute] = True
+        # every minute with two events at once lies in a conflict
+        for minute, count in enumerate(covering):
+            if count > 1:
+                self.assertTrue(conflicted[minute], minute)
+
+    def test_format_free_busy(self):
+        free_busy = CalendarFreeBusy.get_free_busy(make_api(EVENTS[1:4]), START, END)
+        free_busy.errors = {"room": ["notFound"]}
+        self.assertEqual(CalendarFreeBusy.format_free_busy(free_busy, 120),
+                         "Busy: 2020-10-05T09:00:00+00:00 - 2020-10-05T13:00:00+00:00\n"
+                         "Conflict: primary: Lecture, primary: Meeting "
+                         "(2020-10-05T09:00:00+00:00 - 2020-10-05T12:00:00+00:00)\n"
+                         "Free: 2020-10-05T06:00:00+00:00 - 2020-10-05T09:00:00+00:00\n"
+                         "Free: 2020-10-05T13:00:00+00:00 - 2020-10-05T18:00:00+00:00\n"
+                         "Could not read room: notFound\n")
+
+
+def main():
+    suite = unittest.TestLoader().loadTestsFromTestCase(CalendarTestFreeBusy)
+    # This will run the test suite.
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+main()
@@ -2,6 +2,7 @@ from datetime import datetime
 import unittest
 from unittest.mock import Mock, patch
 import Calendar
+from io import StringIO
 
 # NOTE: ALL THE TESTS HERE ARE FOR THE get_upcoming_events METHOD IN Calendar.py
 # Test Strategy : Branch Coverage
@@ -63,6 +64,79 @@ class CalendarTestGetUpcomingEvents(unittest.TestCase):
             api.events.return_value.list.return_value.execute.call_count, 1)
         self.assertEqual(upcoming_events, "test,2020-10-03T02:00:00.000000Z\n")
 
+    def test_get_upcoming_events_multiple_pages(self):
+        # This test is to test that every page of results is fetched by following nextPageToken
+        ex_time = "2020-10-03T00:00:00.000000Z"
+        api = Mock()
+        api.events.return_value.list.return_value.execute.side_effect = [
+            {
+                "items": [
+                    {
+                        "summary": "first page",
+                        "start": {
+                            "dateTime": "2020-10-03T02:00:00.000000Z"
+                        },
+                    },
+                ],
+                "nextPageToken": "page2"
+            },
+            {
+                "items": [
+                    {
+                        "summary": "second page",
+                        "start": {
+                            "dateTime": "2020-10-04T02:00:00.000000Z"
+                        },
+                    },
+                ]
+            },
+        ]
+        upcoming_events = Calendar.get_upcoming_events(api, ex_time)
+        self.assertEqual(
+            api.events.return_value.list.return_value.execute.call_count, 2)  # One request per page
+        self.assertEqual(upcoming_events,
+                         "first page,2020-10-03T02:00:00.000000Z\nsecond page,2020-10-04T02:00:00.000000Z\n")
+
+    def test_get_upcoming_events_requests_list_fields_only(self):
+        # This test is to test that only the fields of the list view are requested, with the configured page size
+        ex_time = "2020-10-03T00:00:00.000000Z"
+        api = Mock()
+        api.events.return_value.list.return_value.execute.return_value = {}
+        Calendar.get_upcoming_events(api, ex_time)
+        kwargs = api.events.return_value.list.call_args[1]
+        self.assertEqual(kwargs["fields"], Calendar.LIST_FIELDS)
+        self.assertEqual(kwargs["maxResults"], Calendar.PAGE_SIZE)
+        self.assertIn("nextPageToken", Calendar.LIST_FIELDS)
+
+    def test_get_upcoming_events_streamed(self):
+        # This test is to test that each line is written to the stream instead of being returned
+        ex_time = "2020-10-03T00:00:00.000000Z"
+        api = Mock()
+        api.events.return_value.list.return_value.execute.return_value = {
+            "items": [
+                {
+                    "summary": "test",
+                    "start": {
+                        "dateTime": "2020-10-03T02:00:00.000000Z"
+                    },
+                },
+            ]}
+        stream = StringIO()
+        self.assertEqual(Calendar.get_upcoming_events(api, ex_time, stream=stream), "")
+        self.assertEqual(stream.getvalue(), "test,2020-10-03T02:00:00.000000Z\n")
+
+    def test_get_upcoming_events_default_starting_time_from_clock(self):
+        # This test is to test that "now" is read from the clock on every call, not once at import time
+        api = Mock()
+        api.events.return_value.list.return_value.execute.return_value = {}
+        with patch("Calendar.clock", Calendar.FixedClock(datetime(2020, 10, 3))) as clock:
+            Calendar.get_upcoming_events(api)
+            self.assertEqual(api.events.return_value.list.call_args[1]["timeMin"], "2020-10-03T00:00:00Z")
+            clock.advance(days=1)
+            Calendar.get_upcoming_events(api)
+            self.assertEqual(api.events.return_value.list.call_args[1]["timeMin"], "2020-10-04T00:00:00Z")
+
+
 def main():
     suite = unittest.TestLoader().loadTestsFromTestCase(CalendarTestGetUpcomingEvents)
     # This will run the test suite.
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+import unittest
+
+# NOTE: ALL THE TESTS HERE ARE FOR THE IMPORT COST OF Calendar.py
+# Imports are checked in a fresh interpreter, as the test runner has already imported everything. The Google
+# client libraries must only be imported once get_calendar_api is called. The import time itself is measured by
+# CalendarBenchmarkImportTime.py, a test run on a shared CI runner is too noisy to hold it to a budget.
+
+# Prints the modules brought in by the import statement put in place of %s, other than the Calendar*.py ones, which
+# come from outside the standard library (built in modules have no file)
+NEW_MODULES_OUTSIDE_STANDARD_LIBRARY = """
+import sys, sysconfig
+before = set(sys.modules)
+%s
+standard = (sysconfig.get_paths()['stdlib'], sysconfig.get_paths()['platstdlib'])
+for name in sorted(set(sys.modules) - before):
+    path = getattr(sys.modules[name], '__file__', None) or ''
+    if path and not name.startswith('Calendar') and (not path.startswith(standard) or 'site-packages' in path):
+        print(name)
+"""
+
+
+def import_in_new_interpreter(code):
+    return subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(__file__) or ".",
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+
+
+class CalendarTestImportTime(unittest.TestCase):
+
+    def test_google_libraries_not_imported(self):
+        result = import_in_new_interpreter(
+            "import sys, Calendar; print(sorted(m for m in sys.modules if m.split('.')[0] in "
+            "('googleapiclient', 'google_auth_oauthlib', 'google', 'httplib2')))")
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_only_standard_library_imported(self):
+        # every module import Calendar brings in is one of the Calendar*.py modules or of the standard library
+        result = import_in_new_interpreter(NEW_MODULES_OUTSIDE_STANDARD_LIBRARY % "import Calendar")
+        self.assertEqual(result.stdout.strip(), "")
+        result = import_in_new_interpreter(NEW_MODULES_OUTSIDE_STANDARD_LIBRARY % "import httplib2")
+        self.assertIn("httplib2", result.stdout.split())
+
+
+def main():
+    suite = unittest.TestLoader().loadTestsFromTestCase(CalendarTestImportTime)
+    # This will run the test suite.
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+main()
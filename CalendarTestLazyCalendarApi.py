@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+import Calendar
+
+# NOTE: ALL THE TESTS HERE ARE FOR THE LazyCalendarApi CLASS AND load_discovery_document METHOD IN Calendar.py
+# Test Strategy : Branch Coverage
+
+
+class CalendarTestLazyCalendarApi(unittest.TestCase):
+
+    def test_api_not_built_until_used(self):
+        factory = Mock()
+        api = Calendar.LazyCalendarApi(factory)
+        self.assertEqual(factory.call_count, 0)
+        api.events().list(calendarId='primary').execute()
+        api.events().delete(calendarId='primary', eventId="test123").execute()
+        # Built once on first use, then reused
+        self.assertEqual(factory.call_count, 1)
+        self.assertEqual(factory.return_value.events.call_count, 2)
+
+    def test_discovery_document_cached(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with patch("importlib.metadata.version", return_value="1.0"):
+                first = Calendar.load_discovery_document(directory)
+                with patch("googleapiclient.discovery_cache.get_static_doc") as get_static_doc:
+                    second = Calendar.load_discovery_document(directory)
+            # Second load is read from the cache without locating the document again
+            self.assertEqual(get_static_doc.call_count, 0)
+            self.assertEqual(first, second)
+            self.assertIn('"calendar"', first)
+
+    def test_discovery_cache_invalidated_by_new_version(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with patch("importlib.metadata.version", return_value="1.0"):
+                Calendar.load_discovery_document(directory)
+            with patch("importlib.metadata.version", return_value="2.0"):
+                Calendar.load_discovery_document(directory)
+            # Document of the old version is removed
+            self.assertEqual(os.listdir(directory), [Calendar.DISCOVERY_CACHE_PREFIX + "2.0.json"])
+
+
+def main():
+    suite = unittest.TestLoader().loadTestsFromTestCase(CalendarTestLazyCalendarApi)
+    # This will run the test suite.
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+main()
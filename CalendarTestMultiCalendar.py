@@ -0,0 +1,125 @@
+import threading
+import unittest
+from unittest.mock import Mock, patch
+import Calendar
+import CalendarMulti
+
+# NOTE: ALL THE TESTS HERE ARE FOR THE MULTI CALENDAR AGENDA IN CalendarMulti.py
+# Test Strategy : Branch Coverage
+
+CALENDARS = {
+    "team@group.calendar.google.com": [
+        {"summary": "Standup", "start": {"dateTime": "2020-10-05T09:00:00+11:00"}},
+        {"summary": "Retro", "start": {"dateTime": "2020-10-09T15:00:00+11:00"}},
+    ],
+    "primary": [
+        {"summary": "Lecture", "start": {"dateTime": "2020-10-04T23:30:00Z"}},
+        {"summary": "Exam", "start": {"date": "2020-10-07"}},
+    ],
+    "empty@group.calendar.google.com": [],
+}
+
+
+def make_api_factory(barrier=None):
+    # Every api built by the factory answers events().list with the events of the calendar asked for. With a
+    # barrier the requests wait for each other, so they only all return if they were in flight at the same time
+    built = []
+    in_flight = []
+    lock = threading.Lock()
+
+    def list_events(calendarId, **query):
+        request = Mock()
+
+        def execute():
+            with lock:
+                in_flight.append(calendarId)
+                factory.most_in_flight = max(factory.most_in_flight, len(in_flight))
+            if barrier is not None:
+                barrier.wait()
+            with lock:
+                in_flight.remove(calendarId)
+            return {"items": CALENDARS[calendarId]}
+
+        request.execute.side_effect = execute
+        return request
+
+    def factory():
+        api = Mock()
+        api.events.return_value.list.side_effect = list_events
+        api.calendarList.return_value.list.return_value.execute.side_effect = [
+            {"items": [{"id": "team@group.calendar.google.com"}], "nextPageToken": "2"},
+            {"items": [{"id": "primary"}, {"id": "empty@group.calendar.google.com"}]},
+        ]
+        built.append(threading.current_thread().name)
+        return api
+
+    factory.built = built
+    factory.most_in_flight = 0
+    return factory
+
+
+class CalendarTestMultiCalendar(unittest.TestCase):
+
+    def test_calendar_ids_follow_pages(self):
+        api = make_api_factory()()
+        self.assertEqual(CalendarMulti.get_calendar_ids(api),
+                         ["team@group.calendar.google.com", "primary", "empty@group.calendar.google.com"])
+
+    def test_agenda_merged_in_start_order(self):
+        # 09:00+11:00 on the 5th is 22:00Z on the 4th, so it comes before the lecture at 23:30Z
+        factory = make_api_factory()
+        agenda = CalendarMulti.get_agenda(factory, starting_time="2020-10-01T00:00:00Z")
+        self.assertEqual(agenda,
+                         "team@group.calendar.google.com: Standup,2020-10-05T09:00:00+11:00\n"
+                         "primary: Lecture,2020-10-04T23:30:00Z\n"
+                         "primary: Exam,2020-10-07\n"
+                         "team@group.calendar.google.com: Retro,2020-10-09T15:00:00+11:00\n")
+
+    def test_calendars_queried_in_parallel(self):
+        # The three requests are in flight at the same time, with one api per worker thread
+        # (CalendarBenchmarkMulti.py times it against querying one calendar after the other)
+        factory = make_api_factory(threading.Barrier(3, timeout=5))
+        pairs = list(CalendarMulti.fan_out(factory, list(CALENDARS), timeMin="2020-10-01T00:00:00Z"))
+        self.assertEqual(len(pairs), 4)
+        self.assertEqual(factory.most_in_flight, 3)
+        self.assertEqual(len(factory.built), 3)
+
+    def test_workers_bounded(self):
+        factory = make_api_factory()
+        list(CalendarMulti.fan_out(factory, list(CALENDARS) * 4, max_workers=2))
+        self.assertLessEqual(len(set(factory.built)), 2)
+        self.assertLessEqual(factory.most_in_flight, 2)
+
+    @patch("Calendar.authorized_http")
+    @patch("googleapiclient.discovery.build_from_document")
+    @patch("Calendar.load_discovery_document", return_value="{}")
+    @patch("Calendar.get_credentials")
+    def test_credentials_loaded_once(self, get_credentials, load_discovery_document, build_from_document,
+                                     authorized_http):
+        build_from_document.side_effect = lambda document, http: make_api_factory()()
+        pairs = list(CalendarMulti.fan_out(Calendar.get_calendar_api_factory(), list(CALENDARS) * 4))
+        self.assertEqual(len(pairs), 16)
+        # on the calling thread only, the workers each built a client from them
+        self.assertEqual((get_credentials.call_count, load_discovery_document.call_count), (1, 1))
+        self.assertLessEqual(build_from_document.call_count, CalendarMulti.MAX_WORKERS)
+        authorized_http.assert_called_with(get_credentials.return_value)
+        self.assertEqual(CalendarMulti.get_agenda(calendar_ids=[], starting_time="2020-10-01T00:00:00Z"), "")
+        self.assertEqual(get_credentials.call_count, 2)
+
+    def test_no_calendars(self):
+        self.assertEqual(CalendarMulti.get_agenda(make_api_factory(), calendar_ids=[]), "")
+
+    def test_invalid_window(self):
+        with self.assertRaises(ValueError):
+            CalendarMulti.get_agenda(Mock(), [], "2020-10-15T00:00:00Z", "2020-10-01T00:00:00Z")
+        with self.assertRaises(ValueError):
+            CalendarMulti.get_agenda(Mock(), [], query=" ")
+
+
+def main():
+    suite = unittest.TestLoader().loadTestsFromTestCase(CalendarTestMultiCalendar)
+    # This will run the test suite.
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+main()
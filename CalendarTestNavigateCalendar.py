@@ -66,8 +66,8 @@ class CalendarTestNavigateCalendar(unittest.TestCase):
             ]}
         result = Calendar.navigate_calendar(api, date, navigation_type)
         self.assertEqual(
-            api.events.return_value.list.return_value.execute.call_count, 2)  # Mock method called twice
-        # First in getting events, second in getting reminders
+            api.events.return_value.list.return_value.execute.call_count, 1)  # Mock method called once
+        # Events and reminders are rendered from the same request
 
         self.assertIn("Halloween", result)  # Assert title of calendar in result string returned
         self.assertIn("test", result)  # Assert title of calendar in result string returned
@@ -112,8 +112,8 @@ class CalendarTestNavigateCalendar(unittest.TestCase):
             ]}
         result = Calendar.navigate_calendar(api, date, navigation_type)
         self.assertEqual(
-            api.events.return_value.list.return_value.execute.call_count, 2)  # Mock method called twice
-        # First in getting events, second in getting reminders
+            api.events.return_value.list.return_value.execute.call_count, 1)  # Mock method called once
+        # Events and reminders are rendered from the same request
         self.assertIn("test", result)  # Assert title in result
         self.assertIn("Birthday Party", result)  # Assert title in result
         self.assertIn("popup 10", result)  # Assert reminder in result
@@ -171,8 +171,8 @@ class CalendarTestNavigateCalendar(unittest.TestCase):
             ]}
         result = Calendar.navigate_calendar(api, date, navigation_type)
         self.assertEqual(
-            api.events.return_value.list.return_value.execute.call_count, 2)  # Mock method called twice
-        # First in getting events, second in getting reminders
+            api.events.return_value.list.return_value.execute.call_count, 1)  # Mock method called once
+        # Events and reminders are rendered from the same request
         self.assertIn("test", result)  # Assert title in result
         self.assertIn("Birthday Party", result)  # Assert title in result
         self.assertIn("New Year Day Countdown", result)  # Assert title in result
@@ -217,8 +217,8 @@ class CalendarTestNavigateCalendar(unittest.TestCase):
             ]}
         result = Calendar.navigate_calendar(api, date, navigation_type)
         self.assertEqual(
-            api.events.return_value.list.return_value.execute.call_count, 2)  # Mock method called twice
-        # First in getting events, second in getting reminders
+            api.events.return_value.list.return_value.execute.call_count, 1)  # Mock method called once
+        # Events and reminders are rendered from the same request
         self.assertIn("test", result)  # Assert title in result
         self.assertIn("Birthday Party", result)  # Assert title in result
         self.assertIn("popup 10", result)  # Assert reminder in result
@@ -262,8 +262,8 @@ class CalendarTestNavigateCalendar(unittest.TestCase):
             ]}
         result = Calendar.navigate_calendar(api, date, navigation_type)
         self.assertEqual(
-            api.events.return_value.list.return_value.execute.call_count, 2)  # Mock method called twice
-        # First in getting events, second in getting reminders
+            api.events.return_value.list.return_value.execute.call_count, 1)  # Mock method called once
+        # Events and reminders are rendered from the same request
         self.assertIn("test", result)  # Assert title in result
         self.assertIn("Birthday Party", result)  # Assert title in result
         self.assertIn("popup 10", result)  # Assert reminder in result
@@ -307,8 +307,8 @@ class CalendarTestNavigateCalendar(unittest.TestCase):
             ]}
         result = Calendar.navigate_calendar(api, date, navigation_type)
         self.assertEqual(
-            api.events.return_value.list.return_value.execute.call_count, 2)  # Mock method called twice
-        # First in getting events, second in getting reminders
+            api.events.return_value.list.return_value.execute.call_count, 1)  # Mock method called once
+        # Events and reminders are rendered from the same request
         self.assertIn("test", result)  # Assert title in result
         self.assertIn("Birthday Party", result)  # Assert title in result
         self.assertIn("popup 10", result)  # Assert reminder in result
@@ -0,0 +1,204 @@
+import datetime
+import socket
+import unittest
+from io import StringIO
+from unittest.mock import Mock, patch
+from google.auth.exceptions import TransportError
+from googleapiclient.errors import HttpError
+from httplib2 import ServerNotFoundError
+import Calendar
+import CalendarOffline
+from CalendarIntervals import WindowIndex
+from CalendarSearch import SearchIndex
+from CalendarTestFixtures import make_store
+
+# NOTE: ALL THE TESTS HERE ARE FOR THE OFFLINE MODE IN CalendarOffline.py AND ITS USE BY run_calendar IN Calendar.py
+# Test Strategy : Branch Coverage
+
+LECTURE = {"id": "1", "etag": "\"1\"", "status": "confirmed", "summary": "FIT2107 Lecture",
+           "created": "2020-09-01T00:00:00.000Z", "creator": {"email": "user@gmail.com"},
+           "start": {"dateTime": "2020-10-05T02:00:00Z"}, "end": {"dateTime": "2020-10-05T04:00:00Z"},
+           "reminders": {"useDefault": False, "overrides": [{"method": "popup", "minutes": 10},
+                                                            {"method": "email", "minutes": 60}]}}
+LAB = {"id": "2", "etag": "\"2\"", "status": "confirmed", "summary": "FIT2107 Lab",
+       "created": "2020-09-01T00:00:00.000Z", "creator": {"email": "user@gmail.com"},
+       "start": {"dateTime": "2020-10-06T02:00:00Z"}, "end": {"dateTime": "2020-10-06T04:00:00Z"},
+       "reminders": {"useDefault": True}}
+
+
+def make_offline(*later):
+    """
+    An OfflineStore synced once with the lecture and the lab, the api then answering with later
+    """
+    store, api = make_store({"items": [LECTURE, LAB], "nextSyncToken": "sync1"}, *later)
+    offline = CalendarOffline.OfflineStore(store)
+    offline.sync(api)
+    return offline, api
+
+
+class CalendarTestOfflineMode(unittest.TestCase):
+
+    def test_offline_errors(self):
+        self.assertTrue(CalendarOffline.is_offline_error(socket.gaierror("Name or service not known")))
+        self.assertTrue(CalendarOffline.is_offline_error(ConnectionResetError()))
+        self.assertTrue(CalendarOffline.is_offline_error(ServerNotFoundError("Unable to find the server")))
+        self.assertTrue(CalendarOffline.is_offline_error(TransportError("token refresh failed")))
+        self.assertFalse(CalendarOffline.is_offline_error(HttpError(Mock(status=500), b"Error")))
+        self.assertFalse(CalendarOffline.is_offline_error(ValueError()))
+
+    def test_snapshot_served_when_offline(self):
+        offline, api = make_offline(socket.timeout("timed out"), {"nextSyncToken": "sync2"})
+        self.assertFalse(offline.offline)
+        self.assertIsNotNone(offline.synced_at())
+        events = list(offline.get_events(api, "2020-10-01T00:00:00Z"))
+        self.assertTrue(offline.offline)
+        self.assertEqual([event["summary"] for event in events], ["FIT2107 Lecture", "FIT2107 Lab"])
+        self.assertIn("Offline: showing the events as of the last sync (" + offline.synced_at() + " UTC)",
+                      offline.banner())
+        list(offline.get_events(api))
+        self.assertFalse(offline.offline)
+        self.assertEqual(offline.banner(), "")
+
+    def test_other_errors_raised(self):
+        offline, api = make_offline(HttpError(Mock(status=400), b"Bad Request"))
+        with self.assertRaises(HttpError):
+            offline.sync(api)
+        self.assertFalse(offline.offline)
+
+    def test_server_errors_served_from_snapshot(self):
+        offline, api = make_offline(HttpError(Mock(status=503), b"Unavailable"), {"nextSyncToken": "sync2"})
+        self.assertEqual(len(list(offline.get_events(api))), 2)
+        self.assertTrue(offline.offline)
+        list(offline.get_events(api))
+        self.assertFalse(offline.offline)
+
+    def test_replay_failures_never_stop_listing(self):
+        offline, api = make_offline(*[{"nextSyncToken": "sync2"}] * 3)
+        offline.queue("delete", LAB)
+        offline.queue("delete", LECTURE)
+        api.events.return_value.delete.return_value.execute.side_effect = [
+            HttpError(Mock(status=503), b"Unavailable"),  # busy, both stay queued
+            HttpError(Mock(status=403), b"Forbidden"), HttpError(Mock(status=429), b"Rate Limit Exceeded"),
+            None]
+        self.assertEqual(list(offline.get_events(api)), [])
+        self.assertEqual(offline.pending(), 2)
+        self.assertEqual(offline.banner(), "")
+        list(offline.get_events(api))
+        # the refused delete is dropped and reported, the rate limited one waits for the next sync
+        self.assertEqual(offline.pending(), 1)
+        self.assertEqual(offline.banner(), "Not sent, refused by the server (403): FIT2107 Lab")
+        list(offline.get_events(api))
+        self.assertEqual(offline.pending(), 0)
+        self.assertEqual(api.events.return_value.delete.call_args[1]["eventId"], "1")
+
+    def test_sync_time_read_from_clock(self):
+        clock = Calendar.FixedClock(datetime.datetime(2020, 10, 5, 9, 30))
+        store, api = make_store({"items": [LECTURE], "nextSyncToken": "sync1"}, ConnectionResetError())
+        offline = CalendarOffline.OfflineStore(store, clock=clock)
+        offline.sync(api)
+        clock.advance(hours=2)
+        list(offline.get_events(api))
+        self.assertEqual(offline.synced_at(), "2020-10-05 09:30")
+        self.assertIn("(2020-10-05 09:30 UTC)", offline.banner())
+
+    def test_never_synced(self):
+        store, api = make_store(ConnectionRefusedError())
+        offline = CalendarOffline.OfflineStore(store)
+        self.assertEqual(list(offline.get_events(api)), [])
+        self.assertIn("(never UTC)", offline.banner())
+
+    def test_queue_applies_to_snapshot(self):
+        offline, api = make_offline()
+        index = SearchIndex(offline)
+        self.assertEqual(len(index.search("FIT2107")), 2)
+        offline.queue("delete", LAB)
+        changed = dict(LECTURE, summary="FIT2107 Lecture (moved)")
+        offline.queue("update", changed)
+        self.assertEqual(offline.pending(), 2)
+        self.assertEqual([event["summary"] for event in offline.query()], ["FIT2107 Lecture (moved)"])
+        self.assertEqual([event.summary for event, fields in index.search("moved")], ["FIT2107 Lecture (moved)"])
+        self.assertEqual(offline.find("lecture"), [changed])
+
+    def test_replay_with_etag_checks(self):
+        offline, api = make_offline({"nextSyncToken": "sync2"})
+        offline.queue("delete", LAB)
+        offline.queue("update", dict(LECTURE, reminders={"useDefault": False, "overrides": []}))
+        offline.queue("delete", dict(LAB, id="3", etag="\"3\""))
+        api.events.return_value.delete.return_value.headers = {}
+        api.events.return_value.patch.return_value.headers = {}
+        api.events.return_value.delete.return_value.execute.side_effect = [None, HttpError(Mock(status=404),
+                                                                                           b"Not Found")]
+        api.events.return_value.patch.return_value.execute.side_effect = HttpError(Mock(status=412),
+                                                                                    b"Precondition Failed")
+        offline.sync(api)
+        self.assertEqual(offline.pending(), 0)
+        self.assertEqual(api.events.return_value.delete.return_value.headers, {"If-Match": "\"3\""})
+        self.assertEqual(api.events.return_value.patch.call_args[1]["body"]["reminders"]["overrides"], [])
+        self.assertEqual(api.events.return_value.patch.return_value.headers, {"If-Match": "\"1\""})
+        # the lecture changed on the server, the deleted event was already gone
+        self.assertEqual(offline.banner(), "Not sent, changed on the server in the meantime: FIT2107 Lecture")
+        self.assertEqual(offline.banner(), "")
+
+    def test_replay_stops_while_offline(self):
+        offline, api = make_offline(ConnectionResetError(), {"nextSyncToken": "sync2"})
+        offline.queue("delete", LAB)
+        offline.queue("delete", LECTURE)
+        api.events.return_value.delete.return_value.execute.side_effect = [None, ConnectionResetError(), None]
+        offline.sync(api)
+        self.assertTrue(offline.offline)
+        self.assertEqual(offline.pending(), 1)
+        offline.sync(api)
+        self.assertEqual(offline.pending(), 0)
+        self.assertEqual(api.events.return_value.delete.call_args[1]["eventId"], "1")
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('Calendar.input', create=True)
+    def test_run_calendar_offline(self, mocked_input, mocked_output):
+        offline, api = make_offline(*[socket.timeout("timed out")] * 3)
+        mocked_input.side_effect = ["past -e", "2020-10-01", "search -e", "FIT2107 lab", "exit"]
+        Calendar.run_calendar(api, WindowIndex(offline), SearchIndex(offline), offline)
+        output = mocked_output.getvalue()
+        self.assertIn("FIT2107 Lecture,2020-10-05T02:00:00Z\nFIT2107 Lab,2020-10-06T02:00:00Z\n", output)
+        self.assertEqual(output.count("FIT2107 Lab,2020-10-06T02:00:00Z"), 2)  # listed, then found by search
+        self.assertEqual(output.count("Offline: showing the events as of the last sync"), 2)
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('Calendar.input', create=True)
+    def test_run_calendar_offline_deletes_queued(self, mocked_input, mocked_output):
+        offline, api = make_offline(*[ConnectionRefusedError()] * 4)
+        api.events.return_value.delete.return_value.execute.side_effect = ConnectionRefusedError()
+        api.events.return_value.patch.return_value.execute.side_effect = ConnectionRefusedError()
+        mocked_input.side_effect = ["navigate", "1", "5 October 2020", "y", "lecture", "0", "del -r", "1",
+                                    "navigate", "1", "6 October 2020", "y", "lab", "0", "del", "exit"]
+        Calendar.run_calendar(api, WindowIndex(offline), SearchIndex(offline), offline)
+        output = mocked_output.getvalue()
+        self.assertIn("Offline, the reminder will be deleted once back online", output)
+        self.assertIn("Offline, the event will be deleted once back online", output)
+        self.assertEqual(offline.pending(), 2)
+        self.assertEqual([event["summary"] for event in offline.query()], ["FIT2107 Lecture"])
+        self.assertEqual(next(offline.query())["reminders"]["overrides"], [{"method": "popup", "minutes": 10}])
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('Calendar.input', create=True)
+    def test_run_calendar_online_unchanged(self, mocked_input, mocked_output):
+        offline, api = make_offline(*[{"nextSyncToken": "sync2"}] * 2)
+        api.events.return_value.list.return_value.execute.side_effect = [{"nextSyncToken": "sync2"},
+                                                                          {"items": [LAB]}, {"nextSyncToken": "s3"}]
+        mocked_input.side_effect = ["navigate", "1", "6 October 2020", "y", "lab", "0", "del", "exit"]
+        Calendar.run_calendar(api, WindowIndex(offline), SearchIndex(offline), offline)
+        self.assertIn("Deleted event successfully", mocked_output.getvalue())
+        self.assertNotIn("Offline", mocked_output.getvalue())
+        self.assertEqual(offline.pending(), 0)
+        with self.assertRaises(HttpError):
+            Calendar.send_or_queue(offline, "delete", LAB, Mock(side_effect=HttpError(Mock(status=500), b"Error")))
+        with self.assertRaises(OSError):
+            Calendar.send_or_queue(None, "delete", LAB, Mock(side_effect=OSError()))
+
+
+def main():
+    suite = unittest.TestLoader().loadTestsFromTestCase(CalendarTestOfflineMode)
+    # This will run the test suite.
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+main()
@@ -0,0 +1,253 @@
+import datetime
+import json
+import unittest
+from unittest.mock import Mock, patch
+import Calendar
+import CalendarRecurrence
+from CalendarOffline import OfflineStore
+from CalendarStore import EventStore
+
+# NOTE: ALL THE TESTS HERE ARE FOR THE LOCAL RECURRENCE EXPANSION IN CalendarRecurrence.py
+# Test Strategy : Branch Coverage
+
+MELBOURNE = "Australia/Melbourne"
+
+STANDUP = {
+    "id": "standup",
+    "summary": "Standup",
+    "start": {"dateTime": "2020-10-05T09:00:00+11:00", "timeZone": MELBOURNE},
+    "end": {"dateTime": "2020-10-05T09:15:00+11:00", "timeZone": MELBOURNE},
+    "recurrence": ["RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR;UNTIL=20210430T000000Z",
+                   "EXDATE;TZID=Australia/Melbourne:20201007T090000"],
+    "reminders": {"useDefault": True},
+}
+
+CANCELLED = {"id": "standup_20201008T220000Z", "recurringEventId": "standup", "status": "cancelled",
+             "originalStartTime": {"dateTime": "2020-10-09T09:00:00+11:00", "timeZone": MELBOURNE}}
+
+MOVED = {"id": "standup_20201011T220000Z", "summary": "Standup (moved)", "recurringEventId": "standup",
+         "originalStartTime": {"dateTime": "2020-10-12T09:00:00+11:00", "timeZone": MELBOURNE},
+         "start": {"dateTime": "2020-10-12T11:00:00+11:00"}, "end": {"dateTime": "2020-10-12T11:15:00+11:00"}}
+
+LUNCH = {"id": "lunch", "summary": "Lunch", "start": {"dateTime": "2020-10-13T01:00:00Z"},
+         "end": {"dateTime": "2020-10-13T02:00:00Z"}}
+
+
+def starts(events):
+    return [event["start"].get("dateTime", event["start"].get("date")) for event in events]
+
+
+def make_master(recurrence, start, end, event_id="master"):
+    key = "date" if len(start) == 10 else "dateTime"
+    return {"id": event_id, "summary": event_id, "start": {key: start}, "end": {key: end}, "recurrence": recurrence}
+
+
+def expand(master, starting_time=None, end_time=None):
+    return list(CalendarRecurrence.expand_events(Mock(), [master], starting_time, end_time))
+
+
+class CalendarTestRecurrence(unittest.TestCase):
+
+    @unittest.skipIf(CalendarRecurrence.ZoneInfo is None, "no zoneinfo before Python 3.9")
+    def test_weekly_with_exceptions(self):
+        events = list(CalendarRecurrence.expand_events(Mock(), [MOVED, STANDUP, LUNCH, CANCELLED],
+                                                       "2020-10-01T00:00:00Z", "2020-10-15T00:00:00Z"))
+        # the 7th is an EXDATE, the 9th is cancelled and the 12th moved to 11:00
+        self.assertEqual(starts(events), ["2020-10-05T09:00:00+11:00", "2020-10-12T11:00:00+11:00",
+                                          "2020-10-13T01:00:00Z", "2020-10-14T09:00:00+11:00"])
+        self.assertEqual([event["id"] for event in events],
+                         ["standup_20201004T220000Z", "standup_20201011T220000Z", "lunch", "standup_20201013T220000Z"])
+        instance = events[0]
+        self.assertEqual(instance["recurringEventId"], "standup")
+        self.assertNotIn("recurrence", instance)
+        self.assertEqual(instance["end"], {"dateTime": "2020-10-05T09:15:00+11:00", "timeZone": MELBOURNE})
+        self.assertEqual(instance["reminders"], {"useDefault": True})
+
+    @unittest.skipIf(CalendarRecurrence.ZoneInfo is None, "no zoneinfo before Python 3.9")
+    def test_wall_clock_kept_across_daylight_saving(self):
+        # Melbourne leaves daylight saving on the 4th of April 2021, the standup stays at 9:00
+        events = expand(STANDUP, "2021-04-01T00:00:00Z", "2021-06-01T00:00:00Z")
+        self.assertEqual(starts(events)[:2], ["2021-04-02T09:00:00+11:00", "2021-04-05T09:00:00+10:00"])
+        # UNTIL is 10:00 on the 30th in Melbourne
+        self.assertEqual(starts(events)[-1], "2021-04-30T09:00:00+10:00")
+
+    def test_without_zoneinfo_expanded_by_server(self):
+        api = Mock()
+        api.events.return_value.instances.return_value.execute.return_value = {"items": [
+            {"id": "standup_20210404T230000Z", "summary": "Standup", "recurringEventId": "standup",
+             "start": {"dateTime": "2021-04-05T09:00:00+10:00"}}]}
+        utc = make_master(["RRULE:FREQ=DAILY;COUNT=2"], "2021-04-03T22:00:00Z", "2021-04-03T22:15:00Z")
+        utc["start"]["timeZone"] = "UTC"
+        with patch("CalendarRecurrence.ZoneInfo", None):
+            events = list(CalendarRecurrence.expand_events(api, [STANDUP, utc], "2021-04-04T00:00:00Z",
+                                                           "2021-04-06T00:00:00Z"))
+            with self.assertRaises(ValueError):
+                CalendarRecurrence.Recurrence(STANDUP)
+        # the Melbourne standup comes from events().instances with its +10:00 offset, the UTC event is expanded here
+        self.assertEqual(starts(events), ["2021-04-04T22:00:00+00:00", "2021-04-05T09:00:00+10:00"])
+        self.assertEqual(api.events.return_value.instances.call_args[1]["eventId"], "standup")
+
+    def test_monthly_rules(self):
+        last_day = make_master(["RRULE:FREQ=MONTHLY;BYMONTHDAY=-1;COUNT=4"], "2020-01-31", "2020-02-01")
+        self.assertEqual(starts(expand(last_day)), ["2020-01-31", "2020-02-29", "2020-03-31", "2020-04-30"])
+        # the 31st skips the months without one
+        thirty_first = make_master(["RRULE:FREQ=MONTHLY;COUNT=3"], "2020-01-31T10:00:00Z", "2020-01-31T11:00:00Z")
+        self.assertEqual(starts(expand(thirty_first)), ["2020-01-31T10:00:00+00:00", "2020-03-31T10:00:00+00:00",
+                                                        "2020-05-31T10:00:00+00:00"])
+        weekdays = make_master(["RRULE:FREQ=MONTHLY;BYDAY=2TU,-1FR"], "2020-01-14T10:00:00Z", "2020-01-14T11:00:00Z")
+        self.assertEqual(starts(expand(weekdays, "2020-01-01T00:00:00Z", "2020-03-01T00:00:00Z")),
+                         ["2020-01-14T10:00:00+00:00", "2020-01-31T10:00:00+00:00", "2020-02-11T10:00:00+00:00",
+                          "2020-02-28T10:00:00+00:00"])
+        fridays = make_master(["RRULE:FREQ=MONTHLY;INTERVAL=2;BYDAY=FR;BYMONTHDAY=13,14,15"], "2020-03-13T10:00:00Z",
+                              "2020-03-13T11:00:00Z")
+        self.assertEqual(starts(expand(fridays, "2020-01-01T00:00:00Z", "2021-01-01T00:00:00Z")),
+                         ["2020-03-13T10:00:00+00:00", "2020-05-15T10:00:00+00:00", "2020-11-13T10:00:00+00:00"])
+
+    def test_yearly_and_daily_rules(self):
+        leap_day = make_master(["RRULE:FREQ=YEARLY;BYMONTH=2;BYMONTHDAY=29"], "2020-02-29", "2020-03-01")
+        self.assertEqual(starts(expand(leap_day, "2020-01-01T00:00:00Z", "2029-01-01T00:00:00Z")),
+                         ["2020-02-29", "2024-02-29", "2028-02-29"])
+        birthday = make_master(["RRULE:FREQ=YEARLY;UNTIL=20220101"], "2020-10-05", "2020-10-06")
+        self.assertEqual(starts(expand(birthday)), ["2020-10-05", "2021-10-05"])
+        weekdays = make_master(["RRULE:FREQ=DAILY;BYDAY=MO,TU,WE,TH,FR;BYMONTH=10", "RDATE:20201010T100000Z"],
+                               "2020-10-08T10:00:00Z", "2020-10-08T10:30:00Z")
+        self.assertEqual(starts(expand(weekdays, None, "2020-10-14T00:00:00Z")),
+                         ["2020-10-08T10:00:00+00:00", "2020-10-09T10:00:00+00:00", "2020-10-10T10:00:00+00:00",
+                          "2020-10-12T10:00:00+00:00", "2020-10-13T10:00:00+00:00"])
+        biweekly = make_master(["RRULE:FREQ=WEEKLY;INTERVAL=2;WKST=SU;BYDAY=SU,TU"], "2020-10-04T10:00:00Z",
+                               "2020-10-04T11:00:00Z")
+        self.assertEqual(starts(expand(biweekly, None, "2020-10-25T00:00:00Z")),
+                         ["2020-10-04T10:00:00+00:00", "2020-10-06T10:00:00+00:00", "2020-10-18T10:00:00+00:00",
+                          "2020-10-20T10:00:00+00:00"])
+
+    def test_far_window_matches_expansion_from_the_start(self):
+        # without COUNT the periods before the window are skipped, the result must not change
+        for rule in ["RRULE:FREQ=DAILY;INTERVAL=3", "RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH",
+                     "RRULE:FREQ=MONTHLY;INTERVAL=5;BYDAY=-1SU", "RRULE:FREQ=YEARLY;INTERVAL=2;BYMONTH=1,7"]:
+            master = make_master([rule], "2010-01-03T22:00:00Z", "2010-01-04T01:00:00Z")
+            from_start = [event for event in expand(master, None, "2031-01-01T00:00:00Z")
+                          if event["end"]["dateTime"] > "2030-01-01T00:00:00+00:00"]
+            self.assertEqual(expand(master, "2030-01-01T00:00:00Z", "2031-01-01T00:00:00Z"), from_start, rule)
+            self.assertTrue(from_start, rule)
+
+    def test_instance_overlapping_window_start(self):
+        overnight = make_master(["RRULE:FREQ=DAILY"], "2020-10-05T22:00:00Z", "2020-10-06T06:00:00Z")
+        self.assertEqual(starts(expand(overnight, "2020-10-07T00:00:00Z", "2020-10-07T23:00:00Z")),
+                         ["2020-10-06T22:00:00+00:00", "2020-10-07T22:00:00+00:00"])
+
+    def test_never_matching_rule_ends(self):
+        never = make_master(["RRULE:FREQ=YEARLY;BYMONTH=2;BYMONTHDAY=30"], "2020-01-30T10:00:00Z",
+                            "2020-01-30T11:00:00Z")
+        self.assertEqual(starts(expand(never)), ["2020-01-30T10:00:00+00:00"])
+
+    def test_unsupported_rule_expanded_by_server(self):
+        master = make_master(["RRULE:FREQ=MONTHLY;BYDAY=MO,TU,WE,TH,FR;BYSETPOS=-1"], "2020-10-30T10:00:00Z",
+                             "2020-10-30T11:00:00Z")
+        moved = dict(MOVED, recurringEventId="master")
+        api = Mock()
+        api.events.return_value.instances.return_value.execute.side_effect = [
+            {"items": [make_master([], "2020-11-30T10:00:00Z", "2020-11-30T11:00:00Z")], "nextPageToken": "2"},
+            {"items": [make_master([], "2020-10-30T10:00:00Z", "2020-10-30T11:00:00Z")]},
+        ]
+        events = list(CalendarRecurrence.expand_events(api, [master, moved], "2020-10-01T00:00:00Z",
+                                                       "2020-12-01T00:00:00Z"))
+        # the server's instances already hold the moved one
+        self.assertEqual(starts(events), ["2020-10-30T10:00:00Z", "2020-11-30T10:00:00Z"])
+        self.assertEqual(api.events.return_value.instances.call_args[1]["eventId"], "master")
+        self.assertEqual(api.events.return_value.instances.call_args[1]["pageToken"], "2")
+        for line in ["RRULE:FREQ=HOURLY", "RDATE;VALUE=PERIOD:20201005T100000Z/PT1H", "EXRULE:FREQ=DAILY",
+                     "RRULE:FREQ=YEARLY;BYDAY=20MO"]:
+            with self.assertRaises(ValueError):
+                CalendarRecurrence.Recurrence(make_master([line], "2020-10-05T10:00:00Z", "2020-10-05T11:00:00Z"))
+
+    def test_cancelled_master_left_out(self):
+        self.assertEqual(expand(dict(STANDUP, status="cancelled"), "2020-10-01T00:00:00Z", "2020-11-01T00:00:00Z"),
+                         [])
+
+    @unittest.skipIf(CalendarRecurrence.ZoneInfo is None, "no zoneinfo before Python 3.9")
+    def test_expander_serves_as_store(self):
+        api = Mock()
+        api.events.return_value.list.return_value.execute.return_value = {"items": [STANDUP, CANCELLED, LUNCH]}
+        expander = CalendarRecurrence.RecurrenceExpander()
+        result = Calendar.get_upcoming_events(api, "2021-04-25T00:00:00Z", store=expander)
+        self.assertEqual(result, "Standup,2021-04-26T09:00:00+10:00\nStandup,2021-04-28T09:00:00+10:00\n"
+                                 "Standup,2021-04-30T09:00:00+10:00\n")
+        query = api.events.return_value.list.call_args[1]
+        self.assertFalse(query["singleEvents"])
+        self.assertEqual(query["timeMax"], "2022-04-26T00:00:00Z")  # a year ahead
+        navigated = Calendar.navigate_calendar(api, datetime.datetime(2020, 10, 13), "DAY", expander)
+        self.assertIn("Lunch", navigated)
+        self.assertIn("Standup,2020-10-14T09:00:00+11:00", navigated)  # Wednesday's standup is on the 13th in UTC
+        # without a start every instance up to a year from now
+        expander = CalendarRecurrence.RecurrenceExpander(clock=Calendar.FixedClock(datetime.datetime(2020, 10, 13)))
+        self.assertEqual(starts(expander.get_events(api))[0], "2020-10-05T09:00:00+11:00")
+        self.assertIsNone(api.events.return_value.list.call_args[1]["timeMin"])
+        self.assertEqual(api.events.return_value.list.call_args[1]["timeMax"], "2021-10-14T00:00:00Z")  # HORIZON
+
+    def test_expander_offline_serves_snapshot(self):
+        api = Mock()
+        lunch = dict(LUNCH, status="confirmed", etag="\"1\"")
+        api.events.return_value.list.return_value.execute.side_effect = [{"items": [lunch], "nextSyncToken": "1"},
+                                                                         ConnectionResetError(),
+                                                                         ConnectionResetError()]
+        store = OfflineStore(EventStore(":memory:"))
+        store.sync(api)
+        expander = CalendarRecurrence.RecurrenceExpander(store=store)
+        self.assertEqual(list(expander.get_events(api, "2020-10-01T00:00:00Z")), [lunch])
+        self.assertTrue(store.offline)
+        api.events.return_value.list.return_value.execute.side_effect = ValueError()
+        with self.assertRaises(ValueError):
+            expander.get_events(api, "2020-10-01T00:00:00Z")
+        api.events.return_value.list.return_value.execute.side_effect = ConnectionResetError()
+        with self.assertRaises(ConnectionResetError):  # no snapshot to serve
+            CalendarRecurrence.RecurrenceExpander().get_events(api, "2020-10-01T00:00:00Z")
+
+    def test_expander_syncs_store(self):
+        api = Mock()
+        lunch = dict(LUNCH, status="confirmed", etag="\"1\"")
+        api.events.return_value.list.return_value.execute.side_effect = [{"items": [lunch], "nextSyncToken": "1"},
+                                                                         {"nextSyncToken": "2"}, {"items": []}]
+        api.events.return_value.delete.return_value.headers = {}
+        api.events.return_value.delete.return_value.execute.side_effect = [ConnectionResetError(), None]
+        store = OfflineStore(EventStore(":memory:"))
+        store.sync(api)
+        store.queue("delete", lunch)
+        expander = CalendarRecurrence.RecurrenceExpander(store=store)
+        self.assertEqual(list(expander.get_events(api, "2020-10-01T00:00:00Z")), [])
+        self.assertTrue(store.offline)
+        self.assertEqual(store.pending(), 1)
+        # back online the queued delete is sent and the banner cleared before the window is listed
+        self.assertEqual(list(expander.get_events(api, "2020-10-01T00:00:00Z")), [])
+        self.assertFalse(store.offline)
+        self.assertEqual(store.pending(), 0)
+        self.assertEqual(api.events.return_value.delete.call_args[1]["eventId"], lunch["id"])
+        self.assertFalse(api.events.return_value.list.call_args[1]["singleEvents"])
+
+    def test_expander_offline_client_not_built(self):
+        api = Mock()
+        lunch = dict(LUNCH, status="confirmed", etag="\"1\"")
+        api.events.return_value.list.return_value.execute.return_value = {"items": [lunch], "nextSyncToken": "1"}
+        store = OfflineStore(EventStore(":memory:"))
+        store.sync(api)
+        lazy = Calendar.LazyCalendarApi(Mock(side_effect=ConnectionResetError()))  # refreshing the token fails
+        expander = CalendarRecurrence.RecurrenceExpander(store=store)
+        self.assertEqual(list(expander.get_events(lazy, "2020-10-01T00:00:00Z")), [lunch])
+        self.assertTrue(store.offline)
+
+    def test_payload_smaller_than_server_expansion(self):
+        daily = make_master(["RRULE:FREQ=DAILY"], "2018-01-01T09:00:00+11:00", "2018-01-01T09:30:00+11:00",
+                            "daily")
+        daily.update(description="Daily sync of the team", attendees=[{"email": "alice@monash.edu"}],
+                     reminders={"useDefault": True})
+        instances = expand(daily, "2018-01-01T00:00:00Z", "2021-01-01T00:00:00Z")
+        self.assertEqual(len(instances), 1096)
+        self.assertLess(len(json.dumps([daily])) * 500, len(json.dumps(instances)))
+
+
+def main():
+    suite = unittest.TestLoader().loadTestsFromTestCase(CalendarTestRecurrence)
+    # This will run the test suite.
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+main()
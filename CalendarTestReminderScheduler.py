@@ -0,0 +1,170 @@
+import datetime
+import heapq
+import unittest
+from unittest.mock import Mock, patch
+from googleapiclient.errors import HttpError
+import Calendar
+import CalendarReminders
+from CalendarTestFixtures import make_event, make_store
+
+# NOTE: ALL THE TESTS HERE ARE FOR THE ReminderScheduler CLASS IN CalendarReminders.py
+# Test Strategy : Branch Coverage
+# The clock is a FixedClock which the stop event below moves forward instead of sleeping.
+
+NOW = datetime.datetime(2020, 10, 5, 0, 0)
+
+
+def make_reminded(event_id, start, *minutes):
+    # titled by its id, with popups the given minutes before it starts, or the default reminders
+    return make_event(event_id, event_id, start, minutes=minutes or None)
+
+
+class FakeStop:
+    """
+    Stands in for the threading.Event of run: waiting advances the clock, and it is set after some waits
+    """
+
+    def __init__(self, clock, waits):
+        self.clock = clock
+        self.left = waits
+        self.waited = []
+
+    def is_set(self):
+        return self.left == 0
+
+    def wait(self, seconds):
+        self.waited.append(seconds)
+        self.clock.advance(seconds=seconds)
+        self.left -= 1
+
+
+def make_scheduler(*pages):
+    store, api = make_store(*pages)
+    clock = Calendar.FixedClock(NOW)
+    fired = []
+    scheduler = CalendarReminders.ReminderScheduler(store, lambda event, reminder: fired.append(
+        (clock.now().strftime("%H:%M"), event.title, reminder.minutes)), clock)
+    return scheduler, store, api, clock, fired
+
+
+class CalendarTestReminderScheduler(unittest.TestCase):
+
+    def test_fire_due_in_order(self):
+        scheduler, store, api, clock, fired = make_scheduler({"items": [
+            make_reminded("Lecture", "2020-10-05T02:00:00Z", 60, 10),
+            make_reminded("Lab", "2020-10-05T01:30:00Z"),  # default popup 10 minutes before
+            make_reminded("Standup", "2020-10-05T00:20:00Z", 30),  # already due before load, never fired
+            make_reminded("Yesterday", "2020-10-04T02:00:00Z", 10),
+        ], "nextSyncToken": "sync1"})
+        store.sync(api)
+        scheduler.load()
+        self.assertEqual(scheduler.fire_due(), 0)
+        clock.advance(hours=1, minutes=50)
+        self.assertEqual(scheduler.fire_due(), 3)
+        self.assertEqual(fired, [("01:50", "Lecture", 60), ("01:50", "Lab", 10), ("01:50", "Lecture", 10)])
+        self.assertIsNone(scheduler.next_fire_time())
+
+    def test_run_sleeps_until_each_deadline(self):
+        scheduler, store, api, clock, fired = make_scheduler(
+            {"items": [make_reminded("Lecture", "2020-10-05T02:00:00Z", 60),
+                       make_reminded("Lab", "2020-10-05T03:00:00Z", 10)], "nextSyncToken": "sync1"},
+            {"nextSyncToken": "sync2"})
+        stop = FakeStop(clock, 3)
+        scheduler.run(api, stop, sync_interval=7200)
+        # wake at 01:00 for the lecture, at 02:00 to sync, at 02:50 for the lab
+        self.assertEqual(stop.waited, [3600, 3600, 3000])
+        self.assertEqual(fired, [("01:00", "Lecture", 60)])
+        self.assertEqual(api.events.return_value.list.call_args[1]["syncToken"], "sync1")
+
+    def test_sync_changes_rescheduled(self):
+        scheduler, store, api, clock, fired = make_scheduler(
+            {"items": [make_reminded("Lecture", "2020-10-05T02:00:00Z", 60),
+                       make_reminded("Lab", "2020-10-05T03:00:00Z", 10),
+                       make_reminded("Exam", "2020-10-05T04:00:00Z", 30)], "nextSyncToken": "sync1"},
+            {"items": [make_reminded("Lecture", "2020-10-05T02:00:00Z", 15),  # reminder moved
+                       {"id": "Lab", "status": "cancelled"},
+                       make_reminded("Tutorial", "2020-10-05T01:00:00Z", 5)], "nextSyncToken": "sync2"},
+            {"nextSyncToken": "sync3"})
+        stop = FakeStop(clock, 4)
+        scheduler.run(api, stop, sync_interval=1800)
+        clock.advance(hours=4)
+        scheduler.fire_due()
+        self.assertEqual(fired, [("00:55", "Tutorial", 5), ("05:30", "Lecture", 15), ("05:30", "Exam", 30)])
+        self.assertEqual(stop.waited, [1800, 1500, 300, 1800])
+
+    def test_failed_sync_retried(self):
+        scheduler, store, api, clock, fired = make_scheduler(
+            {"items": [make_reminded("Lecture", "2020-10-05T02:00:00Z", 60),
+                       make_reminded("Lab", "2020-10-05T03:00:00Z", 10)], "nextSyncToken": "sync1"},
+            ConnectionResetError(),
+            HttpError(Mock(status=503), b"Unavailable"),
+            {"items": [make_reminded("Exam", "2020-10-05T04:00:00Z", 30)], "nextSyncToken": "sync2"})
+        store.sync(api)
+        stop = FakeStop(clock, 4)
+        scheduler.run(api, stop, sync_interval=3000)
+        # loaded from the store although the first sync failed, the second fails too, the third gets the exam
+        self.assertEqual(stop.waited, [3000, 600, 2400, 3000])
+        self.assertEqual(api.events.return_value.list.return_value.execute.call_count, 4)
+        self.assertEqual(fired, [("01:00", "Lecture", 60)])
+        clock.advance(hours=3)
+        scheduler.fire_due()
+        self.assertEqual([title for when, title, minutes in fired], ["Lecture", "Lab", "Exam"])
+        api.events.return_value.list.return_value.execute.side_effect = HttpError(Mock(status=401), b"Unauthorized")
+        stop.left = 1
+        with self.assertRaises(HttpError):
+            scheduler.run(api, stop)
+
+    def test_stale_entries_compacted(self):
+        scheduler, store, api, clock, fired = make_scheduler(
+            {"items": [make_reminded(str(number), "2020-10-06T00:00:00Z", 10) for number in range(10)],
+             "nextSyncToken": "sync1"},
+            *[{"items": [make_reminded("0", "2020-10-06T00:00:00Z", minutes)], "nextSyncToken": "sync"}
+              for minutes in range(20, 60)])
+        store.sync(api)
+        scheduler.load()
+        for attempt in range(40):
+            store.sync(api)
+        self.assertLessEqual(len(scheduler.heap), 21)  # 10 live entries and at most as many stale ones
+        clock.advance(days=1)
+        self.assertEqual(scheduler.fire_due(), 10)
+        self.assertIn(("00:00", "0", 59), fired)
+
+    def test_reloaded_after_store_cleared(self):
+        scheduler, store, api, clock, fired = make_scheduler(
+            {"items": [make_reminded("Lecture", "2020-10-05T02:00:00Z", 60)], "nextSyncToken": "sync1"},
+            {"items": [make_reminded("Lecture", "2020-10-05T02:00:00Z", 60),
+                       make_reminded("Lab", "2020-10-05T03:00:00Z", 60)], "nextSyncToken": "sync2"},
+            {"nextSyncToken": "sync3"})
+        stop = FakeStop(clock, 1)
+        scheduler.run(api, stop, sync_interval=60)
+        store.clear()  # what the store does when the sync token expired
+        self.assertFalse(scheduler.loaded)
+        stop.left = 2
+        scheduler.run(api, stop, sync_interval=60)
+        clock.advance(hours=3)
+        scheduler.fire_due()
+        self.assertEqual([title for when, title, minutes in fired], ["Lecture", "Lab"])
+
+    def test_many_reminders(self):
+        events = [make_reminded(str(number), (NOW + datetime.timedelta(minutes=number)).isoformat() + "Z", 5, 10)
+                  for number in range(10000)]
+        scheduler, store, api, clock, fired = make_scheduler({"items": events, "nextSyncToken": "sync1"})
+        store.sync(api)
+        scheduler.load()
+        self.assertEqual(len(scheduler.heap), 19983)  # the reminders of the first ten minutes were due already
+        clock.advance(days=1)
+        with patch.object(CalendarReminders, "heapq", Mock(wraps=heapq)) as counted:
+            self.assertEqual(scheduler.fire_due(), 2880)
+        # each reminder fired costs a pop from the heap, not a scan of the 20000 (CalendarBenchmarkReminders.py
+        # times it)
+        self.assertEqual(counted.heappop.call_count, 2880)
+        self.assertEqual(len(scheduler.heap), 19983 - 2880)
+
+
+def main():
+    suite = unittest.TestLoader().loadTestsFromTestCase(CalendarTestReminderScheduler)
+    # This will run the test suite.
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+main()
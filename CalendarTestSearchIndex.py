@@ -0,0 +1,108 @@
+import unittest
+from io import StringIO
+from unittest.mock import Mock, patch
+import Calendar
+import CalendarSearch
+from CalendarTestFixtures import make_event, make_store
+
+# NOTE: ALL THE TESTS HERE ARE FOR THE SearchIndex CLASS IN CalendarSearch.py AND ITS USE BY
+# get_searched_events AND get_searched_reminders
+# Test Strategy : Branch Coverage
+
+
+EVENTS = [
+    make_event("1", "FIT2107 Lecture", "2020-10-05T02:00:00Z", location="Clayton campus",
+               attendees=[{"email": "alice@monash.edu"}, {"email": "bob@monash.edu"}]),
+    make_event("2", "Lab", "2020-10-04T02:00:00Z", description="Testing lecture notes"),
+    make_event("3", "Exam", "2020-10-20T02:00:00Z"),
+]
+
+
+class CalendarTestSearchIndex(unittest.TestCase):
+
+    def test_index_built_from_store_on_first_search(self):
+        store, api = make_store({"items": EVENTS, "nextSyncToken": "sync1"})
+        index = CalendarSearch.SearchIndex(store)
+        store.sync(api)
+        self.assertFalse(index.built)
+        self.assertEqual([event.id for event, fields in index.search("lecture")], ["2", "1"])
+        self.assertTrue(index.built)
+
+    def test_matched_fields_reported(self):
+        store, api = make_store({"items": EVENTS, "nextSyncToken": "sync1"})
+        index = CalendarSearch.SearchIndex(store)
+        store.sync(api)
+        self.assertEqual([(event.id, fields) for event, fields in index.search("lecture")],
+                         [("2", ["description"]), ("1", ["summary"])])
+        self.assertEqual([(event.id, fields) for event, fields in index.search("clayton bob@monash.edu")],
+                         [("1", ["location", "attendees"])])
+
+    def test_prefix_and_multi_term_queries(self):
+        store, api = make_store({"items": EVENTS, "nextSyncToken": "sync1"})
+        index = CalendarSearch.SearchIndex(store)
+        store.sync(api)
+        self.assertEqual([event.id for event, fields in index.search("LECT")], ["2", "1"])
+        self.assertEqual([event.id for event, fields in index.search("lect fit")], ["1"])
+        self.assertEqual(index.search("lect missing"), [])
+        self.assertEqual(index.search("!!"), [])
+
+    def test_incremental_updates(self):
+        store, api = make_store({"items": EVENTS, "nextSyncToken": "sync1"},
+                                {"items": [{"id": "1", "status": "cancelled"},
+                                           make_event("3", "Final exam review", "2020-10-20T02:00:00Z")],
+                                 "nextSyncToken": "sync2"})
+        index = CalendarSearch.SearchIndex(store)
+        index.get_events(api, "exam")
+        self.assertEqual([event.summary for event in index.get_events(api, "exam")], ["Final exam review"])
+        self.assertEqual(index.search("lecture")[0][0].id, "2")
+        # words only the removed events had are gone from the index
+        self.assertNotIn("clayton", index.vocabulary)
+        self.assertEqual(index.vocabulary, sorted(index.postings))
+
+    def test_full_resync_clears_index(self):
+        store, api = make_store({"items": EVENTS, "nextSyncToken": "sync1"})
+        index = CalendarSearch.SearchIndex(store)
+        index.get_events(api, "exam")
+        store.clear()
+        self.assertEqual(index.search("exam"), [])
+
+    def test_searched_events_answered_locally(self):
+        store, api = make_store({"items": EVENTS, "nextSyncToken": "sync1"}, {"nextSyncToken": "sync2"})
+        index = CalendarSearch.SearchIndex(store)
+        self.assertEqual(Calendar.get_searched_events(api, "lecture", index=index),
+                         "Lab,2020-10-04T02:00:00Z\nFIT2107 Lecture,2020-10-05T02:00:00Z\n")
+        stream = StringIO()
+        Calendar.get_searched_reminders(api, "exam", stream, index)
+        self.assertEqual(stream.getvalue(), "Exam,Reminder through popup 10 minutes before event starts\n")
+        # only the sync requests went to the server, no q= query
+        for call in api.events.return_value.list.call_args_list:
+            self.assertNotIn("q", call[1])
+
+    def test_search_without_scanning_events(self):
+        store, api = make_store({"items": [make_event(str(i), "Meeting %d with team %d" % (i, i % 50),
+                                                      "2020-10-05T02:00:00Z") for i in range(2000)],
+                                 "nextSyncToken": "sync1"})
+        index = CalendarSearch.SearchIndex(store)
+        store.sync(api)
+        index.build()
+        with patch.object(CalendarSearch, "tokenize", Mock(wraps=CalendarSearch.tokenize)) as tokenize, \
+                patch.object(CalendarSearch, "field_texts", Mock(wraps=CalendarSearch.field_texts)) as field_texts, \
+                patch.object(store, "query", Mock(wraps=store.query)) as query:
+            results = index.search("meet team 7")
+        # only the query is tokenized, the events are neither read again nor their text scanned
+        # (CalendarBenchmarkSearch.py times it against the q= scan)
+        self.assertEqual(tokenize.call_count, 1)
+        self.assertEqual(field_texts.call_count, 0)
+        self.assertEqual(query.call_count, 0)
+        # "7" is a prefix of the meeting numbers 7, 70 to 79, ... as well as of team 7
+        expected = [str(i) for i in range(2000) if str(i).startswith("7") or str(i % 50).startswith("7")]
+        self.assertEqual(sorted(event.id for event, fields in results), sorted(expected))
+
+
+def main():
+    suite = unittest.TestLoader().loadTestsFromTestCase(CalendarTestSearchIndex)
+    # This will run the test suite.
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+main()
@@ -0,0 +1,206 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock, patch
+import httplib2
+import Calendar
+import CalendarTransport
+
+# NOTE: ALL THE TESTS HERE ARE FOR THE POOLED TRANSPORT IN CalendarTransport.py AND ITS USE BY get_calendar_api
+# IN Calendar.py
+# Test Strategy : Branch Coverage
+
+
+class FakeHttp:
+    """
+    Stands in for httplib2.Http, failing the test if two threads use it at the same time
+    """
+
+    def __init__(self, delay=0, error=None):
+        self.connections = {"http:localhost": Mock()}
+        self.delay = delay
+        self.error = error
+        self.busy = False
+        self.requests = []
+
+    def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+        assert not self.busy, "Http used by two threads at once"
+        self.busy = True
+        time.sleep(self.delay)
+        self.busy = False
+        self.requests.append((uri, method, body, headers))
+        if self.error is not None:
+            raise self.error
+        return httplib2.Response({"status": "200"}), b'{"items": []}'
+
+
+class CountingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = 0
+
+    def setup(self):
+        CountingHandler.connections += 1
+        BaseHTTPRequestHandler.setup(self)
+
+    def do_GET(self):
+        body = b'{"items": []}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class CalendarTestTransport(unittest.TestCase):
+
+    def test_connections_reused(self):
+        built = []
+        pool = CalendarTransport.ConnectionPool(2, lambda: built.append(FakeHttp()) or built[-1])
+        first = pool.acquire()
+        second = pool.acquire()
+        pool.release(first)
+        pool.release(second)
+        # the last one given back is handed out first, nothing new is built
+        self.assertIs(pool.acquire(), second)
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(len(built), 2)
+        with self.assertRaises(ValueError):
+            CalendarTransport.ConnectionPool(0)
+
+    def test_threads_bounded_by_size(self):
+        built = []
+        pool = CalendarTransport.ConnectionPool(3, lambda: built.append(FakeHttp(0.001)) or built[-1])
+        http = CalendarTransport.PooledHttp(pool)
+        errors = []
+
+        def client():
+            try:
+                for i in range(20):
+                    response, content = http.request("http://localhost/events", "GET")
+                    self.assertEqual(json.loads(content), {"items": []})
+            except AssertionError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=client) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(built), 3)
+        self.assertEqual(sum(len(each.requests) for each in built), 160)
+        self.assertEqual(len(pool.idle), len(built))
+
+    def test_failed_request_discarded(self):
+        broken = FakeHttp(error=ConnectionResetError())
+        pool = CalendarTransport.ConnectionPool(1, Mock(side_effect=[broken, FakeHttp()]))
+        http = CalendarTransport.PooledHttp(pool)
+        with self.assertRaises(ConnectionResetError):
+            http.request("http://localhost/events")
+        self.assertEqual(broken.connections, {})
+        response, content = http.request("http://localhost/events", "PATCH", "{}", {"If-Match": "\"1\""})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(pool.idle[0].requests, [("http://localhost/events", "PATCH", "{}", {"If-Match": "\"1\""})])
+        self.assertEqual(pool.created, 1)
+
+    def test_factory_failure_frees_slot(self):
+        pool = CalendarTransport.ConnectionPool(1, Mock(side_effect=[OSError(), FakeHttp()]))
+        with self.assertRaises(OSError):
+            pool.acquire()
+        self.assertIsInstance(pool.acquire(), FakeHttp)
+
+    def test_resize(self):
+        pool = CalendarTransport.ConnectionPool(3, FakeHttp)
+        borrowed = [pool.acquire() for i in range(3)]
+        pool.release(borrowed[0])
+        pool.resize(1)
+        self.assertEqual((pool.created, pool.idle), (2, []))
+        self.assertEqual(borrowed[0].connections, {})
+        pool.release(borrowed[1])  # still one too many
+        self.assertEqual((pool.created, pool.idle), (1, []))
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+        waiter.start()
+        waiter.join(0.05)
+        self.assertEqual(acquired, [])  # the pool is full
+        pool.resize(2)
+        waiter.join(5)
+        self.assertEqual(len(acquired), 1)
+        with self.assertRaises(ValueError):
+            pool.resize(0)
+        pool.release(borrowed[2])
+        pool.close()
+        self.assertEqual((pool.created, pool.idle), (1, []))
+
+    def test_one_pool_per_process(self):
+        pool = CalendarTransport.get_pool()
+        self.assertIs(CalendarTransport.get_pool(), pool)
+        self.assertIs(CalendarTransport.PooledHttp().pool, pool)
+        with patch("os.getpid", return_value=-1):  # a forked child
+            child = CalendarTransport.get_pool()
+        self.assertIsNot(child, pool)
+        size = CalendarTransport.POOL_SIZE
+        try:
+            CalendarTransport.set_pool_size(4)
+            self.assertEqual(CalendarTransport.get_pool().size, 4)
+        finally:
+            CalendarTransport.set_pool_size(size)
+        CalendarTransport.PooledHttp().close()  # leaves the shared pool open
+        self.assertEqual(CalendarTransport.get_pool().size, size)
+
+    def test_kept_alive_against_stub(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = "http://127.0.0.1:%d/calendar/v3/calendars/primary/events" % server.server_port
+        pool = CalendarTransport.ConnectionPool(2)
+        try:
+            CountingHandler.connections = 0
+            for client in range(3):  # e.g. three clients built by get_calendar_api
+                http = CalendarTransport.PooledHttp(pool)
+                for i in range(5):
+                    self.assertEqual(http.request(url)[0].status, 200)
+            self.assertEqual(CountingHandler.connections, 1)
+            CountingHandler.connections = 0
+            for client in range(3):
+                http = CalendarTransport.new_http()
+                for i in range(5):
+                    http.request(url)
+                CalendarTransport.close_http(http)
+            self.assertEqual(CountingHandler.connections, 3)
+        finally:
+            pool.close()
+            server.shutdown()
+            server.server_close()
+
+    def test_client_uses_pool(self):
+        from googleapiclient import discovery_cache
+        from google.oauth2.credentials import Credentials
+        get_static_doc = getattr(discovery_cache, 'get_static_doc', None)
+        if get_static_doc is None:
+            self.skipTest("the client library does not bundle discovery documents")
+        fake = FakeHttp()
+        pool = CalendarTransport.ConnectionPool(1, lambda: fake)
+        with patch("Calendar.load_discovery_document", return_value=get_static_doc('calendar', 'v3')), \
+                patch("Calendar.get_credentials", return_value=Credentials("token")), \
+                patch("CalendarTransport.get_pool", return_value=pool):
+            api = Calendar.get_calendar_api()
+            self.assertEqual(api.events().list(calendarId='primary').execute(), {"items": []})
+        uri, method, body, headers = fake.requests[0]
+        self.assertIn("/calendars/primary/events", uri)
+        self.assertEqual(headers["authorization"], "Bearer token")
+        api.close()  # the connections stay in the pool
+        self.assertEqual(pool.idle, [fake])
+
+
+def main():
+    suite = unittest.TestLoader().loadTestsFromTestCase(CalendarTestTransport)
+    # This will run the test suite.
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+main()
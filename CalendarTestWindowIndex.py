@@ -0,0 +1,96 @@
+import datetime
+import random
+import unittest
+import Calendar
+import CalendarIntervals
+from CalendarTestFixtures import make_event, make_store
+
+# NOTE: ALL THE TESTS HERE ARE FOR THE IntervalTree AND WindowIndex CLASSES IN CalendarIntervals.py
+# Test Strategy : Branch Coverage, plus random windows compared with the EventStore's SQL query
+
+
+EVENTS = [
+    make_event("1", "Conference", "2020-09-29T22:00:00Z", "2020-10-02T06:00:00Z"),  # crosses into October
+    make_event("2", "Lecture", "2020-10-05T02:00:00Z", "2020-10-05T04:00:00Z"),
+    make_event("3", "Deadline", "2020-10-31T12:00:00Z", "2020-10-31T12:00:00Z"),  # lasts no time
+    make_event("4", "Holiday", "2020-10-30T00:00:00Z", "2020-11-08T00:00:00Z"),  # crosses into November
+    {"id": "5", "summary": "Exam", "status": "confirmed", "start": {"date": "2020-11-03"},
+     "end": {"date": "2020-11-04"}, "reminders": {"useDefault": True}},
+]
+
+
+def make_index(events, *later_pages):
+    store, api = make_store({"items": events, "nextSyncToken": "sync1"}, *later_pages)
+    return CalendarIntervals.WindowIndex(store), store, api
+
+
+class CalendarTestWindowIndex(unittest.TestCase):
+
+    def test_tree_containing(self):
+        tree = CalendarIntervals.IntervalTree([(0, 10, "a"), (2, 3, "b"), (5, 20, "c"), (12, 12, "d"), (15, 16, "e")])
+        self.assertEqual(sorted(key for start, end, key in tree.containing(2)), ["a", "b"])
+        self.assertEqual(sorted(key for start, end, key in tree.containing(10)), ["c"])  # a ends at 10
+        self.assertEqual(sorted(key for start, end, key in tree.containing(15.5)), ["c", "e"])
+        self.assertEqual(tree.containing(-1), [])
+        self.assertEqual(CalendarIntervals.IntervalTree([]).containing(0), [])
+
+    def test_tree_matches_brute_force(self):
+        generator = random.Random(2107)
+        intervals = []
+        for key in range(2000):
+            start = generator.randint(0, 10000)
+            intervals.append((start, start + generator.choice([0, 1, 5, 50, 500, 5000]), key))
+        tree = CalendarIntervals.IntervalTree(intervals)
+        for moment in [generator.randint(-10, 16000) for attempt in range(200)]:
+            self.assertEqual(sorted(tree.containing(moment)),
+                             sorted(interval for interval in intervals if interval[0] <= moment < interval[1]))
+
+    def test_month_window_includes_events_across_its_boundaries(self):
+        index, store, api = make_index(EVENTS)
+        october = [event["summary"] for event in index.get_events(api, "2020-10-01T00:00:00Z",
+                                                                   "2020-11-01T00:00:00Z")]
+        self.assertEqual(october, ["Conference", "Lecture", "Holiday", "Deadline"])
+
+    def test_windows_match_store_query(self):
+        index, store, api = make_index(EVENTS)
+        store.sync(api)
+        base = datetime.datetime(2020, 9, 28, tzinfo=datetime.timezone.utc)
+        for day in range(0, 45, 2):
+            for length in (1, 7, 31):
+                start = (base + datetime.timedelta(days=day)).strftime("%Y-%m-%dT%H:%M:%SZ")
+                end = (base + datetime.timedelta(days=day + length)).strftime("%Y-%m-%dT%H:%M:%SZ")
+                self.assertEqual([event["id"] for event in index.query(start, end)],
+                                 [event["id"] for event in store.query(start, end)], (start, end))
+        self.assertEqual(len(index.query()), 5)
+        self.assertEqual([event["id"] for event in index.query("2020-11-03T12:00:00+11:00")], ["4", "5"])
+        self.assertEqual(index.query("2020-11-03T00:00:00Z", "2020-11-02T00:00:00Z"), [])
+
+    def test_rebuilt_after_sync_changes(self):
+        index, store, api = make_index(EVENTS, {"items": [{"id": "2", "status": "cancelled"}],
+                                                "nextSyncToken": "sync2"}, {"nextSyncToken": "sync3"})
+        self.assertEqual(len(index.get_events(api, "2020-10-05T00:00:00Z", "2020-10-06T00:00:00Z")), 1)
+        self.assertEqual(index.get_events(api, "2020-10-05T00:00:00Z", "2020-10-06T00:00:00Z"), [])
+        self.assertFalse(index.stale)
+        index.get_events(api)  # nothing changed, nothing rebuilt
+        self.assertFalse(index.stale)
+        store.clear()
+        self.assertTrue(index.stale)
+
+    def test_navigate_calendar_answered_locally(self):
+        index, store, api = make_index(EVENTS, {"nextSyncToken": "sync2"})
+        result = Calendar.navigate_calendar(api, datetime.datetime(2020, 11, 1), "MONTH", index)
+        self.assertIn("Holiday,2020-10-30T00:00:00Z", result)
+        self.assertIn("Exam,2020-11-03", result)
+        self.assertNotIn("Lecture", result)
+        # only sync requests went out, without timeMin or timeMax
+        for call in api.events.return_value.list.call_args_list:
+            self.assertNotIn("timeMin", call[1])
+
+
+def main():
+    suite = unittest.TestLoader().loadTestsFromTestCase(CalendarTestWindowIndex)
+    # This will run the test suite.
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+main()
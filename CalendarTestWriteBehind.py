@@ -0,0 +1,185 @@
+import unittest
+from io import StringIO
+from unittest.mock import Mock, patch
+from googleapiclient.errors import HttpError
+import Calendar
+import CalendarOffline
+from CalendarIntervals import WindowIndex
+from CalendarSearch import SearchIndex
+from CalendarTestFixtures import make_event, make_store
+
+# NOTE: ALL THE TESTS HERE ARE FOR THE WRITE BEHIND OF REMINDER EDITS IN CalendarOffline.py AND delete_reminders
+# IN Calendar.py
+# Test Strategy : Branch Coverage
+
+
+def make_attended(event_id, etag, *minutes):
+    # with 50 attendees, which an update of the whole event would send back
+    return make_event(event_id, "FIT2107 " + event_id, "2020-10-05T02:00:00Z", "2020-10-05T04:00:00Z", minutes,
+                      etag=etag, created="2020-09-01T00:00:00.000Z", creator={"email": "user@gmail.com"},
+                      attendees=[{"email": "student" + str(number) + "@monash.edu"} for number in range(50)])
+
+
+def make_outbox(*events, flush_delay=60):
+    """
+    An OfflineStore synced once with events, whose timer would not go off during a test unless asked to
+    """
+    store, api = make_store({"items": list(events), "nextSyncToken": "sync1"})
+    outbox = CalendarOffline.OfflineStore(store, flush_delay)
+    outbox.sync(api)
+    api.events.return_value.list.return_value.execute.side_effect = None
+    api.events.return_value.list.return_value.execute.return_value = {"nextSyncToken": "sync2"}
+    api.events.return_value.patch.return_value.headers = {}
+    return outbox, api
+
+
+class CalendarTestWriteBehind(unittest.TestCase):
+
+    def test_edits_coalesced_into_one_patch(self):
+        outbox, api = make_outbox(make_attended("Lecture", "\"1\"", 5, 10, 30, 60))
+        event = make_attended("Lecture", "\"1\"", 5, 10, 30, 60)
+        for attempt in range(3):
+            self.assertIsNone(Calendar.delete_reminders(api, event, 0, outbox))
+        self.assertEqual(outbox.pending(), 1)
+        self.assertEqual(next(outbox.query())["reminders"]["overrides"], [{"method": "popup", "minutes": 60}])
+        api.events.return_value.patch.assert_not_called()
+        outbox.flush(api)
+        self.assertEqual(outbox.pending(), 0)
+        api.events.return_value.update.assert_not_called()
+        # one patch, with the reminders only and the etag the event had before the first edit
+        api.events.return_value.patch.assert_called_once_with(calendarId='primary', eventId="Lecture", body={
+            "reminders": {"useDefault": False, "overrides": [{"method": "popup", "minutes": 60}]}})
+        self.assertEqual(api.events.return_value.patch.return_value.headers, {"If-Match": "\"1\""})
+        self.assertIsNone(outbox.timer)
+
+    def test_events_patched_separately(self):
+        outbox, api = make_outbox(make_attended("Lecture", "\"1\"", 5, 10), make_attended("Lab", "\"2\"", 5, 10))
+        lecture, lab = outbox.query()
+        Calendar.delete_reminders(api, lecture, 0, outbox)
+        Calendar.delete_reminders(api, lab, 1, outbox)
+        Calendar.delete_reminders(api, lecture, 0, outbox)
+        outbox.flush(api)
+        self.assertEqual([(call[1]["eventId"], call[1]["body"]["reminders"]["overrides"])
+                          for call in api.events.return_value.patch.call_args_list],
+                         [("Lecture", []), ("Lab", [{"method": "popup", "minutes": 5}])])
+
+    def test_flushed_by_timer(self):
+        outbox, api = make_outbox(make_attended("Lecture", "\"1\"", 5, 10), flush_delay=0.01)
+        Calendar.delete_reminders(api, next(outbox.query()), 0, outbox)
+        timer = outbox.timer
+        timer.join(5)
+        self.assertEqual(outbox.pending(), 0)
+        self.assertEqual(api.events.return_value.patch.call_count, 1)
+        self.assertIsNone(outbox.timer)
+
+    def test_held_back_from_sync(self):
+        outbox, api = make_outbox(make_attended("Lecture", "\"1\"", 5, 10))
+        outbox.queue("delete", make_attended("Lab", "\"2\""))
+        Calendar.delete_reminders(api, next(outbox.query()), 0, outbox)
+        outbox.sync(api)
+        # the offline delete is replayed by the sync, the reminder edit still waits for the timer
+        self.assertEqual(api.events.return_value.delete.call_count, 1)
+        api.events.return_value.patch.assert_not_called()
+        self.assertEqual(outbox.pending(), 1)
+        outbox.flush(api)
+        self.assertEqual(outbox.pending(), 0)
+
+    def test_new_etag_kept(self):
+        outbox, api = make_outbox(make_attended("Lecture", "\"1\"", 5, 10, 30))
+        api.events.return_value.patch.return_value.execute.return_value = make_attended("Lecture", "\"7\"", 10, 30)
+        Calendar.delete_reminders(api, next(outbox.query()), 0, outbox)
+        outbox.flush(api)
+        self.assertEqual(next(outbox.query())["etag"], "\"7\"")
+        Calendar.delete_reminders(api, next(outbox.query()), 0, outbox)
+        outbox.flush(api)
+        self.assertEqual(api.events.return_value.patch.return_value.headers, {"If-Match": "\"7\""})
+
+    def test_conflict_reported(self):
+        outbox, api = make_outbox(make_attended("Lecture", "\"1\"", 5, 10))
+        api.events.return_value.patch.return_value.execute.side_effect = HttpError(Mock(status=412),
+                                                                                   b"Precondition Failed")
+        Calendar.delete_reminders(api, next(outbox.query()), 0, outbox)
+        outbox.flush(api)
+        self.assertEqual(outbox.pending(), 0)
+        self.assertEqual(outbox.banner(), "Not sent, changed on the server in the meantime: FIT2107 Lecture")
+
+    def test_flush_while_offline(self):
+        outbox, api = make_outbox(make_attended("Lecture", "\"1\"", 5, 10))
+        api.events.return_value.patch.return_value.execute.side_effect = [ConnectionResetError(), None]
+        Calendar.delete_reminders(api, next(outbox.query()), 0, outbox)
+        outbox.flush(api)
+        self.assertTrue(outbox.offline)
+        self.assertEqual(outbox.pending(), 1)
+        outbox.sync(api)  # no flush scheduled any more, the sync sends it
+        self.assertFalse(outbox.offline)
+        self.assertEqual(outbox.pending(), 0)
+        api.events.return_value.patch.return_value.execute.side_effect = HttpError(Mock(status=500), b"Error")
+        Calendar.delete_reminders(api, next(outbox.query()), 0, outbox)
+        outbox.flush(api)  # the server failed, it is sent again later
+        self.assertEqual(outbox.pending(), 1)
+
+    def test_flush_error_reported(self):
+        outbox, api = make_outbox(make_attended("Lecture", "\"1\"", 5, 10), flush_delay=0.01)
+        api.events.side_effect = [ValueError("invalid_grant: Token has been expired or revoked."), api.events()]
+        Calendar.delete_reminders(api, next(outbox.query()), 0, outbox)
+        outbox.timer.join(5)  # on the timer's thread, nothing is raised
+        self.assertEqual(outbox.pending(), 1)
+        self.assertFalse(outbox.offline)
+        self.assertEqual(outbox.banner(), "Could not send the changes (invalid_grant: Token has been expired or "
+                                          "revoked.), 1 change(s) waiting to be sent")
+        self.assertEqual(outbox.banner(), "")
+        outbox.flush(api)
+        self.assertEqual(outbox.pending(), 0)
+        self.assertEqual(api.events.return_value.patch.call_count, 1)
+
+    def test_partial_event_kept_whole_in_snapshot(self):
+        outbox, api = make_outbox(make_attended("Lecture", "\"1\"", 5, 10))
+        # as read with DETAIL_FIELDS, or with fewer fields still
+        partial = {"id": "Lecture", "etag": "\"1\"", "summary": "FIT2107 Lecture",
+                   "reminders": {"useDefault": False, "overrides": [{"method": "popup", "minutes": 5}]}}
+        Calendar.delete_reminders(api, partial, 0, outbox)
+        stored = next(outbox.query())
+        self.assertEqual(len(stored["attendees"]), 50)
+        self.assertEqual(stored["reminders"]["overrides"], [])
+        outbox.flush(api)
+
+    def test_overlay(self):
+        outbox, api = make_outbox(make_attended("Lecture", "\"1\"", 5, 10), make_attended("Lab", "\"2\"", 5))
+        Calendar.delete_reminders(api, next(outbox.query()), 0, outbox)
+        overlaid = outbox.overlay([make_attended("Lecture", "\"1\"", 5, 10), make_attended("Lab", "\"2\"", 5)])
+        self.assertEqual([len(event["reminders"]["overrides"]) for event in overlaid], [1, 1])
+        outbox.flush(api)
+
+    def test_patch_smaller_than_update(self):
+        event = make_attended("Lecture", "\"1\"", 5, 10, 30, 60)
+        outbox, api = make_outbox(dict(event))
+        for attempt in range(3):
+            Calendar.delete_reminders(api, event, 0, outbox)
+        outbox.flush(api)
+        sent = len(str(api.events.return_value.patch.call_args[1]["body"]))
+        # less than a tenth of the three updates of the whole event (and its 50 attendees)
+        self.assertLess(sent * 10, 3 * len(str(event)))
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('Calendar.input', create=True)
+    def test_run_calendar_reminders_written_behind(self, mocked_input, mocked_output):
+        outbox, api = make_outbox(make_attended("Lecture", "\"1\"", 5, 10, 30))
+        api.events.return_value.list.return_value.execute.side_effect = [
+            {"nextSyncToken": "sync2"}, {"items": [make_attended("Lecture", "\"1\"", 5, 10, 30)]},
+            {"nextSyncToken": "sync3"}, {"items": [make_attended("Lecture", "\"1\"", 5, 10, 30)]}]
+        mocked_input.side_effect = ["navigate", "1", "5 October 2020", "y", "lecture", "0", "del -r", "0",
+                                    "navigate", "1", "5 October 2020", "y", "lecture", "0", "del -r", "0", "exit"]
+        Calendar.run_calendar(api, WindowIndex(outbox), SearchIndex(outbox), outbox)
+        self.assertEqual(mocked_output.getvalue().count("Deleted reminder succesfully"), 2)
+        api.events.return_value.patch.assert_called_once_with(calendarId='primary', eventId="Lecture", body={
+            "reminders": {"useDefault": False, "overrides": [{"method": "popup", "minutes": 30}]}})
+        self.assertEqual(outbox.pending(), 0)
+
+
+def main():
+    suite = unittest.TestLoader().loadTestsFromTestCase(CalendarTestWriteBehind)
+    # This will run the test suite.
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+main()
@@ -0,0 +1,152 @@
+# Pooled keep-alive transport for the Calendar client. httplib2 keeps connections alive, but an Http object
+# is not thread safe, so every client (one per worker thread of CalendarMulti, the GUI's fetch thread, each
+# call of get_calendar_api) used to open its own connections, with a new TLS handshake each time.
+# Instead all the clients of a process share one pool of Http objects: a request borrows one whose connection
+# is still open, and gives it back when the response has been read, so a connection is only ever used by one
+# thread at a time. The pool holds at most POOL_SIZE of them, requests beyond that wait for one to be free.
+import os
+import threading
+
+# Connections kept alive per process, and the most requests in flight at the same time
+POOL_SIZE = 10
+
+
+def new_http():
+    """
+    An Http set up as the client library sets up its own (timeout, 308 not followed as a redirect)
+    """
+    from googleapiclient.http import build_http  # deferred, see get_calendar_api in Calendar.py
+    return build_http()
+
+
+def close_http(http):
+    for connection in list(http.connections.values()):
+        connection.close()
+    http.connections.clear()
+
+
+class ConnectionPool:
+    """
+    Thread safe pool of at most size Http objects, built by factory when needed. The most recently
+    returned one is handed out first, its connection being the least likely to have been closed
+    """
+
+    def __init__(self, size=POOL_SIZE, factory=new_http):
+        if size < 1:
+            raise ValueError("pool size must be at least 1")
+        self.size = size
+        self.factory = factory
+        self.idle = []
+        self.created = 0  # idle and borrowed
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while not self.idle and self.created >= self.size:
+                self.condition.wait()
+            if self.idle:
+                return self.idle.pop()
+            self.created += 1
+        try:
+            return self.factory()
+        except Exception:
+            self.discard(None)
+            raise
+
+    def release(self, http):
+        with self.condition:
+            if self.created > self.size:  # shrunk while it was borrowed
+                self.created -= 1
+                close_http(http)
+            else:
+                self.idle.append(http)
+            self.condition.notify()
+
+    def discard(self, http):
+        """
+        Give back an Http whose connection is in an unknown state (the request failed), a new one replaces it
+        """
+        if http is not None:
+            close_http(http)
+        with self.condition:
+            self.created -= 1
+            self.condition.notify()
+
+    def resize(self, size):
+        if size < 1:
+            raise ValueError("pool size must be at least 1")
+        with self.condition:
+            self.size = size
+            while self.idle and self.created > self.size:
+                close_http(self.idle.pop(0))
+                self.created -= 1
+            self.condition.notify_all()
+
+    def close(self):
+        """
+        Close the idle connections, borrowed ones are closed as they come back
+        """
+        with self.condition:
+            for http in self.idle:
+                close_http(http)
+            self.created -= len(self.idle)
+            self.idle = []
+
+
+pool = None
+pool_pid = None
+pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    The pool of this process. A forked child gets a pool of its own rather than sharing the parent's sockets
+    """
+    global pool, pool_pid
+    with pool_lock:
+        if pool is None or pool_pid != os.getpid():
+            pool = ConnectionPool(POOL_SIZE)
+            pool_pid = os.getpid()
+        return pool
+
+
+def set_pool_size(size):
+    global POOL_SIZE
+    POOL_SIZE = size
+    get_pool().resize(size)
+
+
+class PooledHttp:
+    """
+    Takes the place of httplib2.Http in the client (wrapped by google_auth_httplib2.AuthorizedHttp for the
+    credentials). Each request runs on an Http borrowed from the pool, so one PooledHttp can serve many threads
+    """
+
+    def __init__(self, connection_pool=None):
+        self.connection_pool = connection_pool
+
+    @property
+    def pool(self):
+        return get_pool() if self.connection_pool is None else self.connection_pool
+
+    def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+        pool = self.pool
+        http = pool.acquire()
+        try:
+            response = http.request(uri, method, body, headers, *args, **kwargs)
+        except Exception:
+            pool.discard(http)
+            raise
+        pool.release(http)
+        return response
+
+    def close(self):
+        pass  # the connections belong to the pool, which other clients are still using
+
+
+def authorized_http(credentials, connection_pool=None):
+    """
+    Transport for build_from_document(http=...): pooled connections carrying the credentials
+    """
+    from google_auth_httplib2 import AuthorizedHttp  # deferred, see get_calendar_api in Calendar.py
+    return AuthorizedHttp(credentials, http=PooledHttp(connection_pool))
@@ -0,0 +1,100 @@
+# Tk widgets for the GUI which stay responsive with tens of thousands of events
+from tkinter import END, LEFT, RIGHT, BOTH, Y
+
+
+class VirtualListbox:
+    """
+    Shows a long list of strings through a Listbox holding only the rows in view. The items are kept in
+    a Python list and scrolling rewrites the visible rows, so redraws cost the same whatever the length of the list.
+    near_end is called when the view gets within a screen of the last item, to load the next page of items.
+    Selection indexes (curselection) are positions in the whole list, not in the visible rows.
+    """
+
+    def __init__(self, listbox, scrollbar, rows=8, near_end=None):
+        self.listbox = listbox
+        self.scrollbar = scrollbar
+        self.rows = rows
+        self.near_end = near_end
+        self.items = []
+        self.shown = []  # rows currently in the listbox
+        self.offset = 0  # index of the first visible item
+        self.selected = None
+
+        listbox.pack(side=LEFT, fill=BOTH, expand=True)
+        scrollbar.pack(side=RIGHT, fill=Y)
+        scrollbar.configure(command=self.yview)
+        listbox.bind('<MouseWheel>', self.on_wheel)
+        listbox.bind('<Button-4>', self.on_wheel)
+        listbox.bind('<Button-5>', self.on_wheel)
+
+    def grid(self, **options):
+        self.listbox.master.grid(**options)
+
+    def bind(self, sequence, func):
+        self.listbox.bind(sequence, func, add='+')
+
+    def set_items(self, items):
+        """
+        Replace the items, only the visible rows which differ are rewritten
+        """
+        self.items = list(items)
+        self.selected = None
+        self.offset = max(0, min(self.offset, len(self.items) - self.rows))
+        self.redraw()
+
+    def append(self, items):
+        self.items.extend(items)
+        self.redraw()
+
+    def curselection(self):
+        visible = self.listbox.curselection()
+        if visible:
+            self.selected = self.offset + int(visible[0])
+        return () if self.selected is None else (self.selected,)
+
+    def yview(self, *args):
+        """
+        Scrollbar command, ("moveto", fraction) or ("scroll", count, "units" or "pages")
+        """
+        if args[0] == 'moveto':
+            offset = int(float(args[1]) * len(self.items))
+        elif args[2] == 'pages':
+            offset = self.offset + int(args[1]) * self.rows
+        else:
+            offset = self.offset + int(args[1])
+        self.scroll_to(offset)
+
+    def on_wheel(self, event):
+        if event.num == 5 or event.delta < 0:
+            self.scroll_to(self.offset + 3)
+        else:
+            self.scroll_to(self.offset - 3)
+        return "break"  # the listbox must not scroll its few rows itself
+
+    def scroll_to(self, offset):
+        self.curselection()  # remember the selection before its row is rewritten
+        self.offset = max(0, min(offset, len(self.items) - self.rows))
+        self.redraw()
+
+    def redraw(self):
+        visible = self.items[self.offset:self.offset + self.rows]
+        for row, text in enumerate(visible):
+            if row >= len(self.shown):
+                self.listbox.insert(END, text)
+            elif self.shown[row] != text:
+                self.listbox.delete(row)
+                self.listbox.insert(row, text)
+        if len(self.shown) > len(visible):
+            self.listbox.delete(len(visible), END)
+        self.shown = visible
+
+        self.listbox.selection_clear(0, END)
+        if self.selected is not None and 0 <= self.selected - self.offset < len(visible):
+            self.listbox.selection_set(self.selected - self.offset)
+
+        if self.items:
+            self.scrollbar.set(self.offset / len(self.items), (self.offset + len(visible)) / len(self.items))
+        else:
+            self.scrollbar.set(0, 1)
+        if self.near_end is not None and self.offset + 2 * self.rows >= len(self.items):
+            self.near_end()
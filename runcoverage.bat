@@ -14,6 +14,22 @@ coverage run -a -m --branch CalendarTestDeleteReminders
 coverage run -a -m --branch CalendarTestRunCalendar
 coverage run -a -m --branch CalendarTestGetSelectedEvents
 coverage run -a -m --branch CalendarTestGetSelectedReminders
+coverage run -a -m --branch CalendarTestEventStore
+coverage run -a -m --branch CalendarTestDeleteEventsBulk
+coverage run -a -m --branch CalendarTestLazyCalendarApi
+coverage run -a -m --branch CalendarTestImportTime
+coverage run -a -m --branch CalendarTestAsync
+coverage run -a -m --branch CalendarTestMultiCalendar
+coverage run -a -m --branch CalendarTestSearchIndex
+coverage run -a -m --branch CalendarTestEventModel
+coverage run -a -m --branch CalendarTestEventTable
+coverage run -a -m --branch CalendarTestWindowIndex
+coverage run -a -m --branch CalendarTestFreeBusy
+coverage run -a -m --branch CalendarTestRecurrence
+coverage run -a -m --branch CalendarTestReminderScheduler
+coverage run -a -m --branch CalendarTestOfflineMode
+coverage run -a -m --branch CalendarTestWriteBehind
+coverage run -a -m --branch CalendarTestTransport
 coverage run -a -m --branch CalendarGUITestAll
 coverage report 
 coverage html